@@ -0,0 +1,446 @@
+"""
+Load and latency benchmark for the backend.
+
+Starts the app in-process (in a scratch copy of the data files), connects simulated overlay
+clients to /ws, drives scripted match traffic through the REST API and prints a JSON report:
+
+    python benchmark.py --clients 50 --mutations 500 --output results.json
+    python benchmark.py --clients 50 --replay recordings/20250101-190000      # a recorded match, at max speed
+    python benchmark.py --clients 50 --simulate-match                          # 90 minutes on a virtual clock
+
+Server and clients share one process and one event loop, so CPU and memory figures include
+the simulated clients; compare runs made with the same parameters.
+"""
+import argparse
+import asyncio
+import bisect
+import contextlib
+import glob
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Which group of broadcasts each mutation kind produces; the n-th mutation of a group
+# is matched with the n-th frame of that group every client receives
+MUTATION_GROUPS = {"goal": "config", "card": "config", "substitution": "config", "style": "style"}
+FRAME_GROUPS = {"config": "config", "config_patch": "config", "scoreboard_style": "style"}
+# The server may fold these into the newest one before they go out: each mutation is matched
+# with the first frame of its group that arrives after it was sent
+LATEST_WINS_GROUPS = {"style"}
+# Match traffic: a goal, a card and a substitution for every burst of style slider updates
+SCRIPT = ["goal", "style", "style", "card", "style", "style", "substitution", "style", "style"]
+SQUAD_SIZE = 16
+LINEUP_SIZE = 11
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values: return {"samples": 0}
+    ordered = sorted(values)
+    def rank(p): return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 3)
+    return {"samples": len(ordered), "mean": round(statistics.fmean(ordered), 3),
+            "p50": rank(50), "p90": rank(90), "p95": rank(95), "p99": rank(99), "max": round(ordered[-1], 3)}
+
+
+def process_usage() -> Dict[str, float]:
+    usage = {"cpuSeconds": time.process_time()}
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    if resource is not None:
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage["maxRssMb"] = max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return usage
+
+
+class HttpClient:
+    """ Minimal keep-alive HTTP/1.1 JSON client, so the benchmark needs nothing beyond the backend's own requirements """
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def request(self, method: str, path: str, payload: Any = None) -> Any:
+        if self._writer is None: self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self._writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while (line := await self._reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length": length = int(value)
+        data = await self._reader.readexactly(length)
+        if status >= 400: raise RuntimeError(f"{method} {path} -> {status}: {data[:200]!r}")
+        return json.loads(data) if data else None
+
+    async def close(self):
+        if self._writer: self._writer.close()
+
+
+class OverlayClient:
+    """ A simulated overlay: records when each frame arrives and how big it is """
+    def __init__(self, url: str):
+        self.url = url
+        self.arrivals: Dict[str, List[float]] = {"config": [], "style": []}
+        self.ticks: List[float] = []
+        self.bytes_by_type: Dict[str, List[int]] = {}
+        self.snapshots = 0
+        self.extensions = ""
+        self.closed_early = False
+        self._task: asyncio.Task | None = None
+        self._ready = asyncio.Event()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+
+    async def _run(self):
+        import websockets
+        try:
+            async with websockets.connect(self.url, max_size=None) as ws:
+                # Message sizes below are before compression; this shows whether frames were compressed
+                self.extensions = ws.response.headers.get("Sec-WebSocket-Extensions", "")
+                async for raw in ws:
+                    received = time.perf_counter()
+                    message = json.loads(raw)
+                    self.bytes_by_type.setdefault(message["type"], []).append(len(raw))
+                    # Combined frames count once for bytes; their messages count as arrivals
+                    for message_type in ([m["type"] for m in message["messages"]] if message["type"] == "frame" else [message["type"]]):
+                        group = FRAME_GROUPS.get(message_type)
+                        if group: self.arrivals[group].append(received)
+                        elif message_type == "time": self.ticks.append(received)
+                        elif message_type == "snapshot":
+                            self.snapshots += 1
+                            self._ready.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        self.closed_early = True
+        self._ready.set()
+
+    @property
+    def in_sync(self) -> bool:
+        # A second snapshot means frames were dropped and replaced by a resync
+        return self.snapshots == 1 and not self.closed_early
+
+    async def stop(self):
+        if self._task: self._task.cancel()
+        try: await self._task
+        except (asyncio.CancelledError, Exception): pass
+
+
+class Driver:
+    """ Sends the scripted match traffic one request at a time, like a busy operator """
+    def __init__(self, http: HttpClient):
+        self.http = http
+        self.sent: Dict[str, List[float]] = {"config": [], "style": []}
+        self.round_trips: Dict[str, List[float]] = {kind: [] for kind in MUTATION_GROUPS}
+        self._steps = 0
+        self._on_field: Dict[str, List[int]] = {}
+
+    async def setup(self):
+        for team in ("teamA", "teamB"):
+            await self.http.request("POST", "/api/player/clear", {"team": team})
+            for number in range(1, SQUAD_SIZE + 1):
+                await self.http.request("POST", "/api/player/add", {"team": team, "number": number, "name": f"Player {number}"})
+            await self.http.request("POST", "/api/batch", {"operations": [
+                {"op": "toggle_on_field", "data": {"team": team, "number": number}} for number in range(1, LINEUP_SIZE + 1)]})
+            self._on_field[team] = list(range(1, LINEUP_SIZE + 1))
+
+    def _payload(self, kind: str) -> tuple:
+        step = self._steps
+        team = "teamA" if step % 2 == 0 else "teamB"
+        number = 1 + step % LINEUP_SIZE
+        minute = 1 + step % 90
+        if kind == "goal":
+            return "/api/player/goal", {"team": team, "number": number, "regMinute": minute, "addMinute": 0, "isOwnGoal": False, "isPenalty": False}
+        if kind == "card":
+            return "/api/player/card", {"team": team, "number": number, "card_type": "yellow", "regMinute": minute, "addMinute": 0}
+        if kind == "substitution":
+            on_field = self._on_field[team]
+            player_out = on_field.pop(0)
+            player_in = next(n for n in range(1, SQUAD_SIZE + 1) if n not in on_field and n != player_out)
+            on_field.append(player_in)
+            return "/api/batch", {"operations": [
+                {"op": "toggle_on_field", "data": {"team": team, "number": player_out}},
+                {"op": "toggle_on_field", "data": {"team": team, "number": player_in}}]}
+        # Dragging a slider: every value differs from the previous one
+        return "/api/scoreboard-style", {"boxMainColor": "#002266", "textMainColor": "#ffffff", "textAltColor": "#eeff00",
+                                         "boxAltColor": "#eb6a00", "opacity": 50 + step % 51, "scale": 80}
+
+    async def step(self):
+        kind = SCRIPT[self._steps % len(SCRIPT)]
+        path, payload = self._payload(kind)
+        started = time.perf_counter()
+        self.sent[MUTATION_GROUPS[kind]].append(started)
+        await self.http.request("POST", path, payload)
+        self.round_trips[kind].append((time.perf_counter() - started) * 1000)
+        self._steps += 1
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def delivered(arrivals: List[float], sent: List[float], group: str) -> bool:
+    if group in LATEST_WINS_GROUPS: return not sent or bool(arrivals) and arrivals[-1] >= sent[-1]
+    return len(arrivals) >= len(sent)
+
+
+def match_arrivals(sent: List[float], arrivals: List[float], group: str) -> List[float]:
+    """ Mutation-to-overlay latencies (ms) of one group at one client """
+    if group not in LATEST_WINS_GROUPS: return [(received - s) * 1000 for s, received in zip(sent, arrivals)]
+    latencies = []
+    for s in sent:
+        index = bisect.bisect_left(arrivals, s)
+        if index < len(arrivals): latencies.append((arrivals[index] - s) * 1000)
+    return latencies
+
+
+async def wait_for_delivery(clients: List[OverlayClient], sent: Dict[str, List[float]], timeout: float):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if all(delivered(c.arrivals[g], sent[g], g) for c in clients if c.in_sync for g in sent): return
+        await asyncio.sleep(0.05)
+
+
+def tick_jitter(clients: List[OverlayClient]) -> Dict[str, float]:
+    """ How far apart consecutive clock ticks arrived at the overlays, relative to the 1 s period """
+    deviations = []
+    for client in clients:
+        deviations += [abs((b - a) - 1.0) * 1000 for a, b in zip(client.ticks, client.ticks[1:])]
+    return percentiles(deviations)
+
+
+async def start_server():
+    import uvicorn
+    import main
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done(): raise RuntimeError("Server failed to start")
+        await asyncio.sleep(0.05)
+    return server, server_task, port
+
+
+def message_stats(clients: List[OverlayClient]) -> Dict[str, Any]:
+    message_bytes: Dict[str, List[int]] = {}
+    for client in clients:
+        for message_type, sizes in client.bytes_by_type.items(): message_bytes.setdefault(message_type, []).extend(sizes)
+    return {message_type: {"count": len(sizes), "bytes": sum(sizes), "meanBytes": round(sum(sizes) / len(sizes), 1)}
+            for message_type, sizes in sorted(message_bytes.items())}
+
+
+def client_stats(clients: List[OverlayClient]) -> Dict[str, Any]:
+    return {"connected": len(clients), "inSync": sum(c.in_sync for c in clients),
+            "resynced": sum(c.snapshots > 1 for c in clients), "disconnected": sum(c.closed_early for c in clients),
+            "extensions": sorted({c.extensions for c in clients})}
+
+
+def environment() -> Dict[str, Any]:
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+async def run_replay(args) -> Dict[str, Any]:
+    """ Serve a recording to the simulated overlays as fast as they take it: the same frames every run """
+    server, server_task, port = await start_server()
+    http = HttpClient("127.0.0.1", port)
+    topics = f"?topics={args.topics}" if args.topics else ""
+    clients = [OverlayClient(f"ws://127.0.0.1:{port}/ws{topics}") for _ in range(args.clients)]
+    for client in clients: await client.start()
+
+    # The replay began at start-up, before anyone watched: play it again from the top. The restart
+    # starts every client over with one snapshot, so count only what arrives from then on.
+    for client in clients: client.snapshots, client.bytes_by_type = 0, {}
+    before = process_usage()
+    started = time.perf_counter()
+    await http.request("POST", "/api/replay/restart", {"speed": args.replay_speed})
+    while not (replay := await http.request("GET", "/api/replay"))["finished"]: await asyncio.sleep(0.05)
+    # Let the last frames reach the clients
+    await asyncio.sleep(0.5)
+    wall = time.perf_counter() - started
+    after = process_usage()
+
+    for client in clients: await client.stop()
+    await http.close()
+    server.should_exit = True
+    await server_task
+
+    cpu = after["cpuSeconds"] - before["cpuSeconds"]
+    return {
+        "benchmark": "scoreboard-backend-replay",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "parameters": {"clients": args.clients, "replay": args.replay, "speed": args.replay_speed, "topics": args.topics or "all"},
+        "replay": replay,
+        "messages": message_stats(clients),
+        "clients": client_stats(clients),
+        "process": {"cpuSeconds": round(cpu, 3), "cpuPercent": round(100 * cpu / wall, 1),
+                    **({"maxRssMb": round(after["maxRssMb"], 1)} if "maxRssMb" in after else {})},
+    }
+
+
+async def run_simulation(args) -> Dict[str, Any]:
+    """ A whole match on the virtual clock: the scripted traffic once per match minute, a half-time break """
+    server, server_task, port = await start_server()
+    http = HttpClient("127.0.0.1", port)
+    driver = Driver(http)
+    await driver.setup()
+    topics = f"?topics={args.topics}" if args.topics else ""
+    clients = [OverlayClient(f"ws://127.0.0.1:{port}/ws{topics}") for _ in range(args.clients)]
+    for client in clients: await client.start()
+
+    before = process_usage()
+    started = time.perf_counter()
+    for half, period in ((1, "First Half"), (2, "Second Half")):
+        await http.request("POST", "/api/period", {"name": period})
+        await http.request("POST", "/api/timer/start")
+        for _ in range(45):
+            await http.request("POST", "/api/clock/advance", {"seconds": 60})
+            await driver.step()
+        await http.request("POST", "/api/timer/stop")
+    elapsed = time.perf_counter() - started
+    await wait_for_delivery(clients, driver.sent, timeout=10.0)
+    after = process_usage()
+
+    timer_stats = await http.request("GET", "/api/timer/stats")
+    config = await http.request("GET", "/api/config")
+    for client in clients: await client.stop()
+    await http.close()
+    server.should_exit = True
+    await server_task
+
+    cpu = after["cpuSeconds"] - before["cpuSeconds"]
+    return {
+        "benchmark": "scoreboard-backend-match-simulation",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "parameters": {"clients": args.clients, "topics": args.topics or "all"},
+        "match": {
+            "realSeconds": round(elapsed, 3),
+            "matchSeconds": timer_stats["seconds"],
+            "ticks": timer_stats["ticks"],
+            "mutations": sum(len(times) for times in driver.round_trips.values()),
+            # Every minute has LINEUP_SIZE players on the field per team
+            "timeOnFieldSeconds": {team: sum(p["timeOnField"] for p in config[team]["players"]) for team in ("teamA", "teamB")},
+            "expectedTimeOnFieldSeconds": LINEUP_SIZE * timer_stats["seconds"],
+        },
+        "overlayTimeMessages": percentiles([len(c.ticks) for c in clients]),
+        "messages": message_stats(clients),
+        "clients": client_stats(clients),
+        "process": {"cpuSeconds": round(cpu, 3), **({"maxRssMb": round(after["maxRssMb"], 1)} if "maxRssMb" in after else {})},
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    server, server_task, port = await start_server()
+    http = HttpClient("127.0.0.1", port)
+    driver = Driver(http)
+    await driver.setup()
+    topics = f"?topics={args.topics}" if args.topics else ""
+    clients = [OverlayClient(f"ws://127.0.0.1:{port}/ws{topics}") for _ in range(args.clients)]
+    for client in clients: await client.start()
+    await http.request("POST", "/api/timer/start")
+
+    before = process_usage()
+    started = time.perf_counter()
+    for _ in range(args.mutations): await driver.step()
+    elapsed = time.perf_counter() - started
+    await wait_for_delivery(clients, driver.sent, timeout=10.0)
+    # Keep the clock running long enough to measure tick jitter
+    if time.perf_counter() - started < args.min_duration:
+        await asyncio.sleep(args.min_duration - (time.perf_counter() - started))
+    wall = time.perf_counter() - started
+    after = process_usage()
+
+    timer_stats = await http.request("GET", "/api/timer/stats")
+    await http.request("POST", "/api/timer/stop")
+    for client in clients: await client.stop()
+    await http.close()
+    server.should_exit = True
+    await server_task
+
+    latencies = []
+    for client in clients:
+        if not client.in_sync: continue
+        for group, sent in driver.sent.items():
+            latencies += match_arrivals(sent, client.arrivals[group], group)
+
+    cpu = after["cpuSeconds"] - before["cpuSeconds"]
+    return {
+        "benchmark": "scoreboard-backend",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "parameters": {"clients": args.clients, "mutations": args.mutations, "topics": args.topics or "all", "minDuration": args.min_duration},
+        "mutations": {
+            "count": args.mutations,
+            "seconds": round(elapsed, 3),
+            "perSecond": round(args.mutations / elapsed, 1) if elapsed else None,
+            "roundTripMs": {kind: percentiles(values) for kind, values in driver.round_trips.items()},
+        },
+        "mutationToOverlayMs": percentiles(latencies),
+        "clock": {"server": timer_stats, "overlayTickDeviationMs": tick_jitter(clients)},
+        "messages": message_stats(clients),
+        "clients": client_stats(clients),
+        "process": {"cpuSeconds": round(cpu, 3), "cpuPercent": round(100 * cpu / wall, 1),
+                    **({"maxRssMb": round(after["maxRssMb"], 1)} if "maxRssMb" in after else {})},
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the scoreboard backend")
+    parser.add_argument("--clients", type=int, default=50, help="simulated overlay WebSocket clients")
+    parser.add_argument("--mutations", type=int, default=500, help="scripted REST mutations to send")
+    parser.add_argument("--topics", default="", help="topics the overlays subscribe to (default: all)")
+    parser.add_argument("--min-duration", type=float, default=5.0, help="keep the clock running at least this many seconds")
+    parser.add_argument("--replay", help="instead of scripted traffic, serve this recording (session directory or segment)")
+    parser.add_argument("--replay-speed", default="max", help="replay speed: a multiplier, or max (default)")
+    parser.add_argument("--simulate-match", action="store_true", help="play a whole 90-minute match on a virtual clock, as fast as possible")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    if args.simulate_match: os.environ["SCOREBOARD_CLOCK"] = "virtual"
+    if args.replay:
+        # Read when the backend is imported
+        os.environ["SCOREBOARD_REPLAY"] = os.path.abspath(args.replay)
+        os.environ["SCOREBOARD_REPLAY_SPEED"] = args.replay_speed
+        if args.replay_speed != "max": args.replay_speed = float(args.replay_speed)
+
+    # Run against a scratch copy of the data files so real match data is never touched
+    workdir = tempfile.mkdtemp(prefix="scoreboard-bench-")
+    for path in glob.glob(os.path.join(BACKEND_DIR, "*.json")): shutil.copy(path, workdir)
+    sys.path.insert(0, BACKEND_DIR)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        # The app logs to stdout; keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr): report = asyncio.run(run_replay(args) if args.replay else run_simulation(args) if args.simulate_match else run(args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from fastapi import WebSocket
+from typing import Callable, Deque, Dict, FrozenSet
+
+from metrics import CLIENT_DROPPED, CLIENT_QUEUE_DEPTH, CLIENT_SEND_SECONDS, CLIENT_SENT_BYTES
+
+logger = logging.getLogger(__name__)
+
+
+class ClientConnection:
+    """
+    One connected WebSocket client with its own writer task and bounded outbound queue.
+    Broadcasters only enqueue frames; the writer task is the only code that awaits the socket.
+    """
+    def __init__(self, websocket: WebSocket,
+                 on_evict: Callable[["ClientConnection"], None],
+                 on_recover: Callable[["ClientConnection"], None],
+                 max_queue: int = 64, stall_timeout: float = 5.0):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.stall_timeout = stall_timeout
+        self._on_evict = on_evict
+        self._on_recover = on_recover
+        self._queue: Deque[str] = deque()
+        # Latest-wins frames (e.g. clock ticks), keyed by message type
+        self._latest: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self._writer: asyncio.Task | None = None
+        # Set when a frame is dropped or superseded unsent (the client is behind), cleared by a
+        # successful send; a client behind for longer than stall_timeout is evicted
+        self._behind_since: float | None = None
+        self._needs_resync: bool = False
+        # Topics this client subscribed to; maintained by WebSocketManager
+        self.topics: FrozenSet[str] = frozenset()
+        self.closed: bool = False
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.superseded: int = 0
+
+    def start(self):
+        self._writer = asyncio.create_task(self._run())
+
+    def queue_depth(self) -> int:
+        return len(self._queue) + len(self._latest)
+
+    def is_stalled(self) -> bool:
+        return self._behind_since is not None and time.monotonic() - self._behind_since > self.stall_timeout
+
+    def enqueue(self, frame: str, latest_key: str | None = None) -> bool:
+        """ Queue a frame without blocking. Returns False when the client should be evicted. """
+        if self.closed: return False
+        if self.is_stalled(): return False
+        CLIENT_QUEUE_DEPTH.observe(len(self._queue))
+        if latest_key is not None:
+            # Re-inserted at the end: latest-wins frames go out in the order they were last updated
+            if self._latest.pop(latest_key, None) is not None:
+                self.superseded += 1
+                if self._behind_since is None: self._behind_since = time.monotonic()
+            self._latest[latest_key] = frame
+        elif len(self._queue) >= self.max_queue:
+            # Drop the frame; the client gets a full resync once it catches up
+            if self._behind_since is None: self._behind_since = time.monotonic()
+            self.dropped += 1
+            CLIENT_DROPPED.inc()
+            self._needs_resync = True
+            return True
+        else:
+            self._queue.append(frame)
+        self._wakeup.set()
+        return True
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                # Alternate between the two: a client that never drains its queue still gets clock ticks
+                latest_turn = False
+                while self._queue or self._latest:
+                    if self._latest and (latest_turn or not self._queue):
+                        frame = self._latest.pop(next(iter(self._latest)))
+                        latest_turn = False
+                    else:
+                        frame = self._queue.popleft()
+                        latest_turn = True
+                    started = time.perf_counter()
+                    await self.websocket.send_text(frame)
+                    CLIENT_SEND_SECONDS.observe(time.perf_counter() - started)
+                    CLIENT_SENT_BYTES.inc(len(frame))
+                    self.sent += 1
+                    if len(self._queue) < self.max_queue: self._behind_since = None
+                if self._needs_resync:
+                    self._needs_resync = False
+                    self._on_recover(self)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info("Client writer stopped: %s", e)
+            self._on_evict(self)
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self._queue.clear()
+        self._latest.clear()
+        if self._writer and self._writer is not asyncio.current_task(): self._writer.cancel()
+
+    def get_stats(self):
+        return {
+            "queueDepth": self.queue_depth(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "stalled": self._behind_since is not None,
+        }
@@ -0,0 +1,110 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import List, Tuple
+
+# Where match clocks get their time:
+#   real     time.monotonic() and asyncio sleeps (default)
+#   virtual  time stands still until advanced (POST /api/clock/advance, or VirtualClock.advance)
+#   <rate>   a number: real time sped up, e.g. 60 plays a minute per second
+CLOCK_SOURCE = os.environ.get("SCOREBOARD_CLOCK", "real")
+# Loop passes after waking sleepers, so they run and sleep again before time moves on.
+# A clock tick wakes the timer task, which broadcasts and sleeps again within one pass.
+SETTLE_PASSES = 4
+
+
+class ClockSource:
+    """ Time for match clocks: monotonic seconds, and sleeping until an instant on that scale """
+    name = ""
+    def now(self) -> float: raise NotImplementedError
+    async def sleep_until(self, deadline: float): raise NotImplementedError
+
+    def get_stats(self):
+        return {"source": self.name, "now": round(self.now(), 3)}
+
+
+class RealClock(ClockSource):
+    name = "real"
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def sleep_until(self, deadline: float):
+        await asyncio.sleep(max(0.0, deadline - self.now()))
+
+
+class ScaledClock(ClockSource):
+    """ Real time running `rate` times as fast, starting from the real time it was created at """
+    name = "scaled"
+
+    def __init__(self, rate: float):
+        if rate <= 0: raise ValueError("Clock rate must be positive.")
+        self.rate = rate
+        self._origin = time.monotonic()
+
+    def now(self) -> float:
+        return self._origin + (time.monotonic() - self._origin) * self.rate
+
+    async def sleep_until(self, deadline: float):
+        await asyncio.sleep(max(0.0, deadline - self.now()) / self.rate)
+
+    def get_stats(self):
+        return {**super().get_stats(), "rate": self.rate}
+
+
+class VirtualClock(ClockSource):
+    """
+    Time that only moves when advanced. Advancing wakes every sleeper whose deadline falls in
+    the interval, one at a time and in deadline order, with the clock set to that deadline; a
+    sleeper that sleeps again within the interval is woken again, so a whole match of ticks
+    runs in one advance() with the timing of a real one.
+    """
+    name = "virtual"
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def now(self) -> float:
+        return self._now
+
+    async def sleep_until(self, deadline: float):
+        if deadline <= self._now:
+            await asyncio.sleep(0)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (deadline, next(self._order), future))
+        await future
+
+    async def advance(self, seconds: float):
+        """ Move time forward by `seconds`, running everything that was due meanwhile """
+        target = self._now + max(0.0, seconds)
+        while self._sleepers and self._sleepers[0][0] <= target:
+            deadline, _, future = heapq.heappop(self._sleepers)
+            # A cancelled sleeper (the clock was stopped) has nothing to run
+            if future.done(): continue
+            self._now = max(self._now, deadline)
+            future.set_result(None)
+            await self._settle()
+        self._now = target
+        await self._settle()
+
+    async def _settle(self):
+        for _ in range(SETTLE_PASSES): await asyncio.sleep(0)
+
+    def get_stats(self):
+        return {**super().get_stats(), "sleepers": sum(not future.done() for _, _, future in self._sleepers)}
+
+
+def make_clock_source(setting: str) -> ClockSource:
+    """ "real", "virtual" or a speed-up rate ("60") -> the clock source """
+    if setting == "real": return RealClock()
+    if setting == "virtual": return VirtualClock()
+    try: return ScaledClock(float(setting))
+    except ValueError: raise ValueError(f"SCOREBOARD_CLOCK must be real, virtual or a rate, not {setting!r}") from None
+
+
+clock_source = make_clock_source(CLOCK_SOURCE)
@@ -0,0 +1,170 @@
+from pydantic import BaseModel, ValidationError
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from data_manager import (
+    TeamInfoUpdate, CustomizationUpdate, SetScoreUpdate, StyleUpdate, AddPlayerUpdate,
+    ClearPlayersUpdate, DeletePlayerUpdate, AddGoalUpdate, AddCardUpdate, ToggleOnFieldUpdate, EditPlayerUpdate,
+    ResetStatsUpdate, ReplacePlayerUpdate, MatchInfoUpdate, LayoutUpdate, StylePreviewUpdate, PeriodUpdate, BatchUpdate, BatchError
+)
+from matches import Match
+from loop_watchdog import operation
+from recorder import traffic_recorder
+
+# Mutations shared by the REST endpoints and the WebSocket command channel.
+# Each handler applies the change to one match, broadcasts it and returns the REST response body.
+
+class SetTimeUpdate(BaseModel): seconds: int
+class SetExtraTimeUpdate(BaseModel): minutes: int
+class SetFutsalClockUpdate(BaseModel): is_on: bool
+
+class VarUpdate(BaseModel):
+    isVisible: Optional[bool] = None
+    scenario: Optional[str] = None
+    message: Optional[str] = None
+    decision: Optional[str] = None
+
+class SetPlayersListVisibility(BaseModel):
+    visibleA: bool
+    visibleB: bool
+
+# command name -> (payload model or None, handler)
+COMMANDS: Dict[str, Tuple[type[BaseModel] | None, Callable[..., Awaitable[Any]]]] = {}
+
+def command(name: str, model: type[BaseModel] | None = None):
+    def decorator(handler):
+        COMMANDS[name] = (model, handler)
+        return handler
+    return decorator
+
+# --- Timer Control ---
+@command("timer_start")
+async def timer_start(match: Match): match.websocket_manager.start(); return {"message": "Timer started"}
+
+@command("timer_stop")
+async def timer_stop(match: Match): match.websocket_manager.stop(); return {"message": "Timer stopped"}
+
+@command("timer_set", SetTimeUpdate)
+async def timer_set(match: Match, update: SetTimeUpdate): match.websocket_manager.set_time(update.seconds); return {"message": f"Timer set to {update.seconds} seconds"}
+
+@command("extra_time_set", SetExtraTimeUpdate)
+async def extra_time_set(match: Match, update: SetExtraTimeUpdate): match.websocket_manager.set_extra_time(update.minutes); return {"message": f"Extra time set to {update.minutes} minutes"}
+
+@command("extra_time_toggle")
+async def extra_time_toggle(match: Match): return await match.websocket_manager.toggle_extra_time_visibility()
+
+@command("futsal_toggle", SetFutsalClockUpdate)
+async def futsal_toggle(match: Match, update: SetFutsalClockUpdate): match.websocket_manager.set_futsal_clock(update.is_on); return {"message": f"Futsal clock set to {update.is_on}"}
+
+@command("period_set", PeriodUpdate)
+async def period_set(match: Match, update: PeriodUpdate): config = await match.data_manager.set_current_period(update.name); await match.websocket_manager.broadcast_config(config); return {"message": f"Period set to {update.name}"}
+
+# --- Team & Player Data ---
+@command("score_set", SetScoreUpdate)
+async def score_set(match: Match, update: SetScoreUpdate): config = await match.data_manager.set_score(update); await match.websocket_manager.broadcast_config(config, urgent=True); return config
+
+@command("team_info", TeamInfoUpdate)
+async def team_info(match: Match, update: TeamInfoUpdate): config = await match.data_manager.update_team_info(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("customization", CustomizationUpdate)
+async def customization(match: Match, update: CustomizationUpdate): config = await match.data_manager.update_colors(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_add", AddPlayerUpdate)
+async def player_add(match: Match, update: AddPlayerUpdate): config = await match.data_manager.add_player(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_replace", ReplacePlayerUpdate)
+async def player_replace(match: Match, update: ReplacePlayerUpdate): config = await match.data_manager.replace_player(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_clear", ClearPlayersUpdate)
+async def player_clear(match: Match, update: ClearPlayersUpdate): config = await match.data_manager.clear_player_list(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_delete", DeletePlayerUpdate)
+async def player_delete(match: Match, update: DeletePlayerUpdate): config = await match.data_manager.delete_player(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_goal", AddGoalUpdate)
+async def player_goal(match: Match, update: AddGoalUpdate): config = await match.data_manager.add_goal(update); await match.websocket_manager.broadcast_config(config, urgent=True); return config
+
+@command("player_card", AddCardUpdate)
+async def player_card(match: Match, update: AddCardUpdate): config = await match.data_manager.add_card(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_togglefield", ToggleOnFieldUpdate)
+async def player_togglefield(match: Match, update: ToggleOnFieldUpdate): config = await match.data_manager.toggle_on_field(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_edit", EditPlayerUpdate)
+async def player_edit(match: Match, update: EditPlayerUpdate): config = await match.data_manager.edit_player(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("player_resetstats", ResetStatsUpdate)
+async def player_resetstats(match: Match, update: ResetStatsUpdate): config = await match.data_manager.reset_team_stats(update); await match.websocket_manager.broadcast_config(config); return config
+
+@command("batch", BatchUpdate)
+async def batch(match: Match, update: BatchUpdate):
+    # All operations are applied atomically, saved once and broadcast as a single update
+    results = await match.data_manager.apply_batch(update.operations)
+    config = match.data_manager.get_config()
+    await match.websocket_manager.broadcast_config(config)
+    return {"results": results, "config": config}
+
+# --- Scoreboard & Overlays ---
+@command("var_update", VarUpdate)
+async def var_update(match: Match, update: VarUpdate):
+    await match.websocket_manager.broadcast_var_update(update.model_dump(exclude_none=True))
+    return {"message": "VAR updated"}
+
+@command("match_info", MatchInfoUpdate)
+async def match_info(match: Match, update: MatchInfoUpdate): new_style = await match.data_manager.update_match_info(update.info); await match.websocket_manager.broadcast_scoreboard_style(new_style); return new_style
+
+@command("match_info_toggle")
+async def match_info_toggle(match: Match): return await match.websocket_manager.toggle_match_info_visibility()
+
+@command("layout", LayoutUpdate)
+async def layout(match: Match, update: LayoutUpdate): new_style = await match.data_manager.update_layout(update); await match.websocket_manager.broadcast_scoreboard_style(new_style); return new_style
+
+@command("scoreboard_style", StyleUpdate)
+async def scoreboard_style(match: Match, update: StyleUpdate): new_style = await match.data_manager.update_scoreboard_style(update); await match.websocket_manager.broadcast_scoreboard_style(new_style); return new_style
+
+@command("scoreboard_style_preview", StylePreviewUpdate)
+async def scoreboard_style_preview(match: Match, update: StylePreviewUpdate):
+    # Not saved or broadcast here: the preview throttles both
+    match.data_manager.preview_scoreboard_style(update); match.websocket_manager.style_preview.changed(); return {"message": "Preview updated"}
+
+@command("scoreboard_style_commit")
+async def scoreboard_style_commit(match: Match): await match.websocket_manager.style_preview.commit(); return {"message": "Style saved"}
+
+@command("game_report_toggle")
+async def game_report_toggle(match: Match): return await match.websocket_manager.toggle_game_report()
+
+@command("scoreboard_toggle")
+async def scoreboard_toggle(match: Match): return await match.websocket_manager.toggle_scoreboard()
+
+@command("players_list_toggle_a")
+async def players_list_toggle_a(match: Match): return await match.websocket_manager.toggle_players_list_a()
+
+@command("players_list_toggle_b")
+async def players_list_toggle_b(match: Match): return await match.websocket_manager.toggle_players_list_b()
+
+@command("players_list_set", SetPlayersListVisibility)
+async def players_list_set(match: Match, update: SetPlayersListVisibility): return await match.websocket_manager.set_players_list_visibility(update.visibleA, update.visibleB)
+
+
+def _ack_result(result: Any) -> Any:
+    # Config and style changes reach the client through the broadcast; don't echo them in the ack
+    if isinstance(result, BaseModel): return None
+    if isinstance(result, dict): return {k: v for k, v in result.items() if not isinstance(v, BaseModel)}
+    return result
+
+async def dispatch(match: Match, message: Dict[str, Any]) -> Dict[str, Any]:
+    """ Run a {"type": "command", "id", "command", "data"} message against a match and build its ack or error reply """
+    request_id = message.get("id")
+    name = message.get("command")
+    if name not in COMMANDS: return {"type": "error", "id": request_id, "error": f"Unknown command: {name}"}
+    model, handler = COMMANDS[name]
+    traffic_recorder.record_command(match.match_id, message)
+    try:
+        with operation(f"command {name}"):
+            result = await handler(match, model.model_validate(message.get("data") or {})) if model else await handler(match)
+        return {"type": "ack", "id": request_id, "result": _ack_result(result)}
+    except ValidationError as e:
+        return {"type": "error", "id": request_id, "error": f"Invalid data: {e}"}
+    except BatchError as e:
+        return {"type": "error", "id": request_id, "error": str(e), "results": e.results}
+    except Exception as e:
+        return {"type": "error", "id": request_id, "error": str(e)}
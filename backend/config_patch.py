@@ -0,0 +1,41 @@
+from typing import Any, Dict, List
+
+# Patch operations are JSON-Patch style, with one difference: inside a team's
+# "players" list, the path segment is the shirt number instead of a list index,
+# e.g. "/teamA/players/10/onField". All operations carry absolute values, so
+# applying the same patch twice (or to a newer snapshot) is harmless.
+
+PatchOp = Dict[str, Any]
+
+
+def _diff_players(team_key: str, old: List[dict], new: List[dict]) -> List[PatchOp]:
+    ops: List[PatchOp] = []
+    old_by_number = {p["number"]: p for p in old}
+    new_by_number = {p["number"]: p for p in new}
+    for number in old_by_number.keys() - new_by_number.keys():
+        ops.append({"op": "remove", "path": f"/{team_key}/players/{number}"})
+    for number, player in new_by_number.items():
+        previous = old_by_number.get(number)
+        if previous is None:
+            ops.append({"op": "add", "path": f"/{team_key}/players/{number}", "value": player})
+            continue
+        for field, value in player.items():
+            if previous.get(field) != value:
+                ops.append({"op": "replace", "path": f"/{team_key}/players/{number}/{field}", "value": value})
+    return ops
+
+
+def diff_config(old: dict, new: dict) -> List[PatchOp]:
+    """ Compute the patch that turns the `old` config dump into `new` """
+    ops: List[PatchOp] = []
+    for key, value in new.items():
+        previous = old.get(key)
+        if key in ("teamA", "teamB") and isinstance(previous, dict):
+            for field, team_value in value.items():
+                if field == "players":
+                    ops.extend(_diff_players(key, previous.get("players", []), team_value))
+                elif previous.get(field) != team_value:
+                    ops.append({"op": "replace", "path": f"/{key}/{field}", "value": team_value})
+        elif previous != value:
+            ops.append({"op": "replace", "path": f"/{key}", "value": value})
+    return ops
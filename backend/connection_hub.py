@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import os
+from fastapi import WebSocket
+from client_connection import ClientConnection
+from metrics import ACTIVE_CONNECTIONS, CLIENT_EVICTIONS, FRAME_MESSAGES, FRAME_SUPERSEDED
+from typing import Dict, Any, FrozenSet, Iterable, List, Set, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """ Encode an outbound message once, using orjson when it is installed """
+    if orjson is not None: return orjson.dumps(message).decode()
+    return json.dumps(message, separators=(",", ":"))
+
+# Per-client outbound queue bound, and how long a client may stay full before eviction
+CLIENT_QUEUE_SIZE = 64
+CLIENT_STALL_TIMEOUT = 5.0
+# Outbound frames per second per client: broadcasts within one frame interval go out together.
+# 0 sends every broadcast as its own frame, immediately.
+FRAME_RATE = float(os.environ.get("SCOREBOARD_FRAME_RATE", "25"))
+
+# Subscription topics; each is also the key of its section in the connect snapshot
+TOPICS: FrozenSet[str] = frozenset({
+    "clock", "config", "style", "gameReport", "scoreboard", "playersList",
+    "extraTime", "matchInfo", "futsalClock", "var", "report",
+})
+MESSAGE_TOPICS: Dict[str, str] = {
+    "time": "clock", "status": "clock",
+    "config": "config", "config_patch": "config",
+    "scoreboard_style": "style",
+    "game_report_visibility": "gameReport",
+    "scoreboard_visibility": "scoreboard",
+    "players_list_visibility": "playersList",
+    "extra_time_status": "extraTime",
+    "match_info_visibility": "matchInfo",
+    "futsal_clock_status": "futsalClock",
+    "var_update": "var",
+    "report": "report",
+}
+# Messages that carry their topic's whole state: a newer one replaces an unsent older one.
+# Incremental messages (config_patch) and those ordered against them (config, status) are all sent.
+LATEST_WINS_TYPES: FrozenSet[str] = frozenset({
+    "time", "scoreboard_style", "game_report_visibility", "scoreboard_visibility", "players_list_visibility",
+    "extra_time_status", "match_info_visibility", "futsal_clock_status", "var_update", "report",
+})
+
+def parse_topics(topics: str | Iterable[str] | None) -> FrozenSet[str]:
+    """ "config,var" or ["config", "var"] -> known topics; nothing (or "all") subscribes to everything """
+    if isinstance(topics, str): topics = topics.split(",")
+    names = {str(topic).strip() for topic in topics or ()} - {""}
+    if not names or "all" in names: return TOPICS
+    return frozenset(names & TOPICS)
+
+def combine_frames(entries: List[Tuple[str, str | None]]) -> Tuple[str, str | None] | None:
+    """ One frame from several encoded (frame, latest_key) messages, without re-encoding them """
+    if not entries: return None
+    if len(entries) == 1: return entries[0]
+    keys = [key for _, key in entries]
+    # A frame made only of latest-wins messages can itself be superseded in a slow client's queue
+    latest_key = "+".join(keys) if all(keys) else None
+    return '{"type":"frame","messages":[' + ",".join(frame for frame, _ in entries) + "]}", latest_key
+
+
+class ConnectionHub:
+    """
+    The WebSocket clients of one match: their queues, topic subscriptions and connect snapshots.
+    Subclasses say where snapshots come from (live state, or the owner process in worker mode).
+    """
+    def __init__(self):
+        self._active_connections: Dict[WebSocket, ClientConnection] = {}
+        self._topic_connections: Dict[str, Set[ClientConnection]] = {topic: set() for topic in TOPICS}
+        # Connect snapshots, cached per subscribed topic set
+        self._snapshot_frames: Dict[FrozenSet[str], str] = {}
+        self._snapshot_generation: int = 0
+        # Frame scheduler: broadcasts wait here, (topic, frame, latest_key) in order, and are sent
+        # together at most once per interval; replies to single clients wait with them
+        self.frame_interval: float = 1.0 / FRAME_RATE if FRAME_RATE > 0 else 0.0
+        self._pending: List[Tuple[str, str, str | None]] = []
+        self._pending_latest: Dict[str, int] = {}
+        self._held_replies: Dict[ClientConnection, List[str]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._last_flush: float = 0.0
+
+    async def _load_snapshot_frame(self, topics: FrozenSet[str]) -> str:
+        raise NotImplementedError
+
+    async def get_snapshot_frame(self, topics: FrozenSet[str] = TOPICS) -> str:
+        # Rebuilt lazily after a state change, then shared by every joining client with the same topics
+        frame = self._snapshot_frames.get(topics)
+        if frame is None:
+            generation = self._snapshot_generation
+            frame = await self._load_snapshot_frame(topics)
+            if generation == self._snapshot_generation: self._snapshot_frames[topics] = frame
+        return frame
+
+    def _invalidate_snapshot(self):
+        self._snapshot_generation += 1
+        self._snapshot_frames.clear()
+
+    async def connect(self, websocket: WebSocket, topics: FrozenSet[str] = TOPICS):
+        await websocket.accept()
+        connection = ClientConnection(websocket, self._evict, self._resync,
+                                      max_queue=CLIENT_QUEUE_SIZE, stall_timeout=CLIENT_STALL_TIMEOUT)
+        self._active_connections[websocket] = connection
+        ACTIVE_CONNECTIONS.inc()
+        self._set_topics(connection, topics)
+        connection.start()
+        # One cached message with the subscribed live state; other clients are not notified
+        await self._send_snapshot(connection)
+
+    async def subscribe(self, websocket: WebSocket, topics: FrozenSet[str]):
+        """ Replace a client's subscriptions and send it a snapshot of the new topic set """
+        connection = self._active_connections.get(websocket)
+        if not connection: return
+        self._set_topics(connection, topics)
+        await self._send_snapshot(connection)
+
+    def _set_topics(self, connection: ClientConnection, topics: FrozenSet[str]):
+        for topic in connection.topics - topics: self._topic_connections[topic].discard(connection)
+        for topic in topics: self._topic_connections[topic].add(connection)
+        connection.topics = topics
+
+    def disconnect(self, websocket: WebSocket):
+        connection = self._active_connections.pop(websocket, None)
+        if connection:
+            ACTIVE_CONNECTIONS.dec()
+            for topic in connection.topics: self._topic_connections[topic].discard(connection)
+            connection.close()
+
+    def _evict(self, connection: ClientConnection):
+        if self._active_connections.get(connection.websocket) is not connection: return
+        CLIENT_EVICTIONS.inc()
+        logger.warning("Evicting slow WebSocket client (%d queued, %d dropped)", connection.queue_depth(), connection.dropped)
+        self.disconnect(connection.websocket)
+        asyncio.create_task(self._close_quietly(connection.websocket))
+
+    async def _close_quietly(self, websocket: WebSocket, code: int = 1013):
+        try: await websocket.close(code=code)
+        except Exception: pass
+
+    async def close_connections(self):
+        """ Disconnect every client ("going away"), e.g. when the match is unloaded """
+        for websocket in list(self._active_connections):
+            self.disconnect(websocket)
+            await self._close_quietly(websocket, code=1001)
+
+    async def _send_snapshot(self, connection: ClientConnection):
+        frame = await self.get_snapshot_frame(connection.topics)
+        if not connection.closed: self._enqueue(connection, frame)
+
+    def _resync(self, connection: ClientConnection):
+        # The client dropped frames while it was behind: send its full live state
+        asyncio.create_task(self._send_snapshot(connection))
+
+    def _enqueue(self, connection: ClientConnection, frame: str, latest_key: str | None = None):
+        if not connection.enqueue(frame, latest_key): self._evict(connection)
+
+    async def _send(self, websocket: WebSocket, message: Dict[str, Any]):
+        connection = self._active_connections.get(websocket)
+        if not connection: return
+        # Held until the pending broadcasts go out, so an ack never overtakes the update it caused
+        if self._pending: self._held_replies.setdefault(connection, []).append(encode_message(message))
+        else: self._enqueue(connection, encode_message(message))
+
+    async def send(self, websocket: WebSocket, message: Dict[str, Any]):
+        # Replies to one client (command acks) go through its queue, so they arrive after pending broadcasts
+        await self._send(websocket, message)
+
+    def _fan_out(self, topic: str, frame: str, latest_key: str | None = None):
+        # Hand the same encoded frame to each subscribed client queue; never awaits a socket
+        if not self.frame_interval:
+            for connection in list(self._topic_connections[topic]):
+                self._enqueue(connection, frame, latest_key)
+            return
+        if not self._topic_connections[topic]: return
+        index = self._pending_latest.get(latest_key) if latest_key else None
+        if index is not None:
+            FRAME_SUPERSEDED.inc()
+            self._pending[index] = (topic, frame, latest_key)
+        else:
+            if latest_key: self._pending_latest[latest_key] = len(self._pending)
+            self._pending.append((topic, frame, latest_key))
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            delay = self._last_flush + self.frame_interval - loop.time()
+            self._flush_handle = loop.call_later(max(0.0, delay), self.flush_frames)
+
+    def flush_frames(self):
+        """ Send what is pending now, one frame per client; latency-critical updates call this directly """
+        if self._flush_handle: self._flush_handle.cancel()
+        self._flush_handle = None
+        self._last_flush = asyncio.get_running_loop().time()
+        pending, held = self._pending, self._held_replies
+        self._pending, self._pending_latest, self._held_replies = [], {}, {}
+        # Clients with the same subscriptions share one encoded frame
+        frames: Dict[FrozenSet[str], Tuple[List[Tuple[str, str | None]], Tuple[str, str | None] | None]] = {}
+        for connection in list(self._active_connections.values()):
+            if connection.topics not in frames:
+                entries = [(frame, latest_key) for topic, frame, latest_key in pending if topic in connection.topics]
+                if entries: FRAME_MESSAGES.observe(len(entries))
+                frames[connection.topics] = entries, combine_frames(entries)
+            entries, combined = frames[connection.topics]
+            replies = held.get(connection)
+            # Replies ride in the same frame, after the updates they caused
+            if replies: combined = combine_frames(entries + [(reply, None) for reply in replies])
+            if combined: self._enqueue(connection, *combined)
+
+    def connection_count(self) -> int:
+        return len(self._active_connections)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._topic_connections[topic])
+
+    def get_connection_stats(self):
+        return [{**connection.get_stats(), "topics": sorted(connection.topics)} for connection in self._active_connections.values()]
@@ -1,10 +1,22 @@
 import asyncio
 import aiofiles
+import bisect
+import functools
 import json
+import logging
 import sys
 import os
-from pydantic import BaseModel, Field, ValidationError
-from typing import Literal, List, Optional
+import time
+from pydantic import BaseModel, Field, PrivateAttr, ValidationError
+from typing import Callable, Dict, Literal, List, Optional, Tuple
+from persistence import WriteBehindWriter, atomic_write
+from journal import MatchJournal
+from match_report import MatchReport
+from http_cache import make_etag, new_etag_prefix
+from metrics import CONFIG_SAVE_SECONDS, STYLE_SAVE_SECONDS, TimedLock
+from offload import offload
+
+logger = logging.getLogger(__name__)
 
 # --- Helper Function ---
 def resource_path(relative_path):
@@ -24,12 +36,21 @@ WRITABLE_CONFIG_FILE = os.path.join(WRITABLE_DIR, "team-info-config.json")
 WRITABLE_STYLE_FILE = os.path.join(WRITABLE_DIR, "scoreboard-customization.json")
 WRITABLE_PERIOD_FILE = os.path.join(WRITABLE_DIR, "time-period-setting.json")
 WRITABLE_SHORTCUT_FILE = os.path.join(WRITABLE_DIR, "shortcuts.json")
+WRITABLE_JOURNAL_FILE = os.path.join(WRITABLE_DIR, "match-journal.jsonl")
+WRITABLE_SNAPSHOT_FILE = os.path.join(WRITABLE_DIR, "match-snapshot.json")
 
 BUNDLED_CONFIG_FILE = resource_path("team-info-config.json")
 BUNDLED_STYLE_FILE = resource_path("scoreboard-customization.json")
 BUNDLED_PERIOD_FILE = resource_path("time-period-setting.json")
 BUNDLED_SHORTCUT_FILE = resource_path("shortcuts.json")
 
+# Minimum seconds between two writes of team-info-config.json
+CONFIG_SAVE_INTERVAL = float(os.environ.get("SCOREBOARD_SAVE_INTERVAL", "1.0"))
+
+# Saved files carry the schema version they were written in; current files load without migration
+CONFIG_SCHEMA_VERSION = 1
+STYLE_SCHEMA_VERSION = 1
+
 
 class ScoreboardStyleConfig(BaseModel):
     boxMainColor: str = "#000000"
@@ -64,6 +85,11 @@ class PlayerConfig(BaseModel):
     yellowCards: List[Card] = []
     redCards: List[Card] = []
     goals: List[Goal] = []
+    # Match-clock playing time at which the current on-field stint was last settled
+    _stint_start: Optional[float] = PrivateAttr(default=None)
+
+def _player_number(player: PlayerConfig) -> int:
+    return player.number
 
 class TeamConfig(BaseModel):
     name: str = "TEAM"
@@ -171,34 +197,329 @@ class StyleUpdate(BaseModel):
     opacity: int
     scale: int
     
+class StylePreviewUpdate(BaseModel):
+    # Any subset of the style and layout fields; applied live, saved later
+    boxMainColor: Optional[str] = None
+    textMainColor: Optional[str] = None
+    textAltColor: Optional[str] = None
+    boxAltColor: Optional[str] = None
+    opacity: Optional[int] = Field(default=None, ge=50, le=100)
+    scale: Optional[int] = Field(default=None, ge=50, le=150)
+    timerPosition: Optional[Literal["Under", "Right"]] = None
+    showRedCardIndicators: Optional[bool] = None
+
 class PeriodUpdate(BaseModel):
     name: str
 
 
+# --- Stored Files ---
+class StoredScoreboardConfig(ScoreboardConfig):
+    schemaVersion: int = 0
+
+class StoredScoreboardStyle(ScoreboardStyleConfig):
+    schemaVersion: int = 0
+
+def dump_stored(model: BaseModel, stored_type: type[BaseModel], version: int, **kwargs) -> str:
+    """ Serialize a model as its on-disk type, stamped with the current schema version """
+    return stored_type.model_construct(**model.__dict__, schemaVersion=version).model_dump_json(indent=2, **kwargs)
+
+def load_stored(content: str, stored_type: type[BaseModel], model_type: type[BaseModel], version: int) -> BaseModel | None:
+    """ Validate a file written in the current schema straight from JSON; None if it needs migrating """
+    try: stored = stored_type.model_validate_json(content)
+    except ValidationError: return None
+    if stored.schemaVersion != version: return None
+    return model_type.model_construct(**{name: getattr(stored, name) for name in model_type.model_fields})
+
+def migrate_config(data: dict) -> dict:
+    """ Bring a team config from any earlier file format to the current one """
+    for team_key in ['teamA', 'teamB']:
+        if team_key in data and 'players' in data[team_key]:
+            for player in data[team_key]['players']:
+                if 'timeOnField' not in player: player['timeOnField'] = 0
+                if isinstance(player.get('yellowCards'), int): player['yellowCards'] = []
+                if isinstance(player.get('redCards'), int): player['redCards'] = []
+                if 'goals' in player:
+                    new_goals = []
+                    for g in player['goals']:
+                        if isinstance(g, int):
+                            is_og = g < 0
+                            minute = abs(g)
+                            new_goals.append({"regMinute": minute, "addMinute": 0, "isOwnGoal": is_og, "isPenalty": False})
+                        else: 
+                            if 'isPenalty' not in g: g['isPenalty'] = False
+                            new_goals.append(g)
+                    player['goals'] = new_goals
+                if 'yellowCards' in player:
+                    player['yellowCards'] = [{"regMinute": y, "addMinute": 0} if isinstance(y, int) else y for y in player['yellowCards']]
+                if 'redCards' in player:
+                    player['redCards'] = [{"regMinute": r, "addMinute": 0} if isinstance(r, int) else r for r in player['redCards']]
+    if 'currentPeriod' not in data: data['currentPeriod'] = "First Half"
+    return data
+
+def migrate_style(data: dict) -> dict:
+    """ Rename the color keys of earlier style files and fill in settings added since """
+    if 'primary' in data: data['boxMainColor'] = data.pop('primary')
+    if 'secondary' in data: data['textMainColor'] = data.pop('secondary')
+    if 'tertiary' in data: data['textAltColor'] = data.pop('tertiary')
+    if 'boxBackgroundAlt' in data: data['boxAltColor'] = data.pop('boxBackgroundAlt')
+    if 'textColorPrimary' in data: data['textMainColor'] = data.pop('textColorPrimary')
+    if 'textColorTertiary' in data: data['textAltColor'] = data.pop('textColorTertiary')
+    if 'textColorSecondary' in data: data['textAltColor'] = data.pop('textColorSecondary')
+    if 'showRedCardBoxes' in data: data['showRedCardIndicators'] = data.pop('showRedCardBoxes')
+    if 'timerPosition' not in data: data['timerPosition'] = 'Under'
+    if 'matchInfo' not in data: data['matchInfo'] = ''
+    if 'showRedCardIndicators' not in data: data['showRedCardIndicators'] = False
+    if 'textMainColor' not in data: data['textMainColor'] = '#FFFFFF'
+    if 'textAltColor' not in data: data['textAltColor'] = '#ffd700'
+    return data
+
+# Parsing whole files is CPU-heavy for big rosters; both run on the offload threads
+def parse_config_file(content: str) -> Tuple[ScoreboardConfig, bool]:
+    """ (config, migrated) from a team config file in any format """
+    config = load_stored(content, StoredScoreboardConfig, ScoreboardConfig, CONFIG_SCHEMA_VERSION)
+    if config is not None: return config, False
+    return ScoreboardConfig.model_validate(migrate_config(json.loads(content))), True
+
+def parse_style_file(content: str) -> Tuple[ScoreboardStyleConfig, bool]:
+    """ (style, migrated) from a scoreboard style file in any format """
+    style = load_stored(content, StoredScoreboardStyle, ScoreboardStyleConfig, STYLE_SCHEMA_VERSION)
+    if style is not None: return style, False
+    return ScoreboardStyleConfig.model_validate(migrate_style(json.loads(content))), True
+
+
+class BatchOperation(BaseModel):
+    op: str
+    data: dict = {}
+
+class BatchUpdate(BaseModel):
+    operations: List[BatchOperation]
+
+class BatchError(Exception):
+    def __init__(self, message: str, results: List[dict]):
+        super().__init__(message)
+        self.results = results
+
+
+# Config mutations that can be journaled, replayed and batched:
+# op name -> (update model, DataManager method name, field passed instead of the model, if any)
+JOURNALED_OPERATIONS: Dict[str, Tuple[type[BaseModel], str, Optional[str]]] = {}
+
+def journaled(op: str, model: type[BaseModel], field: Optional[str] = None):
+    """ Record a config mutation in the match journal after it has been applied """
+    def decorator(method):
+        JOURNALED_OPERATIONS[op] = (model, method.__name__, field)
+        @functools.wraps(method)
+        async def wrapper(self, update):
+            result = await method(self, update)
+            self._record(op, operation_data(op, update))
+            return result
+        return wrapper
+    return decorator
+
+def parse_operation(op: str, data: dict):
+    """ Validate a journaled/batched operation payload into the argument its method expects """
+    if op not in JOURNALED_OPERATIONS: raise ValueError(f"Unknown operation: {op}")
+    model, _, field = JOURNALED_OPERATIONS[op]
+    update = model.model_validate(data)
+    return getattr(update, field) if field else update
+
+def operation_data(op: str, argument) -> dict:
+    """ The journaled payload for a validated argument; the inverse of parse_operation """
+    field = JOURNALED_OPERATIONS[op][2]
+    return {field: argument} if field else argument.model_dump()
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    """ (mtime_ns, size): changes whenever the file is rewritten """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
 class DataManager:
-    def __init__(self, file_path: str, scoreboard_style_path: str):
+    def __init__(self, file_path: str, scoreboard_style_path: str, save_interval: float = CONFIG_SAVE_INTERVAL):
         self.file_path = file_path
         self.scoreboard_style_path = scoreboard_style_path
         self.config: ScoreboardConfig | None = None
         self.scoreboard_style: ScoreboardStyleConfig | None = None
         self.period_settings: List[PeriodSetting] = []
         self.shortcuts: List[Shortcut] = [] 
-        self._config_lock = asyncio.Lock()
-        self._style_lock = asyncio.Lock()
+        self._config_lock = TimedLock("config")
+        self._style_lock = TimedLock("style")
+        # Set by style previews, cleared by any save of the style
+        self._style_unsaved: bool = False
+        self._config_writer = WriteBehindWriter(self._write_config, save_interval)
+        self._play_clock: Callable[[], float] = lambda: 0.0
+        # Shirt number -> player, per team; kept in sync with the (sorted) rosters
+        self._player_index: Dict[str, Dict[int, PlayerConfig]] = {"teamA": {}, "teamB": {}}
+        self.report = MatchReport()
+        # HTTP validators: the revision counts every change to the served config (settled playing
+        # time included); raw files are cached as last read or written,
+        # path -> (revision, (mtime_ns, size), content or None until first read)
+        self.etag_prefix = new_etag_prefix()
+        self.config_revision: int = 0
+        self._config_json: Tuple[int, bytes] | None = None
+        # The revision the config file holds, once it has been read or written
+        self._saved_revision: int | None = None
+        self._file_revision: int = 0
+        self._raw_files: Dict[str, Tuple[int, Tuple[int, int], str | None]] = {}
+        self.journal: MatchJournal | None = None
+        self._journal_paused: bool = False
+
+    # --- Match Journal ---
+    def _record(self, op: str, data: dict):
+        if self.journal and not self._journal_paused: self.journal.record("config", op, data, played=self._play_clock())
+
+    async def replay_operation(self, op: str, data: dict, played: float):
+        """ Re-apply a journaled mutation as it happened, at its recorded playing time """
+        argument = parse_operation(op, data)
+        play_clock = self._play_clock
+        self._play_clock = lambda: played
+        try: await getattr(self, JOURNALED_OPERATIONS[op][1])(argument)
+        finally: self._play_clock = play_clock
+
+    async def apply_batch(self, operations: List[BatchOperation]) -> List[dict]:
+        """
+        Apply operations in order under the config lock, all or nothing.
+        The write-behind writer waits on the lock, so the batch is persisted once.
+        """
+        arguments = []
+        for i, operation in enumerate(operations):
+            try: arguments.append(parse_operation(operation.op, operation.data))
+            except (ValueError, ValidationError) as e:
+                raise BatchError(f"Invalid operation #{i} ({operation.op}): {e}", [])
+        results = []
+        async with self._config_lock:
+            config = self.get_config()
+            backup = config.model_copy(deep=True)
+            self._journal_paused = True
+            try:
+                for operation, argument in zip(operations, arguments):
+                    await getattr(self, JOURNALED_OPERATIONS[operation.op][1])(argument)
+                    results.append({"op": operation.op, "ok": True})
+            except Exception as e:
+                # Roll back everything applied so far
+                self.config = backup
+                self._rebuild_player_index()
+                failed = len(results)
+                results = [{"op": o.op, "ok": False, "error": "rolled back"} for o in operations[:failed]]
+                results.append({"op": operations[failed].op, "ok": False, "error": str(e)})
+                results.extend({"op": o.op, "ok": False, "error": "skipped"} for o in operations[failed + 1:])
+                raise BatchError(f"Batch rolled back: {e}", results)
+            finally:
+                self._journal_paused = False
+            # The validated arguments, as the individual operations would have journaled them
+            for operation, argument in zip(operations, arguments): self._record(operation.op, operation_data(operation.op, argument))
+        return results
+
+    def restore_config(self, data: dict, played: float):
+        """ Replace the live config with a snapshot whose timeOnField was settled at `played` """
+        self.config = ScoreboardConfig.model_validate(data)
+        self._rebuild_player_index()
+        for team in (self.config.teamA, self.config.teamB):
+            for player in team.players:
+                player._stint_start = played if player.onField else None
+        self.mark_config_dirty()
+
+    # --- Player Index ---
+    def _rebuild_player_index(self):
+        if self.config is None: return
+        for team_key in ("teamA", "teamB"):
+            team = getattr(self.config, team_key)
+            team.players.sort(key=_player_number)
+            self._player_index[team_key] = {p.number: p for p in team.players}
+        # Called whenever the whole config is replaced
+        self.config_revision += 1
+        self.report.rebuild(self.config)
+
+    def _find_player(self, team_key: str, number: int) -> PlayerConfig | None:
+        return self._player_index[team_key].get(number)
+
+    def _roster_position(self, team: TeamConfig, number: int) -> int:
+        return bisect.bisect_left(team.players, number, key=_player_number)
+
+    # --- Playing Time (stints) ---
+    def set_play_clock(self, play_clock: Callable[[], float]):
+        """ Source of the match clock's total running time, used for timeOnField stints """
+        self._play_clock = play_clock
+
+    def _settle_player(self, player: PlayerConfig, now: float) -> bool:
+        """ Returns whether timeOnField changed """
+        if not player.onField:
+            player._stint_start = None
+            return False
+        if player._stint_start is None:
+            player._stint_start = now
+            return False
+        whole_seconds = int(now - player._stint_start)
+        if whole_seconds > 0:
+            player.timeOnField += whole_seconds
+            player._stint_start += whole_seconds
+            return True
+        return False
+
+    def settle_time_on_field(self):
+        """ Fold the running stint of every on-field player into timeOnField """
+        if self.config is None: return
+        now = self._play_clock()
+        settled = False
+        for team in (self.config.teamA, self.config.teamB):
+            for player in team.players:
+                if player.onField: settled = self._settle_player(player, now) or settled
+        if settled:
+            self.config_revision += 1
+            # The report's per-player minutes come from timeOnField
+            self.report.players_changed()
+
+    def has_open_stints(self) -> bool:
+        if self.config is None: return False
+        return any(player.onField and player._stint_start is not None for team in (self.config.teamA, self.config.teamB) for player in team.players)
+
+    def _open_stints(self):
+        if self.config is None: return
+        now = self._play_clock()
+        for team in (self.config.teamA, self.config.teamB):
+            for player in team.players:
+                player._stint_start = now if player.onField else None
 
     async def _save_config_nolock(self):
         if self.config is None: return
+        started = time.perf_counter()
+        self.settle_time_on_field()
+        revision = self.config_revision
         try:
-            async with aiofiles.open(self.file_path, mode='w') as f:
-                await f.write(self.config.model_dump_json(indent=2, exclude={'currentPeriod'}))
-            print(f"Config saved to {self.file_path}")
+            await self._write_file(self.file_path, dump_stored(self.config, StoredScoreboardConfig, CONFIG_SCHEMA_VERSION, exclude={'currentPeriod'}), atomic=True)
+            self._saved_revision = revision
+            logger.debug("Config saved to %s", self.file_path)
         except Exception as e:
-            print(f"!!! Critical Error saving config to {self.file_path}: {e}")
+            logger.error("Error saving config to %s: %s", self.file_path, e)
+        CONFIG_SAVE_SECONDS.observe(time.perf_counter() - started)
 
-    async def save_config(self):
+    async def _write_config(self):
         async with self._config_lock:
             await self._save_config_nolock()
 
+    def mark_config_dirty(self):
+        self.config_revision += 1
+        # Write-behind: the background writer coalesces this into the next scheduled write
+        self._config_writer.mark_dirty()
+
+    async def save_config(self):
+        self.mark_config_dirty()
+
+    async def flush_config(self):
+        # Running stints are settled only in memory until a write: make sure the next one happens
+        if self.has_open_stints():
+            self.settle_time_on_field()
+            self.mark_config_dirty()
+        await self._config_writer.flush()
+
+    def is_config_saved(self) -> bool:
+        """ Whether the config file holds the current config (after flush_config, whether that write succeeded) """
+        return self._saved_revision == self.config_revision
+
+    def get_persistence_stats(self):
+        return {"config": self._config_writer.get_stats()}
+
     async def _save_scoreboard_style_nolock(self):
         if self.scoreboard_style is None:
             self.scoreboard_style = ScoreboardStyleConfig()
@@ -206,17 +527,26 @@ class DataManager:
         if not isinstance(self.scoreboard_style, ScoreboardStyleConfig):
              self.scoreboard_style = ScoreboardStyleConfig()
         
+        started = time.perf_counter()
+        self._style_unsaved = False
         try:
-            async with aiofiles.open(self.scoreboard_style_path, mode='w') as f:
-                await f.write(self.scoreboard_style.model_dump_json(indent=2))
-            print(f"Scoreboard style successfully saved to {self.scoreboard_style_path}")
+            await self._write_file(self.scoreboard_style_path, dump_stored(self.scoreboard_style, StoredScoreboardStyle, STYLE_SCHEMA_VERSION))
+            logger.debug("Scoreboard style saved to %s", self.scoreboard_style_path)
         except Exception as e:
-            print(f"!!! Critical Error saving scoreboard style to {self.scoreboard_style_path}: {e}")
+            logger.error("Error saving scoreboard style to %s: %s", self.scoreboard_style_path, e)
+        STYLE_SAVE_SECONDS.observe(time.perf_counter() - started)
 
     async def save_scoreboard_style(self):
         async with self._style_lock:
             await self._save_scoreboard_style_nolock()
 
+    async def save_previewed_style(self) -> bool:
+        """ Save the style if a preview changed it since the last save """
+        async with self._style_lock:
+            if not self._style_unsaved: return False
+            await self._save_scoreboard_style_nolock()
+            return True
+
     # --- Updated Shortcut Logic ---
     async def load_shortcuts(self):
         # Default Shortcuts
@@ -241,9 +571,8 @@ class DataManager:
             if not os.path.exists(path):
                 # Save defaults if not exists
                 self.shortcuts = default_shortcuts
-                async with aiofiles.open(path, mode='w') as f:
-                    await f.write(json.dumps([s.model_dump() for s in self.shortcuts], indent=2))
-                print("Default shortcuts created.")
+                await self._write_file(path, json.dumps([s.model_dump() for s in self.shortcuts], indent=2))
+                logger.info("Default shortcuts created.")
                 return
 
             async with aiofiles.open(path, mode='r') as f:
@@ -264,9 +593,9 @@ class DataManager:
                         final_shortcuts.append(default)
                 
                 self.shortcuts = final_shortcuts
-            print("Shortcuts loaded.")
+            logger.info("Shortcuts loaded.")
         except Exception as e:
-            print(f"Error loading shortcuts: {e}")
+            logger.error("Error loading shortcuts: %s", e)
             self.shortcuts = default_shortcuts
 
     def get_shortcuts(self) -> List[Shortcut]:
@@ -278,8 +607,7 @@ class DataManager:
                 s.key = update.key
                 break
         
-        async with aiofiles.open(WRITABLE_SHORTCUT_FILE, mode='w') as f:
-            await f.write(json.dumps([s.model_dump() for s in self.shortcuts], indent=2))
+        await self._write_file(WRITABLE_SHORTCUT_FILE, json.dumps([s.model_dump() for s in self.shortcuts], indent=2))
         return self.shortcuts
 
     # ... (Rest of file unchanged: load_config, get_raw_json, etc.) ...
@@ -288,86 +616,36 @@ class DataManager:
             try:
                 async with aiofiles.open(self.file_path, mode='r') as f:
                     content = await f.read()
-                    data = json.loads(content)
-                    migrated = False
-                    for team_key in ['teamA', 'teamB']:
-                        if team_key in data and 'players' in data[team_key]:
-                            for player in data[team_key]['players']:
-                                if 'timeOnField' not in player:
-                                    player['timeOnField'] = 0
-                                    migrated = True
-                                if isinstance(player.get('yellowCards'), int):
-                                    player['yellowCards'] = []
-                                    migrated = True
-                                if isinstance(player.get('redCards'), int):
-                                    player['redCards'] = []
-                                    migrated = True
-                                if 'goals' in player:
-                                    new_goals = []
-                                    for g in player['goals']:
-                                        if isinstance(g, int):
-                                            is_og = g < 0
-                                            minute = abs(g)
-                                            new_goals.append({"regMinute": minute, "addMinute": 0, "isOwnGoal": is_og, "isPenalty": False})
-                                            migrated = True
-                                        else: 
-                                            if 'isPenalty' not in g:
-                                                g['isPenalty'] = False
-                                                migrated = True
-                                            new_goals.append(g)
-                                    player['goals'] = new_goals
-                                if 'yellowCards' in player:
-                                    new_yellows = []
-                                    for y in player['yellowCards']:
-                                        if isinstance(y, int):
-                                            new_yellows.append({"regMinute": y, "addMinute": 0})
-                                            migrated = True
-                                        else: new_yellows.append(y)
-                                    player['yellowCards'] = new_yellows
-                                if 'redCards' in player:
-                                    new_reds = []
-                                    for r in player['redCards']:
-                                        if isinstance(r, int):
-                                            new_reds.append({"regMinute": r, "addMinute": 0})
-                                            migrated = True
-                                        else: new_reds.append(r)
-                                    player['redCards'] = new_reds
-                    if 'currentPeriod' not in data: data['currentPeriod'] = "First Half"
-                    self.config = ScoreboardConfig.model_validate(data)
-                print("Config loaded successfully.")
+                config, migrated = await offload("load_config", parse_config_file, content)
+                self.config = config
+                self._rebuild_player_index()
+                self._open_stints()
+                self._saved_revision = self.config_revision
+                logger.info("Config loaded successfully.")
+                # Rewriting stamps the file, so the next start takes the fast path
                 if migrated: await self._save_config_nolock()
             except (FileNotFoundError, ValidationError):
-                print(f"Writable config not found. Loading default.")
+                logger.info("Writable config not found. Loading default.")
                 try:
                     async with aiofiles.open(BUNDLED_CONFIG_FILE, mode='r') as f:
                         content = await f.read()
-                        self.config = ScoreboardConfig.model_validate_json(content)
+                        self.config = await offload("load_config", ScoreboardConfig.model_validate_json, content)
+                        self._rebuild_player_index()
+                        self._open_stints()
                     await self._save_config_nolock() 
-                except Exception as e: print(f"CRITICAL: Could not load bundled config: {e}"); raise
+                except Exception as e: logger.critical("Could not load bundled config: %s", e); raise
 
     async def load_scoreboard_style(self):
         async with self._style_lock:
             try:
                 async with aiofiles.open(self.scoreboard_style_path, mode='r') as f:
                     content = await f.read()
-                    data = json.loads(content)
-                    if 'primary' in data: data['boxMainColor'] = data.pop('primary')
-                    if 'secondary' in data: data['textMainColor'] = data.pop('secondary')
-                    if 'tertiary' in data: data['textAltColor'] = data.pop('tertiary')
-                    if 'boxBackgroundAlt' in data: data['boxAltColor'] = data.pop('boxBackgroundAlt')
-                    if 'textColorPrimary' in data: data['textMainColor'] = data.pop('textColorPrimary')
-                    if 'textColorTertiary' in data: data['textAltColor'] = data.pop('textColorTertiary')
-                    if 'textColorSecondary' in data: data['textAltColor'] = data.pop('textColorSecondary')
-                    if 'showRedCardBoxes' in data: data['showRedCardIndicators'] = data.pop('showRedCardBoxes')
-                    if 'timerPosition' not in data: data['timerPosition'] = 'Under'
-                    if 'matchInfo' not in data: data['matchInfo'] = ''
-                    if 'showRedCardIndicators' not in data: data['showRedCardIndicators'] = False
-                    if 'textMainColor' not in data: data['textMainColor'] = '#FFFFFF'
-                    if 'textAltColor' not in data: data['textAltColor'] = '#ffd700'
-                    self.scoreboard_style = ScoreboardStyleConfig.model_validate(data)
-                print("Scoreboard style loaded.")
+                style, migrated = await offload("load_style", parse_style_file, content)
+                self.scoreboard_style = style
+                logger.info("Scoreboard style loaded.")
+                if migrated: await self._save_scoreboard_style_nolock()
             except (FileNotFoundError, ValidationError):
-                print(f"Writable style not found. Loading default.")
+                logger.info("Writable style not found. Loading default.")
                 try:
                     async with aiofiles.open(BUNDLED_STYLE_FILE, mode='r') as f:
                         content = await f.read()
@@ -385,7 +663,7 @@ class DataManager:
                         self.scoreboard_style = ScoreboardStyleConfig.model_validate(data)
                     await self._save_scoreboard_style_nolock()
                 except Exception as e:
-                    print(f"CRITICAL: Could not load bundled style: {e}")
+                    logger.critical("Could not load bundled style: %s", e)
                     self.scoreboard_style = ScoreboardStyleConfig()
                     await self._save_scoreboard_style_nolock()
 
@@ -396,9 +674,9 @@ class DataManager:
                 content = await f.read()
                 data = json.loads(content)
                 self.period_settings = [PeriodSetting.model_validate(item) for item in data]
-            print("Period settings loaded.")
+            logger.info("Period settings loaded.")
         except Exception as e:
-             print(f"Error loading period settings: {e}")
+             logger.error("Error loading period settings: %s", e)
              self.period_settings = []
 
     def get_period_settings(self) -> List[PeriodSetting]: return self.period_settings
@@ -408,29 +686,62 @@ class DataManager:
         sorted_periods = sorted(periods, key=lambda p: p.endTime, reverse=not is_ascending)
         self.period_settings = sorted_periods
         try:
-            async with aiofiles.open(WRITABLE_PERIOD_FILE, mode='w') as f:
-                await f.write(json.dumps([p.model_dump() for p in sorted_periods], indent=2))
-            print(f"Period settings saved to {WRITABLE_PERIOD_FILE}")
+            await self._write_file(WRITABLE_PERIOD_FILE, json.dumps([p.model_dump() for p in sorted_periods], indent=2))
+            logger.info("Period settings saved to %s", WRITABLE_PERIOD_FILE)
         except Exception as e:
-            print(f"!!! Critical Error saving period settings to {WRITABLE_PERIOD_FILE}: {e}")
+            logger.error("Error saving period settings to %s: %s", WRITABLE_PERIOD_FILE, e)
 
+    @journaled("set_current_period", PeriodUpdate, field="name")
     async def set_current_period(self, period_name: str) -> ScoreboardConfig:
         config = self.get_config()
         config.currentPeriod = period_name
         await self.save_config()
         return config
 
+    # --- Raw files (export) ---
+    async def _write_file(self, path: str, content: str, atomic: bool = False):
+        """ Write one of the JSON files, keeping the export cache in step """
+        self._raw_files.pop(path, None)
+        if atomic: await atomic_write(path, content)
+        else:
+            async with aiofiles.open(path, mode='w') as f: await f.write(content)
+        self._file_revision += 1
+        self._raw_files[path] = (self._file_revision, _file_stamp(path), content)
+
     async def get_raw_json(self, file_name: str) -> str:
-        path_to_read = None
-        if file_name == "team-info-config.json": path_to_read = self.file_path
-        elif file_name == "scoreboard-customization.json": path_to_read = self.scoreboard_style_path
-        elif file_name == "time-period-setting.json": path_to_read = WRITABLE_PERIOD_FILE if os.path.exists(WRITABLE_PERIOD_FILE) else BUNDLED_PERIOD_FILE
-        elif file_name == "shortcuts.json": path_to_read = WRITABLE_SHORTCUT_FILE if os.path.exists(WRITABLE_SHORTCUT_FILE) else BUNDLED_SHORTCUT_FILE
-
-        if path_to_read and os.path.exists(path_to_read):
-            async with aiofiles.open(path_to_read, mode='r') as f: return await f.read()
+        return (await self.get_raw_json_versioned(file_name))[1]
+
+    def raw_json_etag(self, revision: int) -> str:
+        return make_etag("file", self.etag_prefix, revision)
+
+    def _raw_json_path(self, file_name: str) -> str:
+        if file_name == "team-info-config.json": return self.file_path
+        if file_name == "scoreboard-customization.json": return self.scoreboard_style_path
+        if file_name == "time-period-setting.json": return WRITABLE_PERIOD_FILE if os.path.exists(WRITABLE_PERIOD_FILE) else BUNDLED_PERIOD_FILE
+        if file_name == "shortcuts.json": return WRITABLE_SHORTCUT_FILE if os.path.exists(WRITABLE_SHORTCUT_FILE) else BUNDLED_SHORTCUT_FILE
         raise FileNotFoundError(f"{file_name} not found.")
 
+    def get_raw_json_revision(self, file_name: str) -> int:
+        """ Revision of an exportable file, from a stat only: validators are checked before any read """
+        path = self._raw_json_path(file_name)
+        stamp = _file_stamp(path)
+        cached = self._raw_files.get(path)
+        if cached and cached[1] == stamp: return cached[0]
+        # New, or changed behind our back (e.g. edited by hand)
+        self._file_revision += 1
+        self._raw_files[path] = (self._file_revision, stamp, None)
+        return self._file_revision
+
+    async def get_raw_json_versioned(self, file_name: str) -> Tuple[int, str]:
+        """ (revision, content) of an exportable file; the disk is read only when it changed """
+        revision = self.get_raw_json_revision(file_name)
+        path = self._raw_json_path(file_name)
+        _, stamp, content = self._raw_files[path]
+        if content is None:
+            async with aiofiles.open(path, mode='r') as f: content = await f.read()
+            self._raw_files[path] = (revision, stamp, content)
+        return revision, content
+
     async def set_raw_json(self, file_name: str, raw_json_data: str) -> List[str]:
         path_to_write = None
         data_to_write = ""
@@ -438,13 +749,13 @@ class DataManager:
 
         try:
             if file_name == "team-info-config.json":
-                model = ScoreboardConfig.model_validate_json(raw_json_data)
+                model = await offload("import", ScoreboardConfig.model_validate_json, raw_json_data)
                 path_to_write = self.file_path
-                data_to_write = model.model_dump_json(indent=2, exclude={'currentPeriod'})
+                data_to_write = await offload("import", dump_stored, model, StoredScoreboardConfig, CONFIG_SCHEMA_VERSION, exclude={'currentPeriod'})
             elif file_name == "scoreboard-customization.json":
-                model = ScoreboardStyleConfig.model_validate_json(raw_json_data)
+                model = await offload("import", ScoreboardStyleConfig.model_validate_json, raw_json_data)
                 path_to_write = self.scoreboard_style_path
-                data_to_write = model.model_dump_json(indent=2)
+                data_to_write = await offload("import", dump_stored, model, StoredScoreboardStyle, STYLE_SCHEMA_VERSION)
             elif file_name == "time-period-setting.json":
                 raw_list = json.loads(raw_json_data)
                 if not isinstance(raw_list, list): raise ValueError("Root element must be a list")
@@ -469,9 +780,12 @@ class DataManager:
                 
             else: raise Exception("Invalid file name.")
             
-            async with aiofiles.open(path_to_write, mode='w') as f: await f.write(data_to_write)
+            await self._write_file(path_to_write, data_to_write)
             
-            if file_name == "team-info-config.json": await self.load_config()
+            if file_name == "team-info-config.json":
+                await self.load_config()
+                # The import is not journaled; compact so recovery starts from the new config
+                if self.journal: self.journal.request_snapshot()
             elif file_name == "scoreboard-customization.json": await self.load_scoreboard_style()
             elif file_name == "time-period-setting.json": await self.load_period_settings()
             elif file_name == "shortcuts.json": await self.load_shortcuts()
@@ -498,6 +812,13 @@ class DataManager:
         await self.save_scoreboard_style()
         return self.scoreboard_style
 
+    def preview_scoreboard_style(self, update: StylePreviewUpdate) -> ScoreboardStyleConfig:
+        """ Apply style/layout changes in memory only; save_previewed_style persists them """
+        style = self.get_scoreboard_style()
+        for field, value in update.model_dump(exclude_none=True).items(): setattr(style, field, value)
+        self._style_unsaved = True
+        return style
+
     async def update_match_info(self, info: str) -> ScoreboardStyleConfig:
         style = self.get_scoreboard_style()
         style.matchInfo = info
@@ -513,8 +834,25 @@ class DataManager:
 
     def get_config(self) -> ScoreboardConfig:
         if self.config is None: raise Exception("Config not loaded")
+        # timeOnField is derived on demand from the open stints
+        self.settle_time_on_field()
         return self.config
         
+    def config_etag(self) -> str:
+        self.settle_time_on_field()
+        return make_etag("config", self.etag_prefix, self.config_revision)
+
+    def get_config_json(self) -> bytes:
+        """ The config as of the last config_etag(), serialized once per revision """
+        if self.config is None: raise Exception("Config not loaded")
+        if self._config_json is None or self._config_json[0] != self.config_revision:
+            self._config_json = (self.config_revision, self.config.model_dump_json().encode())
+        return self._config_json[1]
+
+    def get_report(self) -> Dict:
+        return self.report.to_dict(self.get_config())
+
+    @journaled("update_team_info", TeamInfoUpdate)
     async def update_team_info(self, info: TeamInfoUpdate) -> ScoreboardConfig:
         config = self.get_config()
         config.teamA.name = info.teamA.get('name', config.teamA.name)
@@ -524,6 +862,7 @@ class DataManager:
         await self.save_config()
         return config
 
+    @journaled("update_colors", CustomizationUpdate)
     async def update_colors(self, colors: CustomizationUpdate) -> ScoreboardConfig:
         config = self.get_config()
         config.teamA.colors = colors.teamA
@@ -531,6 +870,7 @@ class DataManager:
         await self.save_config()
         return config
 
+    @journaled("set_score", SetScoreUpdate)
     async def set_score(self, score_data: SetScoreUpdate) -> ScoreboardConfig:
         config = self.get_config()
         team_to_update = getattr(config, score_data.team)
@@ -539,94 +879,115 @@ class DataManager:
         await self.save_config()
         return config
 
+    @journaled("add_player", AddPlayerUpdate)
     async def add_player(self, update: AddPlayerUpdate) -> ScoreboardConfig:
         config = self.get_config()
         team_to_update = getattr(config, update.team)
-        for player in team_to_update.players:
-            if player.number == update.number: raise Exception(f"Player number {update.number} already exists.")
+        index = self._player_index[update.team]
+        if update.number in index: raise Exception(f"Player number {update.number} already exists.")
         new_player = PlayerConfig(number=update.number, name=update.name)
-        team_to_update.players.append(new_player)
-        team_to_update.players.sort(key=lambda p: p.number)
+        bisect.insort(team_to_update.players, new_player, key=_player_number)
+        index[update.number] = new_player
+        self.report.player_changed(update.team, new_player)
         await self.save_config()
         return config
 
+    @journaled("clear_player_list", ClearPlayersUpdate)
     async def clear_player_list(self, update: ClearPlayersUpdate) -> ScoreboardConfig:
         config = self.get_config()
         team_to_update = getattr(config, update.team)
         team_to_update.players.clear()
+        self._player_index[update.team].clear()
+        self.report.team_changed(update.team, [])
         await self.save_config()
         return config
 
+    @journaled("delete_player", DeletePlayerUpdate)
     async def delete_player(self, update: DeletePlayerUpdate) -> ScoreboardConfig:
         config = self.get_config()
         team_to_update = getattr(config, update.team)
-        original_count = len(team_to_update.players)
-        team_to_update.players = [p for p in team_to_update.players if p.number != update.number]
-        if original_count != len(team_to_update.players): await self.save_config()
+        if self._player_index[update.team].pop(update.number, None) is not None:
+            del team_to_update.players[self._roster_position(team_to_update, update.number)]
+            self.report.player_removed(update.team, update.number)
+            await self.save_config()
         return config
 
+    @journaled("add_goal", AddGoalUpdate)
     async def add_goal(self, update: AddGoalUpdate) -> ScoreboardConfig:
         config = self.get_config()
-        team_to_update = getattr(config, update.team)
-        for player in team_to_update.players:
-            if player.number == update.number:
-                new_goal = Goal(
-                    regMinute=update.regMinute,
-                    addMinute=update.addMinute,
-                    isOwnGoal=update.isOwnGoal,
-                    isPenalty=update.isPenalty
-                )
-                player.goals.append(new_goal)
-                player.goals.sort(key=lambda g: (g.regMinute, g.addMinute))
-                await self.save_config()
-                break
+        player = self._find_player(update.team, update.number)
+        if player:
+            new_goal = Goal(
+                regMinute=update.regMinute,
+                addMinute=update.addMinute,
+                isOwnGoal=update.isOwnGoal,
+                isPenalty=update.isPenalty
+            )
+            player.goals.append(new_goal)
+            player.goals.sort(key=lambda g: (g.regMinute, g.addMinute))
+            self.report.player_changed(update.team, player)
+            await self.save_config()
         return config
 
+    @journaled("add_card", AddCardUpdate)
     async def add_card(self, update: AddCardUpdate) -> ScoreboardConfig:
         config = self.get_config()
-        team = getattr(config, update.team)
-        for player in team.players:
-            if player.number == update.number:
-                new_card = Card(regMinute=update.regMinute, addMinute=update.addMinute)
-                if update.card_type == "yellow" and len(player.yellowCards) < 2:
-                    player.yellowCards.append(new_card)
-                    player.yellowCards.sort(key=lambda c: (c.regMinute, c.addMinute))
-                    await self.save_config()
-                elif update.card_type == "red" and len(player.redCards) < 1:
-                    player.redCards.append(new_card)
-                    await self.save_config()
-                break
+        player = self._find_player(update.team, update.number)
+        if player:
+            new_card = Card(regMinute=update.regMinute, addMinute=update.addMinute)
+            if update.card_type == "yellow" and len(player.yellowCards) < 2:
+                player.yellowCards.append(new_card)
+                player.yellowCards.sort(key=lambda c: (c.regMinute, c.addMinute))
+                self.report.player_changed(update.team, player)
+                await self.save_config()
+            elif update.card_type == "red" and len(player.redCards) < 1:
+                player.redCards.append(new_card)
+                self.report.player_changed(update.team, player)
+                await self.save_config()
         return config
 
+    @journaled("toggle_on_field", ToggleOnFieldUpdate)
     async def toggle_on_field(self, update: ToggleOnFieldUpdate) -> ScoreboardConfig:
         config = self.get_config()
-        team = getattr(config, update.team)
-        for player in team.players:
-            if player.number == update.number:
-                player.onField = not player.onField 
-                await self.save_config()
-                break
+        player = self._find_player(update.team, update.number)
+        if player:
+            now = self._play_clock()
+            self._settle_player(player, now)
+            player.onField = not player.onField
+            player._stint_start = now if player.onField else None
+            self.report.players_changed()
+            await self.save_config()
         return config
 
+    @journaled("edit_player", EditPlayerUpdate)
     async def edit_player(self, update: EditPlayerUpdate) -> ScoreboardConfig:
         config = self.get_config()
         team = getattr(config, update.team)
+        index = self._player_index[update.team]
         if update.original_number != update.number:
-            for p in team.players:
-                if p.number == update.number: raise Exception(f"Player number {update.number} already exists.")
-        for player in team.players:
-            if player.number == update.original_number:
+            if update.number in index: raise Exception(f"Player number {update.number} already exists.")
+        player = index.get(update.original_number)
+        if player:
+            previous_number = player.number
+            if player.number != update.number:
+                # Re-slot the player so the roster stays sorted by number
+                del team.players[self._roster_position(team, player.number)]
+                del index[player.number]
                 player.number = update.number
-                player.name = update.name
-                player.onField = update.onField
-                player.timeOnField = update.timeOnField
-                player.yellowCards = sorted(update.yellowCards, key=lambda c: (c.regMinute, c.addMinute))[:2]
-                player.redCards = sorted(update.redCards, key=lambda c: (c.regMinute, c.addMinute))[:1]
-                player.goals = sorted(update.goals, key=lambda g: (g.regMinute, g.addMinute))
-                await self.save_config()
-                break
+                bisect.insort(team.players, player, key=_player_number)
+                index[player.number] = player
+            player.name = update.name
+            player.onField = update.onField
+            player.timeOnField = update.timeOnField
+            player._stint_start = self._play_clock() if update.onField else None
+            player.yellowCards = sorted(update.yellowCards, key=lambda c: (c.regMinute, c.addMinute))[:2]
+            player.redCards = sorted(update.redCards, key=lambda c: (c.regMinute, c.addMinute))[:1]
+            player.goals = sorted(update.goals, key=lambda g: (g.regMinute, g.addMinute))
+            self.report.player_changed(update.team, player, previous_number)
+            await self.save_config()
         return config
 
+    @journaled("reset_team_stats", ResetStatsUpdate)
     async def reset_team_stats(self, update: ResetStatsUpdate) -> ScoreboardConfig:
         config = self.get_config()
         team = getattr(config, update.team)
@@ -635,21 +996,24 @@ class DataManager:
             player.yellowCards = []
             player.redCards = []
             player.onField = False
+            player._stint_start = None
+        self.report.team_changed(update.team, team.players)
         await self.save_config()
         return config
         
+    @journaled("replace_player", ReplacePlayerUpdate)
     async def replace_player(self, update: ReplacePlayerUpdate) -> ScoreboardConfig:
         config = self.get_config()
-        team = getattr(config, update.team)
-        for player in team.players:
-            if player.number == update.number:
-                player.name = update.name
-                player.onField = False
-                player.yellowCards = []
-                player.redCards = []
-                player.goals = []
-                await self.save_config()
-                break
+        player = self._find_player(update.team, update.number)
+        if player:
+            player.name = update.name
+            player.onField = False
+            player._stint_start = None
+            player.yellowCards = []
+            player.redCards = []
+            player.goals = []
+            self.report.player_changed(update.team, player)
+            await self.save_config()
         return config
 
 data_manager = DataManager(WRITABLE_CONFIG_FILE, WRITABLE_STYLE_FILE)
\ No newline at end of file
@@ -0,0 +1,43 @@
+import secrets
+from fastapi import Request, Response
+from typing import Callable
+
+# Conditional GETs for polled endpoints. Validators come from in-memory revision counters, so a
+# poll with a matching If-None-Match is answered with 304 before anything is serialized or read.
+# Clients must revalidate every time ("no-cache"): the state changes during a live match.
+CACHE_CONTROL = "no-cache"
+# Responses at least this large are gzip-compressed for clients that accept it
+GZIP_MINIMUM_SIZE = 1024
+
+
+def new_etag_prefix() -> str:
+    """ A token per state owner, so validators from another match or an earlier run never match """
+    return secrets.token_hex(4)
+
+
+def make_etag(*parts) -> str:
+    # Weak: the same revision may be sent gzip-compressed or not
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """ Weak comparison against an If-None-Match header (a list of ETags, or "*") """
+    if not if_none_match: return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque: return True
+    return False
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """ The 304 response if the client's copy is current, else None """
+    if not etag_matches(request.headers.get("if-none-match"), etag): return None
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def conditional_response(request: Request, etag: str, render: Callable[[], bytes | str], media_type: str = "application/json") -> Response:
+    """ 304 if the client's copy is current, otherwise the body from `render` """
+    response = not_modified(request, etag)
+    if response is not None: return response
+    return Response(content=render(), media_type=media_type, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
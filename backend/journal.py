@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from persistence import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class MatchJournal:
+    """
+    Append-only journal of match events plus periodic compacted snapshots.
+
+    Every event is one JSON line: {"seq", "t" (wall time), "played", "kind", "op", "data"}.
+    A snapshot stores the full live state at a sequence number; taking one moves the
+    current journal aside, so recovery = latest snapshot + replay of the entries after it.
+    """
+    def __init__(self, journal_path: str, snapshot_path: str, snapshot_every: int = 200):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.seq: int = 0
+        self.replaying: bool = False
+        self._file = None
+        self._since_snapshot: int = 0
+        self._snapshot_source: Callable[[], Dict[str, Any]] | None = None
+        self._snapshot_task: asyncio.Task | None = None
+
+    @property
+    def _old_journal_path(self) -> str:
+        return f"{self.journal_path}.old"
+
+    def set_snapshot_source(self, source: Callable[[], Dict[str, Any]]):
+        self._snapshot_source = source
+
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self):
+        if self._file is None: self._file = open(self.journal_path, mode='a', encoding='utf-8')
+
+    def record(self, kind: str, op: str, data: Any, played: float = 0.0):
+        """ Append one event. Cheap: a single buffered line write and flush, no fsync. """
+        if self.replaying or self._file is None: return
+        self.seq += 1
+        entry = {"seq": self.seq, "t": time.time(), "played": played, "kind": kind, "op": op, "data": data}
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every: self.request_snapshot()
+
+    def request_snapshot(self):
+        if self._file is None: return
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.create_task(self.snapshot())
+
+    def _rotate(self):
+        # Move the current journal aside; entries after the snapshot go to a fresh file
+        if self._file is not None: self._file.close()
+        if os.path.exists(self.journal_path):
+            if os.path.exists(self._old_journal_path):
+                # A previous snapshot never completed: keep its entries too
+                with open(self.journal_path, 'r', encoding='utf-8') as src, open(self._old_journal_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self._old_journal_path)
+        self._file = open(self.journal_path, mode='a', encoding='utf-8')
+
+    async def snapshot(self):
+        if self._snapshot_source is None or self._file is None: return
+        state = self._snapshot_source()
+        seq = self.seq
+        self._since_snapshot = 0
+        self._rotate()
+        try:
+            await atomic_write(self.snapshot_path, json.dumps({"seq": seq, "t": time.time(), "state": state}))
+            if os.path.exists(self._old_journal_path): os.remove(self._old_journal_path)
+        except Exception as e:
+            logger.error("Error writing match snapshot to %s: %s", self.snapshot_path, e)
+
+    def _read_entries(self, path: str) -> List[Dict[str, Any]]:
+        entries = []
+        if not os.path.exists(path): return entries
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try: entries.append(json.loads(line))
+                except ValueError: pass  # Torn final line from a crash
+        return entries
+
+    def load(self) -> Tuple[Dict[str, Any] | None, List[Dict[str, Any]]]:
+        """ Latest snapshot (or None) and the journal entries recorded after it, in order """
+        snapshot = None
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f: snapshot = json.load(f)
+            except ValueError as e:
+                logger.warning("Ignoring unreadable match snapshot: %s", e)
+        base_seq = snapshot["seq"] if snapshot else 0
+        entries = self._read_entries(self._old_journal_path) + self._read_entries(self.journal_path)
+        entries = sorted((e for e in entries if e.get("seq", 0) > base_seq), key=lambda e: e["seq"])
+        self.seq = max([base_seq] + [e["seq"] for e in entries])
+        return snapshot, entries
+
+    async def close(self, discard: bool = False):
+        """ Stop journaling. On a clean shutdown the files are discarded: the config files are current. """
+        if self._snapshot_task and not self._snapshot_task.done(): await self._snapshot_task
+        if self._file is not None: self._file.close(); self._file = None
+        if discard:
+            for path in (self.journal_path, self._old_journal_path, self.snapshot_path):
+                if os.path.exists(path): os.remove(path)
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Tuple
+
+# Log records are queued by the caller and written by a background thread, so the event loop
+# never waits on stdout (which the desktop app pipes and re-logs).
+LOG_LEVEL = os.environ.get("SCOREBOARD_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+# Each distinct message may be logged this many times per window; further repeats are counted
+# and reported with the next one that gets through, or when the window ends
+LOG_RATE_LIMIT = int(os.environ.get("SCOREBOARD_LOG_RATE_LIMIT", "5"))
+LOG_RATE_WINDOW = float(os.environ.get("SCOREBOARD_LOG_RATE_WINDOW", "10"))
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits repeats of the same message, keyed by logger and format string (not the formatted text,
+    so "Client %s disconnected" is one message whatever the arguments). What was suppressed is
+    reported with the next repeat after the window, or by expired() once the window has ended.
+    """
+    def __init__(self, limit: int, window: float):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        # (logger, format string) -> [window start, logged in window, suppressed, last suppressed record]
+        self._windows: Dict[Tuple[str, str], List] = {}
+        # Records are filtered on whichever thread logs them; expired() runs on the reporter thread
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0: return True
+        key = (record.name, str(record.msg))
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or record.created - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._windows[key] = [record.created, 1, 0, None]
+                if suppressed: record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                return True
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+            state[2] += 1
+            state[3] = record
+            return False
+
+    def expired(self, now: float) -> List[logging.LogRecord]:
+        """ Forget windows that ended before `now`, with a summary record for each that suppressed messages """
+        summaries = []
+        with self._lock:
+            for key, (started, _, suppressed, last) in list(self._windows.items()):
+                if now - started < self.window: continue
+                del self._windows[key]
+                if suppressed:
+                    summary = logging.LogRecord(last.name, last.levelno, last.pathname, last.lineno,
+                                                f"{last.getMessage()} ({suppressed} similar messages suppressed)", None, None)
+                    summaries.append(summary)
+        return summaries
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def _report_suppressed(handler: logging.Handler, limiter: RateLimitFilter, stop: threading.Event):
+    # A burst that stops is reported when its window ends, not only if the message comes back
+    while not stop.wait(limiter.window):
+        for record in limiter.expired(time.time()): handler.handle(record)
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """ Route every backend logger through a queue to a stdout writer thread """
+    global _listener
+    if _listener is not None: return
+    log_queue = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(log_queue)
+    limiter = RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW)
+    handler.addFilter(limiter)
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(level if level in LOG_LEVELS else "INFO")
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    stop_reporter = threading.Event()
+    if limiter.limit > 0:
+        threading.Thread(target=_report_suppressed, args=(handler, limiter, stop_reporter), name="log-suppressed", daemon=True).start()
+
+    def shutdown():
+        # Report what is still suppressed, then flush what is still queued
+        stop_reporter.set()
+        for record in limiter.expired(float("inf")): handler.handle(record)
+        _listener.stop()
+    atexit.register(shutdown)
+
+
+def get_log_levels():
+    root = logging.getLogger()
+    loggers = {name: logging.getLevelName(logger.level) for name, logger in sorted(root.manager.loggerDict.items())
+               if isinstance(logger, logging.Logger) and logger.level != logging.NOTSET and not name.startswith("uvicorn")}
+    return {"level": logging.getLevelName(root.level), "loggers": loggers}
+
+
+def set_log_level(level: str, logger: str | None = None):
+    """ Change verbosity at runtime, for everything or for one module's logger (e.g. "data_manager") """
+    logging.getLogger(logger).setLevel(level)
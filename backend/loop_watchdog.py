@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+import offload
+from metrics import LOOP_LAG_SECONDS, LOOP_STALLS, LOOP_LAG_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# The event loop counts as stalled once it has not run the heartbeat for this long
+LOOP_STALL_THRESHOLD = float(os.environ.get("SCOREBOARD_LOOP_STALL_THRESHOLD", "0.1"))
+STALL_HISTORY = 20
+STACK_DEPTH = 8
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# What each task is doing, for stall reports ("POST /api/json/upload", "command player_goal", ...)
+_operations: Dict[asyncio.Task, str] = {}
+
+
+@contextlib.contextmanager
+def operation(name: str):
+    """ Label the current task's work; a stall while it runs is reported under this name """
+    task = asyncio.current_task()
+    previous = _operations.get(task)
+    _operations[task] = name
+    try: yield
+    finally:
+        if previous is None: _operations.pop(task, None)
+        else: _operations[task] = previous
+
+
+class OperationLabelMiddleware:
+    """ ASGI middleware naming each REST call ("POST /api/json/upload") for stall reports """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http": return await self.app(scope, receive, send)
+        with operation(f"{scope['method']} {scope['path']}"): await self.app(scope, receive, send)
+
+
+def _format_frame(frame: traceback.FrameSummary) -> str:
+    return f"{os.path.relpath(frame.filename, BACKEND_DIR) if frame.filename.startswith(BACKEND_DIR) else os.path.basename(frame.filename)}:{frame.lineno} {frame.name}"
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag from inside the loop (the worst lag per `interval` goes to the
+    histogram), and watches from a separate thread for stalls:
+    while the loop is stuck, the thread can still see what it is running (labelled operation
+    and stack), which the loop itself only learns about afterwards.
+    """
+    def __init__(self, threshold: float = LOOP_STALL_THRESHOLD, interval: float = LOOP_LAG_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=STALL_HISTORY)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._heartbeat: float = time.monotonic()
+        self._open_stall: Dict[str, Any] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    async def run(self):
+        """ Heartbeat and lag sampling; runs as a task on the loop being watched """
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        # The heartbeat must beat well within the threshold, or short stalls between beats go unseen
+        beat = min(self.interval, self.threshold / 2)
+        worst, sampled = 0.0, time.monotonic()
+        try:
+            while True:
+                started = time.monotonic()
+                self._heartbeat = started
+                await asyncio.sleep(beat)
+                now = time.monotonic()
+                lag = max(0.0, now - started - beat)
+                worst = max(worst, lag)
+                if self._open_stall is not None: self._close_stall(lag)
+                if now - sampled >= self.interval:
+                    LOOP_LAG_SECONDS.observe(worst)
+                    worst, sampled = 0.0, now
+        finally:
+            self._stop.set()
+
+    def _watch(self):
+        beat = min(self.interval, self.threshold / 2)
+        while not self._stop.wait(self.threshold / 4):
+            overdue = time.monotonic() - self._heartbeat - beat
+            if overdue > self.threshold and self._open_stall is None: self._record_stall(overdue)
+
+    def _record_stall(self, overdue: float):
+        # Runs in the watchdog thread while the loop thread is stuck
+        frame = sys._current_frames().get(self._loop_thread)
+        task = asyncio.current_task(self._loop) if self._loop else None
+        stack = list(reversed(traceback.extract_stack(frame))) if frame else []
+        # The innermost backend frame says more than a library frame below it
+        where = next((f for f in stack if f.filename.startswith(BACKEND_DIR)), stack[0] if stack else None)
+        operation = _operations.get(task) or (task.get_name() if task else None)
+        offloaded = offload.running_tasks() if operation is None else []
+        if offloaded:
+            # The loop is idle but cannot get the GIL back from a worker thread
+            operation = "waiting for " + ", ".join(f"offload {name}" for name in offloaded)
+        self._open_stall = {
+            "at": time.time(),
+            "operation": operation or "callback",
+            "where": _format_frame(where) if where else None,
+            "stack": [_format_frame(f) for f in stack[:STACK_DEPTH]],
+            "lagMs": round(overdue * 1000, 1),
+            "ongoing": True,
+        }
+        self.stalls.append(self._open_stall)
+        LOOP_STALLS.inc()
+
+    def _close_stall(self, lag: float):
+        stall, self._open_stall = self._open_stall, None
+        stall["lagMs"] = round(max(lag * 1000, stall["lagMs"]), 1)
+        stall["ongoing"] = False
+        logger.warning("Event loop stalled %.0f ms in %s at %s", stall["lagMs"], stall["operation"], stall["where"])
+
+    def get_stalls(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.stalls))
+
+
+loop_watchdog = LoopWatchdog()
@@ -1,90 +1,295 @@
+from startup import startup_timer  # First import: start-up time is measured from here
+import asyncio
+import functools
+import json
+import logging
 import uvicorn
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
+from fastapi import APIRouter, Depends, FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, Field, ValidationError
 from typing import Literal, List, Optional
 
 from data_manager import (
     data_manager, ScoreboardConfig, TeamInfoUpdate, CustomizationUpdate, SetScoreUpdate, ScoreboardStyleConfig,
     StyleUpdate, AddPlayerUpdate, ClearPlayersUpdate, DeletePlayerUpdate, AddGoalUpdate, AddCardUpdate,
     ToggleOnFieldUpdate, EditPlayerUpdate, ResetStatsUpdate, ReplacePlayerUpdate, MatchInfoUpdate,
-    TimerPositionUpdate, LayoutUpdate, PeriodSetting, PeriodUpdate, Shortcut, ShortcutUpdate
+    TimerPositionUpdate, LayoutUpdate, StylePreviewUpdate, PeriodSetting, PeriodUpdate, Shortcut, ShortcutUpdate,
+    BatchUpdate, BatchError
 )
-from websocket_manager import websocket_manager
+from connection_hub import parse_topics
+from match_report import GameReport
+from http_cache import GZIP_MINIMUM_SIZE, conditional_response, not_modified
+from log_setup import setup_logging, get_log_levels, set_log_level
+from metrics import registry as metrics_registry
+from loop_watchdog import loop_watchdog, OperationLabelMiddleware
+from matches import Match, DEFAULT_MATCH_ID, match_registry
+from scaleout import owner_bridge, worker_link
+from recorder import traffic_recorder, RecordingMiddleware, RECORD_ON_START
+from replay import match_replay, parse_speed
+from clock_source import clock_source, VirtualClock
+import commands
+from commands import SetTimeUpdate, SetExtraTimeUpdate, SetFutsalClockUpdate, VarUpdate, SetPlayersListVisibility
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Application starting up...")
-    await data_manager.load_config()
-    await data_manager.load_scoreboard_style()
-    await data_manager.load_period_settings()
-    await data_manager.load_shortcuts() # <-- Load Shortcuts
+    logger.info("Application starting up...")
+    startup_timer.lifespan_started()
+    loop_monitor = asyncio.create_task(loop_watchdog.run(), name="loop watchdog")
+    if worker_link:
+        # Workers hold no match state; the owner process does
+        await worker_link.start()
+        startup_timer.ready()
+        yield
+        await worker_link.stop()
+        loop_monitor.cancel()
+        return
+    if match_replay:
+        # Replay mode serves a recording; no match state is loaded or changed
+        await match_replay.start()
+        startup_timer.ready()
+        yield
+        await match_replay.stop()
+        loop_monitor.cancel()
+        return
+    # The four files are independent: read them concurrently
+    await asyncio.gather(
+        startup_timer.measure("config", data_manager.load_config()),
+        startup_timer.measure("style", data_manager.load_scoreboard_style()),
+        startup_timer.measure("periods", data_manager.load_period_settings()),
+        startup_timer.measure("shortcuts", data_manager.load_shortcuts()),
+    )
     
     periods = data_manager.get_period_settings()
     if periods and len(periods) > 0:
         await data_manager.set_current_period(periods[0].name)
+    await startup_timer.measure("recovery", match_registry.default.start())
+    match_registry.start()
+    if owner_bridge: await owner_bridge.start(app)
+    if RECORD_ON_START: traffic_recorder.start()
+    startup_timer.ready()
     yield
-    print("Application shutting down...")
+    logger.info("Application shutting down...")
+    await traffic_recorder.stop()
+    if owner_bridge: await owner_bridge.stop()
+    await match_registry.stop()
+    await match_registry.default.stop()
+    loop_monitor.cancel()
 
 app = FastAPI(lifespan=lifespan)
 origins = ["*"]
 app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-@app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket_manager.connect(websocket)
-    try: await websocket.send_json({"type": "config", "config": data_manager.get_config().model_dump()})
-    except Exception as e: print(f"Error sending config: {e}")
-    try: await websocket.send_json({"type": "scoreboard_style", "style": data_manager.get_scoreboard_style().model_dump()})
-    except Exception as e: print(f"Error sending style: {e}")
+if worker_link:
+    @app.middleware("http")
+    async def forward_to_owner(request: Request, call_next):
+        # Every REST call runs in the owner process, which holds the state
+        if request.url.path.startswith("/api/"): return await worker_link.forward_http(request)
+        return await call_next(request)
+
+if match_replay:
+    @app.middleware("http")
+    async def reject_mutations(request: Request, call_next):
+        # Only the replay itself can be controlled while a recording is served
+        if request.method == "POST" and request.url.path.startswith("/api/") and not request.url.path.startswith("/api/replay"):
+            return JSONResponse({"detail": "Replaying a recording: changes are disabled."}, status_code=409)
+        return await call_next(request)
+
+app.add_middleware(RecordingMiddleware, recorder=traffic_recorder)
+app.add_middleware(OperationLabelMiddleware)
+# Added last so it wraps everything, forwarded responses included
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+# Match-scoped routes are served twice: /api/... for the default match, /api/matches/{match_id}/... for the others
+router = APIRouter()
+
+async def get_match(request: Request) -> Match:
+    match = await match_registry.get(request.path_params.get("match_id", DEFAULT_MATCH_ID))
+    if match is None: raise HTTPException(status_code=404, detail="Match not found.")
+    return match
+
+async def serve_websocket(websocket: WebSocket, match_id: str, topics: Optional[str]):
+    if worker_link:
+        match, websocket_manager = None, await worker_link.get_hub(match_id)
+        dispatch = functools.partial(worker_link.dispatch, match_id)
+    elif match_replay:
+        match, websocket_manager, dispatch = None, match_replay.get_hub(match_id), match_replay.dispatch
+    else:
+        match = await match_registry.get(match_id)
+        websocket_manager = match.websocket_manager if match else None
+        dispatch = functools.partial(commands.dispatch, match)
+    if websocket_manager is None: await websocket.close(code=1008); return
+    # Single-purpose overlays can subscribe to just what they render: /ws?topics=var,config
+    await websocket_manager.connect(websocket, parse_topics(topics))
+    startup_timer.websocket_accepted()
     try:
-        while True: await websocket.receive_text()
-    except WebSocketDisconnect: websocket_manager.disconnect(websocket); print("Client disconnected")
+        while True:
+            raw = await websocket.receive_text()
+            try: message = json.loads(raw)
+            except ValueError: continue
+            if not isinstance(message, dict): continue
+            # Clients that detect a gap in config versions ask for a full snapshot
+            if message.get("type") == "resync":
+                await websocket_manager.send_config_snapshot(websocket)
+            elif message.get("type") == "subscribe":
+                await websocket_manager.subscribe(websocket, parse_topics(message.get("topics")))
+            # Control commands share the REST handlers; the ack is queued behind the resulting broadcast
+            elif message.get("type") == "command":
+                reply = await dispatch(message)
+                await websocket_manager.send(websocket, reply)
+    except WebSocketDisconnect:
+        websocket_manager.disconnect(websocket)
+        if match: match.touch()
+        logger.info("Client disconnected")
+
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket, topics: Optional[str] = None):
+    await serve_websocket(websocket, DEFAULT_MATCH_ID, topics)
+
+@app.websocket("/ws/{match_id}")
+async def match_websocket_endpoint(websocket: WebSocket, match_id: str, topics: Optional[str] = None):
+    await serve_websocket(websocket, match_id, topics)
+
+# --- Metrics (Prometheus text format; per process, so workers report their own) ---
+@app.get("/metrics", tags=["Diagnostics"])
+async def get_metrics():
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/startup", tags=["Diagnostics"])
+async def get_startup_stats(): return startup_timer.get_stats()
+
+@app.get("/api/event-loop", tags=["Diagnostics"])
+async def get_event_loop_stalls():
+    # Most recent first; "where" is the innermost backend frame the loop was stuck in
+    return {"thresholdMs": loop_watchdog.threshold * 1000, "stalls": loop_watchdog.get_stalls()}
+
+# --- Recording & Replay ---
+class ReplayRestart(BaseModel):
+    speed: float | Literal["max"] = 1.0
+
+@app.get("/api/recording", tags=["Diagnostics"])
+async def get_recording(): return traffic_recorder.get_stats()
+
+@app.post("/api/recording/start", tags=["Diagnostics"])
+async def start_recording():
+    traffic_recorder.start()
+    return traffic_recorder.get_stats()
+
+@app.post("/api/recording/stop", tags=["Diagnostics"])
+async def stop_recording():
+    await traffic_recorder.stop()
+    return traffic_recorder.get_stats()
+
+@app.get("/api/replay", tags=["Diagnostics"])
+async def get_replay():
+    if not match_replay: raise HTTPException(status_code=404, detail="Not in replay mode (set SCOREBOARD_REPLAY).")
+    return match_replay.get_stats()
+
+@app.post("/api/replay/restart", tags=["Diagnostics"])
+async def restart_replay(update: ReplayRestart):
+    if not match_replay: raise HTTPException(status_code=404, detail="Not in replay mode (set SCOREBOARD_REPLAY).")
+    try: speed = parse_speed(update.speed)
+    except ValueError as e: raise HTTPException(status_code=400, detail=str(e))
+    await match_replay.restart(speed)
+    return match_replay.get_stats()
+
+# --- Clock source (shared by every match's clock) ---
+class ClockAdvance(BaseModel):
+    seconds: float = Field(gt=0)
+
+@app.get("/api/clock", tags=["Diagnostics"])
+async def get_clock_source(): return clock_source.get_stats()
+
+@app.post("/api/clock/advance", tags=["Diagnostics"])
+async def advance_clock(update: ClockAdvance):
+    # Simulation only: runs every tick, stint and broadcast due in that span before returning
+    if not isinstance(clock_source, VirtualClock): raise HTTPException(status_code=409, detail="Only a virtual clock can be advanced (set SCOREBOARD_CLOCK=virtual).")
+    await clock_source.advance(update.seconds)
+    return clock_source.get_stats()
+
+# --- Logging ---
+class LogLevelUpdate(BaseModel):
+    level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+    logger: Optional[str] = None  # a module name, e.g. "data_manager"; omit for everything
+
+@app.get("/api/logging", tags=["Diagnostics"])
+async def get_logging(): return get_log_levels()
+
+@app.post("/api/logging", tags=["Diagnostics"])
+async def update_logging(update: LogLevelUpdate):
+    set_log_level(update.level, update.logger)
+    return get_log_levels()
+
+# --- Matches ---
+class MatchCreate(BaseModel):
+    id: str
+
+@app.get("/api/matches", tags=["Matches"])
+async def list_matches(): return match_registry.list_matches()
+
+@app.post("/api/matches", tags=["Matches"])
+async def create_match(data: MatchCreate):
+    if not match_registry.is_valid_id(data.id): raise HTTPException(status_code=400, detail="Match id may only contain letters, digits, '-' and '_'.")
+    if match_registry.exists(data.id): raise HTTPException(status_code=409, detail="Match already exists.")
+    match = await match_registry.create(data.id)
+    return match.get_summary()
+
+@app.post("/api/matches/{match_id}/unload", tags=["Matches"])
+async def unload_match(match_id: str):
+    if match_id == DEFAULT_MATCH_ID: raise HTTPException(status_code=400, detail="The default match cannot be unloaded.")
+    if match_registry.is_in_use(match_id): raise HTTPException(status_code=409, detail="Stop the match clock and close its overlays first.")
+    await match_registry.unload(match_id)
+    return {"message": f"Match {match_id} unloaded"}
 
 # --- Timer Control ---
-@app.post("/api/timer/start", tags=["Timer Control"])
-async def start_timer(): websocket_manager.start(); return {"message": "Timer started"}
+@router.post("/timer/start", tags=["Timer Control"])
+async def start_timer(match: Match = Depends(get_match)): return await commands.timer_start(match)
 
-@app.post("/api/timer/stop", tags=["Timer Control"])
-async def stop_timer(): websocket_manager.stop(); return {"message": "Timer stopped"}
+@router.post("/timer/stop", tags=["Timer Control"])
+async def stop_timer(match: Match = Depends(get_match)): return await commands.timer_stop(match)
 
-class SetTimeUpdate(BaseModel): seconds: int
-@app.post("/api/timer/set", tags=["Timer Control"])
-async def set_timer(update: SetTimeUpdate): websocket_manager.set_time(update.seconds); return {"message": f"Timer set to {update.seconds} seconds"}
+@router.get("/timer/stats", tags=["Timer Control"])
+async def get_timer_stats(match: Match = Depends(get_match)): return match.websocket_manager.get_timer_stats()
 
-class SetExtraTimeUpdate(BaseModel): minutes: int
-@app.post("/api/extra-time/set", tags=["Timer Control"])
-async def set_extra_time(update: SetExtraTimeUpdate): websocket_manager.set_extra_time(update.minutes); return {"message": f"Extra time set to {update.minutes} minutes"}
+@router.post("/timer/set", tags=["Timer Control"])
+async def set_timer(update: SetTimeUpdate, match: Match = Depends(get_match)): return await commands.timer_set(match, update)
 
-@app.post("/api/extra-time/toggle", tags=["Timer Control"])
-async def toggle_extra_time(): status = await websocket_manager.toggle_extra_time_visibility(); return status
+@router.post("/extra-time/set", tags=["Timer Control"])
+async def set_extra_time(update: SetExtraTimeUpdate, match: Match = Depends(get_match)): return await commands.extra_time_set(match, update)
 
-class SetFutsalClockUpdate(BaseModel): is_on: bool
-@app.post("/api/timer/futsal-toggle", tags=["Timer Control"])
-async def set_futsal_clock(update: SetFutsalClockUpdate): websocket_manager.set_futsal_clock(update.is_on); return {"message": f"Futsal clock set to {update.is_on}"}
+@router.post("/extra-time/toggle", tags=["Timer Control"])
+async def toggle_extra_time(match: Match = Depends(get_match)): return await commands.extra_time_toggle(match)
 
-@app.get("/api/periods-settings", tags=["Timer Control"])
+@router.post("/timer/futsal-toggle", tags=["Timer Control"])
+async def set_futsal_clock(update: SetFutsalClockUpdate, match: Match = Depends(get_match)): return await commands.futsal_toggle(match, update)
+
+# Period settings and shortcuts are shared by all matches
+@router.get("/periods-settings", tags=["Timer Control"])
 async def get_periods() -> List[PeriodSetting]: return data_manager.get_period_settings()
 
 class PeriodsUpdate(BaseModel):
     periods: List[PeriodSetting]
     is_ascending: bool
 
-@app.post("/api/periods-settings", tags=["Timer Control"])
+@router.post("/periods-settings", tags=["Timer Control"])
 async def save_periods(update: PeriodsUpdate):
     await data_manager.save_period_settings(update.periods, update.is_ascending)
     return {"message": "Period settings saved"}
 
-@app.post("/api/period", tags=["Timer Control"])
-async def set_current_period(update: PeriodUpdate): config = await data_manager.set_current_period(update.name); await websocket_manager.broadcast_config(config); return {"message": f"Period set to {update.name}"}
+@router.post("/period", tags=["Timer Control"])
+async def set_current_period(update: PeriodUpdate, match: Match = Depends(get_match)): return await commands.period_set(match, update)
 
 # --- Shortcut Endpoints ---
-@app.get("/api/shortcuts", tags=["Shortcuts"])
+@router.get("/shortcuts", tags=["Shortcuts"])
 async def get_shortcuts() -> List[Shortcut]:
     return data_manager.get_shortcuts()
 
-@app.post("/api/shortcuts", tags=["Shortcuts"])
+@router.post("/shortcuts", tags=["Shortcuts"])
 async def update_shortcut(update: ShortcutUpdate):
     shortcuts = await data_manager.update_shortcut(update)
     # Broadcast or let client refetch? Let's just return list.
@@ -92,96 +297,113 @@ async def update_shortcut(update: ShortcutUpdate):
     # For now, let's keep it simple.
     return shortcuts
 
+# --- Diagnostics ---
+@router.get("/persistence/stats", tags=["Diagnostics"])
+async def get_persistence_stats(match: Match = Depends(get_match)):
+    return {**match.data_manager.get_persistence_stats(), "stylePreview": match.websocket_manager.style_preview.get_stats()}
+
+@router.get("/connections/stats", tags=["Diagnostics"])
+async def get_connection_stats(match: Match = Depends(get_match)): return match.websocket_manager.get_connection_stats()
+
 # --- Team & Player Data ---
-@app.get("/api/config", tags=["Team & Player Data"])
-async def get_full_config() -> ScoreboardConfig: return data_manager.get_config()
+@router.get("/config", tags=["Team & Player Data"], response_model=ScoreboardConfig)
+async def get_full_config(request: Request, match: Match = Depends(get_match)):
+    return conditional_response(request, match.data_manager.config_etag(), match.data_manager.get_config_json)
+
+@router.get("/report", tags=["Team & Player Data"])
+async def get_report(match: Match = Depends(get_match)) -> GameReport: return match.data_manager.get_report()
+
+@router.post("/score/set", tags=["Team & Player Data"])
+async def set_score(update: SetScoreUpdate, match: Match = Depends(get_match)) -> ScoreboardConfig: return await commands.score_set(match, update)
 
-@app.post("/api/score/set", tags=["Team & Player Data"])
-async def set_score(update: SetScoreUpdate) -> ScoreboardConfig: config = await data_manager.set_score(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/team-info", tags=["Team & Player Data"])
+async def update_team_info(update: TeamInfoUpdate, match: Match = Depends(get_match)) -> ScoreboardConfig: return await commands.team_info(match, update)
 
-@app.post("/api/team-info", tags=["Team & Player Data"])
-async def update_team_info(update: TeamInfoUpdate) -> ScoreboardConfig: config = await data_manager.update_team_info(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/customization", tags=["Team & Player Data"])
+async def update_customization(update: CustomizationUpdate, match: Match = Depends(get_match)) -> ScoreboardConfig: return await commands.customization(match, update)
 
-@app.post("/api/customization", tags=["Team & Player Data"])
-async def update_customization(update: CustomizationUpdate) -> ScoreboardConfig: config = await data_manager.update_colors(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/add", tags=["Team & Player Data"])
+async def add_player(update: AddPlayerUpdate, match: Match = Depends(get_match)): return await commands.player_add(match, update)
 
-@app.post("/api/player/add", tags=["Team & Player Data"])
-async def add_player(update: AddPlayerUpdate): config = await data_manager.add_player(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/replace", tags=["Team & Player Data"])
+async def replace_player(update: ReplacePlayerUpdate, match: Match = Depends(get_match)): return await commands.player_replace(match, update)
 
-@app.post("/api/player/replace", tags=["Team & Player Data"])
-async def replace_player(update: ReplacePlayerUpdate): config = await data_manager.replace_player(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/clear", tags=["Team & Player Data"])
+async def clear_player_list(update: ClearPlayersUpdate, match: Match = Depends(get_match)): return await commands.player_clear(match, update)
 
-@app.post("/api/player/clear", tags=["Team & Player Data"])
-async def clear_player_list(update: ClearPlayersUpdate): config = await data_manager.clear_player_list(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/delete", tags=["Team & Player Data"])
+async def delete_player(update: DeletePlayerUpdate, match: Match = Depends(get_match)): return await commands.player_delete(match, update)
 
-@app.post("/api/player/delete", tags=["Team & Player Data"])
-async def delete_player(update: DeletePlayerUpdate): config = await data_manager.delete_player(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/goal", tags=["Team & Player Data"])
+async def add_goal(update: AddGoalUpdate, match: Match = Depends(get_match)): return await commands.player_goal(match, update)
 
-@app.post("/api/player/goal", tags=["Team & Player Data"])
-async def add_goal(update: AddGoalUpdate): config = await data_manager.add_goal(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/card", tags=["Team & Player Data"])
+async def add_card(update: AddCardUpdate, match: Match = Depends(get_match)): return await commands.player_card(match, update)
 
-@app.post("/api/player/card", tags=["Team & Player Data"])
-async def add_card(update: AddCardUpdate): config = await data_manager.add_card(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/togglefield", tags=["Team & Player Data"])
+async def toggle_on_field(update: ToggleOnFieldUpdate, match: Match = Depends(get_match)): return await commands.player_togglefield(match, update)
 
-@app.post("/api/player/togglefield", tags=["Team & Player Data"])
-async def toggle_on_field(update: ToggleOnFieldUpdate): config = await data_manager.toggle_on_field(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/edit", tags=["Team & Player Data"])
+async def edit_player(update: EditPlayerUpdate, match: Match = Depends(get_match)): return await commands.player_edit(match, update)
 
-@app.post("/api/player/edit", tags=["Team & Player Data"])
-async def edit_player(update: EditPlayerUpdate): config = await data_manager.edit_player(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/player/resetstats", tags=["Team & Player Data"])
+async def reset_player_stats(update: ResetStatsUpdate, match: Match = Depends(get_match)): return await commands.player_resetstats(match, update)
 
-@app.post("/api/player/resetstats", tags=["Team & Player Data"])
-async def reset_player_stats(update: ResetStatsUpdate): config = await data_manager.reset_team_stats(update); await websocket_manager.broadcast_config(config); return config
+@router.post("/batch", tags=["Team & Player Data"])
+async def apply_batch(update: BatchUpdate, match: Match = Depends(get_match)):
+    try: return await commands.batch(match, update)
+    except BatchError as e: raise HTTPException(status_code=400, detail={"message": str(e), "results": e.results})
 
 # --- Scoreboard & Overlays ---
-class VarUpdate(BaseModel):
-    isVisible: Optional[bool] = None
-    scenario: Optional[str] = None
-    message: Optional[str] = None
-    decision: Optional[str] = None
+@router.post("/var-update", tags=["VAR Control"])
+async def update_var(update: VarUpdate, match: Match = Depends(get_match)): return await commands.var_update(match, update)
 
-@app.post("/api/var-update", tags=["VAR Control"])
-async def update_var(update: VarUpdate):
-    await websocket_manager.broadcast_var_update(update.model_dump(exclude_none=True))
-    return {"message": "VAR updated"}
+@router.post("/match-info", tags=["Scoreboard & Overlays"])
+async def update_match_info(update: MatchInfoUpdate, match: Match = Depends(get_match)): return await commands.match_info(match, update)
 
-@app.post("/api/match-info", tags=["Scoreboard & Overlays"])
-async def update_match_info(update: MatchInfoUpdate): new_style = await data_manager.update_match_info(update.info); await websocket_manager.broadcast_scoreboard_style(new_style); return new_style
+@router.post("/match-info/toggle", tags=["Scoreboard & Overlays"])
+async def toggle_match_info(match: Match = Depends(get_match)): return await commands.match_info_toggle(match)
 
-@app.post("/api/match-info/toggle", tags=["Scoreboard & Overlays"])
-async def toggle_match_info(): status = await websocket_manager.toggle_match_info_visibility(); return status
+@router.post("/layout", tags=["Scoreboard & Overlays"])
+async def update_layout(update: LayoutUpdate, match: Match = Depends(get_match)): return await commands.layout(match, update)
 
-@app.post("/api/layout", tags=["Scoreboard & Overlays"])
-async def update_layout(update: LayoutUpdate): new_style = await data_manager.update_layout(update); await websocket_manager.broadcast_scoreboard_style(new_style); return new_style
+@router.post("/scoreboard-style", tags=["Scoreboard & Overlays"])
+async def update_scoreboard_style(style: StyleUpdate, match: Match = Depends(get_match)): return await commands.scoreboard_style(match, style)
 
-@app.post("/api/scoreboard-style", tags=["Scoreboard & Overlays"])
-async def update_scoreboard_style(style: StyleUpdate): new_style = await data_manager.update_scoreboard_style(style); await websocket_manager.broadcast_scoreboard_style(new_style); return new_style
+@router.post("/scoreboard-style/preview", tags=["Scoreboard & Overlays"])
+async def preview_scoreboard_style(update: StylePreviewUpdate, match: Match = Depends(get_match)): return await commands.scoreboard_style_preview(match, update)
 
-@app.post("/api/game-report/toggle", tags=["Scoreboard & Overlays"])
-async def toggle_game_report(): status = await websocket_manager.toggle_game_report(); return status
+@router.post("/scoreboard-style/commit", tags=["Scoreboard & Overlays"])
+async def commit_scoreboard_style(match: Match = Depends(get_match)): return await commands.scoreboard_style_commit(match)
 
-@app.post("/api/scoreboard/toggle", tags=["Scoreboard & Overlays"])
-async def toggle_scoreboard(): status = await websocket_manager.toggle_scoreboard(); return status
+@router.post("/game-report/toggle", tags=["Scoreboard & Overlays"])
+async def toggle_game_report(match: Match = Depends(get_match)): return await commands.game_report_toggle(match)
 
-class SetPlayersListVisibility(BaseModel):
-    visibleA: bool
-    visibleB: bool
+@router.post("/scoreboard/toggle", tags=["Scoreboard & Overlays"])
+async def toggle_scoreboard(match: Match = Depends(get_match)): return await commands.scoreboard_toggle(match)
 
-@app.post("/api/players-list/toggle-a", tags=["Scoreboard & Overlays"])
-async def toggle_players_list_a(): return await websocket_manager.toggle_players_list_a()
+@router.post("/players-list/toggle-a", tags=["Scoreboard & Overlays"])
+async def toggle_players_list_a(match: Match = Depends(get_match)): return await commands.players_list_toggle_a(match)
 
-@app.post("/api/players-list/toggle-b", tags=["Scoreboard & Overlays"])
-async def toggle_players_list_b(): return await websocket_manager.toggle_players_list_b()
+@router.post("/players-list/toggle-b", tags=["Scoreboard & Overlays"])
+async def toggle_players_list_b(match: Match = Depends(get_match)): return await commands.players_list_toggle_b(match)
 
-@app.post("/api/players-list/set", tags=["Scoreboard & Overlays"])
-async def set_players_list_visibility(update: SetPlayersListVisibility):
-    return await websocket_manager.set_players_list_visibility(update.visibleA, update.visibleB)
+@router.post("/players-list/set", tags=["Scoreboard & Overlays"])
+async def set_players_list_visibility(update: SetPlayersListVisibility, match: Match = Depends(get_match)): return await commands.players_list_set(match, update)
 
 # --- Import & Export ---
-@app.get("/api/json/{file_name}", tags=["Import & Export"])
-async def get_json_file(file_name: str):
+# Team info and customization belong to the match; periods and shortcuts are shared
+MATCH_FILES = ("team-info-config.json", "scoreboard-customization.json")
+
+@router.get("/json/{file_name}", tags=["Import & Export"])
+async def get_json_file(file_name: str, request: Request, match: Match = Depends(get_match)):
     try:
-        content = await data_manager.get_raw_json(file_name)
-        return Response(content=content, media_type="application/json")
+        owner = match.data_manager if file_name in MATCH_FILES else data_manager
+        # A stat decides; the file is only read when the client's copy is out of date
+        cached = not_modified(request, owner.raw_json_etag(owner.get_raw_json_revision(file_name)))
+        if cached is not None: return cached
+        revision, content = await owner.get_raw_json_versioned(file_name)
+        return conditional_response(request, owner.raw_json_etag(revision), lambda: content)
     except FileNotFoundError: raise HTTPException(status_code=404, detail="File not found.")
     except Exception as e: raise HTTPException(status_code=500, detail=str(e))
 
@@ -189,18 +411,22 @@ class UploadData(BaseModel):
     file_name: Literal["team-info-config.json", "scoreboard-customization.json", "time-period-setting.json", "shortcuts.json"]
     json_data: str
 
-@app.post("/api/json/upload", tags=["Import & Export"])
-async def upload_json_file(data: UploadData):
+@router.post("/json/upload", tags=["Import & Export"])
+async def upload_json_file(data: UploadData, match: Match = Depends(get_match)):
     try:
         # data_manager.set_raw_json returns list of warnings now
-        warnings = await data_manager.set_raw_json(data.file_name, data.json_data)
+        warnings = await (match.data_manager if data.file_name in MATCH_FILES else data_manager).set_raw_json(data.file_name, data.json_data)
         
-        await websocket_manager.broadcast_config(data_manager.get_config())
-        await websocket_manager.broadcast_scoreboard_style(data_manager.get_scoreboard_style())
+        await match.websocket_manager.broadcast_config(match.data_manager.get_config())
+        await match.websocket_manager.broadcast_scoreboard_style(match.data_manager.get_scoreboard_style())
         
         return {"message": "File imported successfully.", "warnings": warnings}
     except ValidationError as e: raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
     except Exception as e: raise HTTPException(status_code=500, detail=f"Error: {e}")
 
+app.include_router(router, prefix="/api")
+app.include_router(router, prefix="/api/matches/{match_id}")
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Browsers offer permessage-deflate; full config and report frames compress well
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_per_message_deflate=True)
@@ -0,0 +1,106 @@
+import math
+
+from clock_source import ClockSource, clock_source
+
+
+class MatchClock:
+    """
+    Match clock whose value is computed from its time source rather than counted.
+    While running, value = base + (now - started_at); stopping folds the elapsed
+    time into `base`, so paused time is never counted and ticks cannot drift.
+    """
+    def __init__(self, source: ClockSource = clock_source):
+        self.source = source
+        self.countdown: bool = False
+        self._base: float = 0.0
+        self._started_at: float | None = None
+        # Total running time, unaffected by direction or set(); drives playing-time stints
+        self._played_base: float = 0.0
+        # Tick lateness statistics (seconds a tick fired after its deadline)
+        self.ticks: int = 0
+        self._last_lateness: float = 0.0
+        self._max_lateness: float = 0.0
+        self._mean_lateness: float = 0.0
+        self._m2_lateness: float = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._started_at is not None
+
+    def now(self) -> float:
+        return self.source.now()
+
+    async def sleep_until(self, deadline: float):
+        await self.source.sleep_until(deadline)
+
+    def value(self, now: float | None = None) -> float:
+        """ Exact clock value in seconds (never below zero) """
+        if self._started_at is None: return self._base
+        elapsed = (self.now() if now is None else now) - self._started_at
+        if self.countdown: return max(0.0, self._base - elapsed)
+        return self._base + elapsed
+
+    def played(self, now: float | None = None) -> float:
+        """ Seconds the clock has spent running since startup """
+        if self._started_at is None: return self._played_base
+        return self._played_base + (self.now() if now is None else now) - self._started_at
+
+    def seconds(self, now: float | None = None) -> int:
+        """ Displayed whole seconds: count-up floors, countdown shows the current second until it ends """
+        value = self.value(now)
+        return math.ceil(value - 1e-9) if self.countdown else int(value + 1e-9)
+
+    def start(self):
+        if self._started_at is None: self._started_at = self.now()
+
+    def stop(self):
+        if self._started_at is None: return
+        now = self.now()
+        self._base = self.value(now)
+        self._played_base = self.played(now)
+        self._started_at = None
+
+    def set(self, seconds: float):
+        self._base = max(0.0, float(seconds))
+        if self._started_at is not None:
+            now = self.now()
+            self._played_base = self.played(now)
+            self._started_at = now
+
+    def get_state(self):
+        return {"value": self.value(), "played": self.played(), "running": self.is_running, "countdown": self.countdown}
+
+    def restore(self, state, elapsed: float = 0.0):
+        """ Restore a saved state; a running clock continues as if `elapsed` seconds had passed """
+        self.countdown = bool(state.get("countdown", False))
+        self._base = float(state.get("value", 0.0))
+        self._played_base = float(state.get("played", 0.0))
+        self._started_at = self.now() - max(0.0, elapsed) if state.get("running") else None
+
+    def next_tick_deadline(self) -> float:
+        """ Instant (on the source's time scale) at which the displayed second next changes """
+        if self._started_at is None: return self.now()
+        if self.countdown:
+            target = self.seconds() - 1
+            return self._started_at + (self._base - target)
+        target = self.seconds() + 1
+        return self._started_at + (target - self._base)
+
+    def record_tick(self, deadline: float, fired_at: float):
+        lateness = max(0.0, fired_at - deadline)
+        self.ticks += 1
+        self._last_lateness = lateness
+        self._max_lateness = max(self._max_lateness, lateness)
+        delta = lateness - self._mean_lateness
+        self._mean_lateness += delta / self.ticks
+        self._m2_lateness += delta * (lateness - self._mean_lateness)
+
+    def get_stats(self):
+        jitter = math.sqrt(self._m2_lateness / self.ticks) if self.ticks > 1 else 0.0
+        return {
+            "ticks": self.ticks,
+            "lastLatenessMs": round(self._last_lateness * 1000, 3),
+            "meanLatenessMs": round(self._mean_lateness * 1000, 3),
+            "maxLatenessMs": round(self._max_lateness * 1000, 3),
+            "jitterMs": round(jitter * 1000, 3),
+        }
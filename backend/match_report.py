@@ -0,0 +1,127 @@
+import bisect
+from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Tuple
+
+TeamKey = Literal["teamA", "teamB"]
+OPPONENT = {"teamA": "teamB", "teamB": "teamA"}
+# Order of events within the same minute
+EVENT_ORDER = {"Goal": 1, "Own Goal": 1, "Yellow": 2, "Red": 3}
+
+
+class ReportEvent(BaseModel):
+    regMinute: int
+    addMinute: int
+    type: Literal["Goal", "Own Goal", "Yellow", "Red"]
+    team: TeamKey   # the player's team
+    side: TeamKey   # the team the event counts for: own goals count for the opponent
+    playerNumber: int
+    playerName: str
+    isPenalty: bool = False
+
+class ReportPlayer(BaseModel):
+    number: int
+    name: str
+    onField: bool
+    timeOnField: int
+    goals: int
+    ownGoals: int
+    yellowCards: int
+    redCards: int
+
+class TeamReport(BaseModel):
+    goals: List[ReportEvent]
+    cards: List[ReportEvent]
+    players: List[ReportPlayer]
+
+class GameReport(BaseModel):
+    version: int
+    timeline: List[ReportEvent]
+    teamA: TeamReport
+    teamB: TeamReport
+
+
+def _event_key(event: ReportEvent):
+    return (event.regMinute, event.addMinute, EVENT_ORDER[event.type])
+
+def _player_events(team: str, player) -> List[ReportEvent]:
+    events = [
+        ReportEvent(regMinute=g.regMinute, addMinute=g.addMinute, type="Own Goal" if g.isOwnGoal else "Goal",
+                    team=team, side=OPPONENT[team] if g.isOwnGoal else team, playerNumber=player.number,
+                    playerName=player.name, isPenalty=g.isPenalty and not g.isOwnGoal)
+        for g in player.goals
+    ]
+    for card_type, cards in (("Yellow", player.yellowCards), ("Red", player.redCards)):
+        events.extend(ReportEvent(regMinute=c.regMinute, addMinute=c.addMinute, type=card_type, team=team, side=team,
+                                  playerNumber=player.number, playerName=player.name) for c in cards)
+    return events
+
+def _player_summary(player) -> Dict[str, Any]:
+    own_goals = sum(1 for g in player.goals if g.isOwnGoal)
+    return {
+        "number": player.number, "name": player.name, "onField": player.onField, "timeOnField": player.timeOnField,
+        "goals": len(player.goals) - own_goals, "ownGoals": own_goals,
+        "yellowCards": len(player.yellowCards), "redCards": len(player.redCards),
+    }
+
+
+class MatchReport:
+    """
+    The game report as a materialized view of the rosters: a chronological timeline of goals and
+    cards, kept sorted as players change, so clients render it instead of rebuilding it from every
+    config message. DataManager reports each roster change; `version` counts them.
+    """
+    def __init__(self):
+        self.version = 0
+        self._timeline: List[ReportEvent] = []
+        # The serialized report, built once per version
+        self._dump: Tuple[int, Dict[str, Any]] | None = None
+
+    def _changed(self):
+        self.version += 1
+
+    def _discard(self, team: str, number: int):
+        self._timeline = [e for e in self._timeline if e.team != team or e.playerNumber != number]
+
+    def _insert(self, events: List[ReportEvent]):
+        for event in events: bisect.insort(self._timeline, event, key=_event_key)
+
+    def rebuild(self, config):
+        """ Derive everything again, after the whole config was replaced """
+        # One stable sort; inserting event by event is quadratic for an imported season's roster
+        self._timeline = [e for team in ("teamA", "teamB") for p in getattr(config, team).players for e in _player_events(team, p)]
+        self._timeline.sort(key=_event_key)
+        self._changed()
+
+    def player_changed(self, team: str, player, previous_number: int | None = None):
+        """ Re-derive one player's events (after a goal, card, edit, rename or stats reset) """
+        self._discard(team, player.number if previous_number is None else previous_number)
+        self._insert(_player_events(team, player))
+        self._changed()
+
+    def player_removed(self, team: str, number: int):
+        self._discard(team, number)
+        self._changed()
+
+    def team_changed(self, team: str, players):
+        self._timeline = [e for e in self._timeline if e.team != team]
+        self._timeline.extend(e for player in players for e in _player_events(team, player))
+        self._timeline.sort(key=_event_key)
+        self._changed()
+
+    def players_changed(self):
+        """ Line-ups or playing time changed; the timeline did not """
+        self.version += 1
+
+    def to_dict(self, config) -> Dict[str, Any]:
+        """ The report for `config`, which must have told this view about every change since the last call """
+        if self._dump is not None and self._dump[0] == self.version: return self._dump[1]
+        timeline = [e.model_dump() for e in self._timeline]
+        report = {"version": self.version, "timeline": timeline}
+        for team in ("teamA", "teamB"):
+            report[team] = {
+                "goals": [e for e in timeline if e["side"] == team and e["type"] in ("Goal", "Own Goal")],
+                "cards": [e for e in timeline if e["team"] == team and e["type"] in ("Yellow", "Red")],
+                "players": [_player_summary(p) for p in getattr(config, team).players],
+            }
+        self._dump = (self.version, report)
+        return report
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import logging
+import os
+import re
+import time
+from typing import Callable, Dict, List
+
+from data_manager import (
+    data_manager, DataManager, WRITABLE_DIR, WRITABLE_CONFIG_FILE, WRITABLE_STYLE_FILE,
+    WRITABLE_JOURNAL_FILE, WRITABLE_SNAPSHOT_FILE
+)
+from websocket_manager import websocket_manager, WebSocketManager
+from journal import MatchJournal
+from recovery import JOURNAL_SNAPSHOT_EVERY, start_match_journal, stop_match_journal
+
+logger = logging.getLogger(__name__)
+
+# The match served by the unprefixed /api routes and /ws; it lives in the working directory
+DEFAULT_MATCH_ID = "default"
+MATCHES_DIR = os.path.join(WRITABLE_DIR, "matches")
+MATCH_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Seconds a match may sit with no clients and a stopped clock before it is unloaded
+MATCH_IDLE_TIMEOUT = float(os.environ.get("SCOREBOARD_MATCH_IDLE_TIMEOUT", "600"))
+MATCH_REAP_INTERVAL = 30.0
+
+
+class Match:
+    """ Everything one match needs: its data, clock and overlay state, connections and journal """
+    def __init__(self, match_id: str, data_manager: DataManager, websocket_manager: WebSocketManager, journal: MatchJournal):
+        self.match_id = match_id
+        self.data_manager = data_manager
+        self.websocket_manager = websocket_manager
+        self.journal = journal
+        self.last_active = time.monotonic()
+
+    @classmethod
+    def from_directory(cls, match_id: str, directory: str) -> "Match":
+        match_data = DataManager(os.path.join(directory, "team-info-config.json"), os.path.join(directory, "scoreboard-customization.json"))
+        journal = MatchJournal(os.path.join(directory, "match-journal.jsonl"), os.path.join(directory, "match-snapshot.json"), snapshot_every=JOURNAL_SNAPSHOT_EVERY)
+        return cls(match_id, match_data, WebSocketManager(match_data), journal)
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def is_idle(self, now: float) -> bool:
+        return self.websocket_manager.is_idle() and now - self.last_active > MATCH_IDLE_TIMEOUT
+
+    async def start(self):
+        await start_match_journal(self.journal, self.data_manager, self.websocket_manager)
+
+    async def stop(self, discard: bool = True):
+        await self.websocket_manager.style_preview.commit()
+        await self.data_manager.flush_config()
+        # The journal is the only record of changes the config file is missing
+        if discard and not self.data_manager.is_config_saved():
+            logger.warning("Match '%s': config not saved, keeping the match journal for recovery", self.match_id)
+            discard = False
+        await stop_match_journal(self.journal, self.data_manager, self.websocket_manager, discard=discard)
+        await self.websocket_manager.close()
+
+    def get_summary(self):
+        return {"id": self.match_id, "loaded": True, "connections": self.websocket_manager.connection_count(), **self.websocket_manager.get_status()}
+
+
+class MatchRegistry:
+    """
+    Matches by id. Named matches live in matches/<id>/, are loaded on first use and
+    unloaded again once idle; their live state survives unloading through the match journal.
+    """
+    def __init__(self, default_match: Match):
+        self.default = default_match
+        self._matches: Dict[str, Match] = {default_match.match_id: default_match}
+        self._lock = asyncio.Lock()
+        self._reaper: asyncio.Task | None = None
+        # Owner mode: frames are also published to worker processes, whose viewers keep a match loaded
+        self._publisher: Callable[[str, str, str, str | None], None] | None = None
+        # While recording: every frame also goes to the traffic recorder, with a keyframe source
+        self._recorder: Callable[[str, Callable[[], str], str, str, str | None], None] | None = None
+        self.remote_viewers: Callable[[str], int] = lambda match_id: 0
+
+    def set_publisher(self, publisher: Callable[[str, str, str, str | None], None] | None):
+        self._publisher = publisher
+        for match in self._matches.values(): self._attach_outputs(match)
+
+    def set_recorder(self, recorder: Callable[[str, Callable[[], str], str, str, str | None], None] | None):
+        self._recorder = recorder
+        for match in self._matches.values(): self._attach_outputs(match)
+
+    def _attach_outputs(self, match: Match):
+        manager = match.websocket_manager
+        manager.publisher = functools.partial(self._publisher, match.match_id) if self._publisher else None
+        manager.recorder = functools.partial(self._recorder, match.match_id, manager.build_snapshot_frame) if self._recorder else None
+
+    @staticmethod
+    def is_valid_id(match_id: str) -> bool:
+        return bool(MATCH_ID_PATTERN.match(match_id))
+
+    @staticmethod
+    def _directory(match_id: str) -> str:
+        return os.path.join(MATCHES_DIR, match_id)
+
+    def exists(self, match_id: str) -> bool:
+        return match_id in self._matches or (self.is_valid_id(match_id) and os.path.isdir(self._directory(match_id)))
+
+    async def get(self, match_id: str) -> Match | None:
+        """ The match with this id, loading it from disk if needed; None if there is no such match """
+        match = self._matches.get(match_id)
+        if match is None:
+            if not self.exists(match_id): return None
+            match = await self._load(match_id)
+        match.touch()
+        return match
+
+    async def create(self, match_id: str) -> Match:
+        os.makedirs(self._directory(match_id), exist_ok=True)
+        return await self.get(match_id)
+
+    async def _load(self, match_id: str) -> Match:
+        async with self._lock:
+            if match_id in self._matches: return self._matches[match_id]
+            started = time.perf_counter()
+            match = Match.from_directory(match_id, self._directory(match_id))
+            await match.data_manager.load_config()
+            await match.data_manager.load_scoreboard_style()
+            # Period settings are shared by all matches
+            periods = data_manager.get_period_settings()
+            if periods: await match.data_manager.set_current_period(periods[0].name)
+            await match.start()
+            self._attach_outputs(match)
+            self._matches[match_id] = match
+            logger.info("Match '%s' loaded in %.1f ms", match_id, (time.perf_counter() - started) * 1000)
+            return match
+
+    def is_in_use(self, match_id: str) -> bool:
+        """ A loaded match with a running clock or connected clients (here or in a worker process) """
+        match = self._matches.get(match_id)
+        return match is not None and (not match.websocket_manager.is_idle() or bool(self.remote_viewers(match_id)))
+
+    async def unload(self, match_id: str):
+        async with self._lock:
+            match = self._matches.get(match_id)
+            if match is None or match is self.default: return
+            del self._matches[match_id]
+            await match.stop(discard=False)
+            logger.info("Match '%s' unloaded", match_id)
+
+    def list_matches(self) -> List[dict]:
+        summaries = {match_id: match.get_summary() for match_id, match in self._matches.items()}
+        if os.path.isdir(MATCHES_DIR):
+            for match_id in sorted(os.listdir(MATCHES_DIR)):
+                if match_id not in summaries and self.exists(match_id): summaries[match_id] = {"id": match_id, "loaded": False}
+        return list(summaries.values())
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(MATCH_REAP_INTERVAL)
+            now = time.monotonic()
+            for match_id, match in list(self._matches.items()):
+                if match is not self.default and match.is_idle(now) and not self.remote_viewers(match_id):
+                    try: await self.unload(match_id)
+                    except Exception as e: logger.error("Error unloading match '%s': %s", match_id, e)
+
+    def start(self):
+        self._reaper = asyncio.create_task(self._reap())
+
+    async def stop(self):
+        if self._reaper: self._reaper.cancel()
+        for match_id in [m for m in self._matches if m != self.default.match_id]:
+            await self.unload(match_id)
+
+
+default_match = Match(DEFAULT_MATCH_ID, data_manager, websocket_manager,
+                      MatchJournal(WRITABLE_JOURNAL_FILE, WRITABLE_SNAPSHOT_FILE, snapshot_every=JOURNAL_SNAPSHOT_EVERY))
+match_registry = MatchRegistry(default_match)
@@ -0,0 +1,180 @@
+import asyncio
+import bisect
+import time
+from typing import Callable, Dict, List, Tuple
+
+# In-process metrics rendered in the Prometheus text format at /metrics.
+# Recording is a dict lookup and a few additions, cheap enough to leave on during live matches.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+BYTES_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+LOOP_LAG_INTERVAL = 0.5
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra: pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+    def __init__(self): self.value = 0.0
+    def inc(self, amount: float = 1.0): self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+    def __init__(self): self.value = 0.0
+    def set(self, value: float): self.value = value
+    def inc(self, amount: float = 1.0): self.value += amount
+    def dec(self, amount: float = 1.0): self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    """ A named metric with optional labels; children are created on first use and cached """
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._children: Dict[Tuple[str, ...], object] = {}
+        # Unlabelled metrics are reported (as zero) before their first use
+        if not labelnames: self.labels()
+
+    def _new_child(self): raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None: child = self._children[values] = self._new_child()
+        return child
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {child.value:g}" for values, child in self._children.items()]
+
+    def render(self) -> str:
+        return "\n".join([f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self._samples()])
+
+
+class Counter(Metric):
+    kind = "counter"
+    def _new_child(self): return _CounterChild()
+    def inc(self, amount: float = 1.0): self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self._function: Callable[[], float] | None = None
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self): return _GaugeChild()
+    def set(self, value: float): self.labels().set(value)
+    def inc(self, amount: float = 1.0): self.labels().inc(amount)
+    def dec(self, amount: float = 1.0): self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """ Read the value at scrape time instead of tracking it """
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None: return [f"{self.name} {self._function():g}"]
+        return super()._samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self): return _HistogramChild(self.buckets)
+    def observe(self, value: float): self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), child.counts):
+                cumulative += count
+                le = f'le="{bound if bound == "+Inf" else f"{bound:g}"}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {child.sum:g}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics: raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+BROADCAST_SECONDS = registry.histogram("scoreboard_broadcast_seconds", "Time to encode a broadcast and queue it for every subscriber", ("type",))
+BROADCAST_BYTES = registry.histogram("scoreboard_broadcast_frame_bytes", "Encoded size of broadcast frames", ("type",), BYTES_BUCKETS)
+CLIENT_SEND_SECONDS = registry.histogram("scoreboard_client_send_seconds", "Time to write one frame to a client socket")
+CLIENT_SENT_BYTES = registry.counter("scoreboard_client_sent_bytes_total", "Bytes written to client sockets")
+CLIENT_QUEUE_DEPTH = registry.histogram("scoreboard_client_queue_depth", "Client queue depth when a frame is queued", buckets=DEPTH_BUCKETS)
+CLIENT_DROPPED = registry.counter("scoreboard_client_dropped_frames_total", "Frames dropped for clients with a full queue")
+CLIENT_EVICTIONS = registry.counter("scoreboard_client_evictions_total", "Clients disconnected for being too slow")
+FRAME_MESSAGES = registry.histogram("scoreboard_frame_messages", "Messages combined into one outbound frame", buckets=DEPTH_BUCKETS)
+FRAME_SUPERSEDED = registry.counter("scoreboard_frame_superseded_total", "Broadcasts replaced by a newer one before their frame went out")
+ACTIVE_CONNECTIONS = registry.gauge("scoreboard_active_connections", "Connected WebSocket clients")
+CONFIG_SAVE_SECONDS = registry.histogram("scoreboard_config_save_seconds", "Time to write the team config file")
+STYLE_SAVE_SECONDS = registry.histogram("scoreboard_style_save_seconds", "Time to write the scoreboard style file")
+LOCK_WAIT_SECONDS = registry.histogram("scoreboard_lock_wait_seconds", "Time spent waiting to acquire a data lock", ("lock",))
+TICK_LATENESS_SECONDS = registry.histogram("scoreboard_clock_tick_lateness_seconds", "How late clock ticks fire after their deadline")
+LOOP_LAG_SECONDS = registry.histogram("scoreboard_event_loop_lag_seconds", "Event loop scheduling delay, sampled periodically")
+LOOP_STALLS = registry.counter("scoreboard_event_loop_stalls_total", "Times the event loop was stuck longer than the stall threshold")
+OFFLOAD_SECONDS = registry.histogram("scoreboard_offload_seconds", "Time CPU-heavy work spent in the worker threads", ("task",))
+
+
+class TimedLock(asyncio.Lock):
+    """ asyncio.Lock that records how long callers wait for it """
+    def __init__(self, name: str):
+        super().__init__()
+        self._wait = LOCK_WAIT_SECONDS.labels(name)
+
+    async def acquire(self):
+        started = time.perf_counter()
+        result = await super().acquire()
+        self._wait.observe(time.perf_counter() - started)
+        return result
+
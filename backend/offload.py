@@ -0,0 +1,49 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, TypeVar
+
+from metrics import OFFLOAD_SECONDS
+
+T = TypeVar("T")
+
+# CPU-heavy work on data the loop no longer touches (parsing, validating and serializing imported
+# or loaded files) runs on these threads. They share the GIL with the loop: Python code is switched
+# out every few milliseconds, but a single pydantic-core call (validating or dumping one document)
+# keeps the GIL until it returns, so a huge file still delays the loop by that call's duration.
+# Never pass live state (self.config, ...) here: the loop may change it meanwhile.
+OFFLOAD_WORKERS = int(os.environ.get("SCOREBOARD_OFFLOAD_WORKERS", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=OFFLOAD_WORKERS, thread_name_prefix="offload")
+# Callers beyond the worker count wait here, on the loop, instead of piling up in the executor
+_slots = asyncio.Semaphore(OFFLOAD_WORKERS)
+# Tasks on the worker threads right now, for stall reports. Changed by the workers and read by the
+# watchdog thread: only under the lock (read it through running_tasks())
+_running: Counter = Counter()
+_running_lock = threading.Lock()
+
+
+def running_tasks() -> List[str]:
+    """ Names of the tasks on the worker threads right now """
+    with _running_lock: return sorted(_running)
+
+
+def _timed(task: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    started = time.perf_counter()
+    with _running_lock: _running[task] += 1
+    try: return func(*args, **kwargs)
+    finally:
+        with _running_lock:
+            _running[task] -= 1
+            if not _running[task]: del _running[task]
+        OFFLOAD_SECONDS.labels(task).observe(time.perf_counter() - started)
+
+
+async def offload(task: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """ Run `func(*args, **kwargs)` on a worker thread; `task` names it in the metrics """
+    async with _slots:
+        return await asyncio.get_running_loop().run_in_executor(_executor, functools.partial(_timed, task, func, *args, **kwargs))
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+import aiofiles
+from typing import Awaitable, Callable
+
+
+def _fsync_directory(directory: str):
+    # Makes the rename itself durable; directories cannot be opened like this on Windows
+    try: fd = os.open(directory, os.O_RDONLY)
+    except OSError: return
+    try: os.fsync(fd)
+    except OSError: pass
+    finally: os.close(fd)
+
+
+async def atomic_write(path: str, data: str):
+    """
+    Write to a temp file next to `path`, then rename it over the original. The data is synced
+    before the rename and the directory after it, so a crash leaves the old file or the new one.
+    """
+    tmp_path = f"{path}.tmp"
+    loop = asyncio.get_running_loop()
+    async with aiofiles.open(tmp_path, mode='w') as f:
+        await f.write(data)
+        await f.flush()
+        # aiofiles runs its calls on the default executor; the syncs go there too
+        await loop.run_in_executor(None, os.fsync, f.fileno())
+    os.replace(tmp_path, path)
+    await loop.run_in_executor(None, _fsync_directory, os.path.dirname(os.path.abspath(path)))
+
+
+class WriteBehindWriter:
+    """
+    Coalesces save requests into at most one write per `interval` seconds.
+    Callers mark the state dirty; a single background task performs the write.
+    """
+    def __init__(self, write: Callable[[], Awaitable[None]], interval: float = 1.0):
+        self._write = write
+        self.interval = interval
+        self._dirty: bool = False
+        self._task: asyncio.Task | None = None
+        self._flush_now = asyncio.Event()
+        self._last_write: float = 0.0
+        self.requests: int = 0
+        self.writes: int = 0
+
+    def mark_dirty(self):
+        self.requests += 1
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while self._dirty:
+            delay = self._last_write + self.interval - time.monotonic()
+            if delay > 0 and not self._flush_now.is_set():
+                try: await asyncio.wait_for(self._flush_now.wait(), timeout=delay)
+                except asyncio.TimeoutError: pass
+            await self._write_once()
+
+    async def _write_once(self):
+        self._dirty = False
+        self._last_write = time.monotonic()
+        self.writes += 1
+        await self._write()
+
+    async def flush(self):
+        """ Write pending changes immediately (used on shutdown) """
+        self._flush_now.set()
+        try:
+            if self._task: await self._task
+            if self._dirty: await self._write_once()
+        finally:
+            self._flush_now.clear()
+
+    def get_stats(self):
+        return {
+            "interval": self.interval,
+            "requests": self.requests,
+            "writes": self.writes,
+            "coalesced": self.requests - self.writes,
+            "pending": self._dirty,
+        }
@@ -0,0 +1,211 @@
+import asyncio
+import abc
+import itertools
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+# Frame callback: (channel, topic, frame, latest_key)
+FrameHandler = Callable[[str, str, str, str | None], None]
+RequestHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+# Encoded frames and snapshots are single lines, but can be large
+STREAM_LIMIT = 16 * 1024 * 1024
+# A worker this far behind is disconnected; it reconnects and resyncs its clients
+MAX_WORKER_BUFFER = 8 * 1024 * 1024
+REQUEST_TIMEOUT = 10.0
+
+
+class RemoteError(Exception):
+    """ A request failed in the owner process; `results` carries per-operation batch results if any """
+    def __init__(self, message: str, results: list | None = None):
+        super().__init__(message)
+        self.results = results
+
+
+class PubSubServer(abc.ABC):
+    """
+    Owner side of the scale-out transport: publishes encoded frames per channel (match id)
+    and answers requests from workers. Implemented by UnixSocketBroker; a networked backend
+    (e.g. Redis pub/sub plus a request queue) would implement the same four methods.
+    """
+    @abc.abstractmethod
+    async def start(self, handle_request: RequestHandler): ...
+    @abc.abstractmethod
+    def publish(self, channel: str, topic: str, frame: str, latest_key: str | None = None): ...
+    @abc.abstractmethod
+    def subscriber_count(self, channel: str) -> int: ...
+    @abc.abstractmethod
+    async def stop(self): ...
+
+
+class PubSubClient(abc.ABC):
+    """ Worker side: receives frames for subscribed channels and sends requests to the owner """
+    @abc.abstractmethod
+    async def start(self, on_frame: FrameHandler, on_connect: Callable[[], None]): ...
+    @abc.abstractmethod
+    def subscribe(self, channel: str): ...
+    @abc.abstractmethod
+    def unsubscribe(self, channel: str): ...
+    @abc.abstractmethod
+    async def request(self, payload: Dict[str, Any]) -> Any: ...
+    @abc.abstractmethod
+    async def stop(self): ...
+
+
+# --- Unix socket broker ---
+# One text line per message. Frames are forwarded verbatim, never re-encoded:
+#   owner -> worker   F <channel> <topic> <latest_key|-> <frame>     R <id> <json reply>
+#   worker -> owner   S <channel>    U <channel>    Q <id> <json request>
+
+class _Worker:
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.channels: Set[str] = set()
+
+    def send(self, line: str) -> bool:
+        if self.writer.is_closing(): return False
+        if self.writer.transport.get_write_buffer_size() > MAX_WORKER_BUFFER:
+            logger.warning("Disconnecting worker: too far behind")
+            self.writer.close()
+            return False
+        self.writer.write(line.encode())
+        return True
+
+
+class UnixSocketBroker(PubSubServer):
+    def __init__(self, path: str):
+        self.path = path
+        self._server: asyncio.AbstractServer | None = None
+        self._workers: Set[_Worker] = set()
+        self._handle_request: RequestHandler | None = None
+
+    async def start(self, handle_request: RequestHandler):
+        self._handle_request = handle_request
+        # Workers' requests run with the owner's rights: only this user may reach the socket
+        directory = os.path.dirname(self.path)
+        if directory: os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.path): os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path, limit=STREAM_LIMIT)
+        os.chmod(self.path, 0o600)
+        logger.info("Scale-out broker listening on %s", self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        worker = _Worker(writer)
+        self._workers.add(worker)
+        try:
+            while line := await reader.readline():
+                kind, _, rest = line.decode().rstrip("\n").partition(" ")
+                if kind == "S": worker.channels.add(rest)
+                elif kind == "U": worker.channels.discard(rest)
+                elif kind == "Q":
+                    request_id, _, payload = rest.partition(" ")
+                    # A bad request fails on its own; the connection and its other requests carry on
+                    try: request = json.loads(payload)
+                    except ValueError as e: self._reply(worker, request_id, {"ok": False, "error": f"Malformed request: {e}"}); continue
+                    asyncio.create_task(self._answer(worker, request_id, request))
+        except (ConnectionError, ValueError) as e:
+            logger.warning("Worker connection error: %s", e)
+        finally:
+            self._workers.discard(worker)
+            writer.close()
+
+    async def _answer(self, worker: _Worker, request_id: str, payload: Dict[str, Any]):
+        try: reply = {"ok": True, "result": await self._handle_request(payload)}
+        except Exception as e: reply = {"ok": False, "error": str(e), "results": getattr(e, "results", None)}
+        self._reply(worker, request_id, reply)
+
+    def _reply(self, worker: _Worker, request_id: str, reply: Dict[str, Any]):
+        worker.send(f"R {request_id} {json.dumps(reply, separators=(',', ':'))}\n")
+
+    def publish(self, channel: str, topic: str, frame: str, latest_key: str | None = None):
+        line = None
+        for worker in list(self._workers):
+            if channel not in worker.channels: continue
+            if line is None: line = f"F {channel} {topic} {latest_key or '-'} {frame}\n"
+            worker.send(line)
+
+    def subscriber_count(self, channel: str) -> int:
+        return sum(1 for worker in self._workers if channel in worker.channels)
+
+    async def stop(self):
+        if self._server is None: return
+        self._server.close()
+        for worker in list(self._workers): worker.writer.close()
+        await self._server.wait_closed()
+        if os.path.exists(self.path): os.remove(self.path)
+
+
+class UnixSocketBrokerClient(PubSubClient):
+    def __init__(self, path: str):
+        self.path = path
+        self._writer: asyncio.StreamWriter | None = None
+        self._channels: Set[str] = set()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._task: asyncio.Task | None = None
+        self._on_frame: FrameHandler | None = None
+        self._on_connect: Callable[[], None] | None = None
+
+    async def start(self, on_frame: FrameHandler, on_connect: Callable[[], None]):
+        self._on_frame, self._on_connect = on_frame, on_connect
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path, limit=STREAM_LIMIT)
+            except OSError:
+                await asyncio.sleep(delay); delay = min(delay * 2, 5.0)
+                continue
+            delay = 0.5
+            logger.info("Connected to scale-out broker at %s", self.path)
+            for channel in self._channels: self._writer.write(f"S {channel}\n".encode())
+            self._on_connect()
+            try:
+                while line := await reader.readline():
+                    self._dispatch(line.decode().rstrip("\n"))
+            except (ConnectionError, ValueError) as e:
+                logger.warning("Broker connection error: %s", e)
+            self._writer.close()
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done(): future.set_exception(ConnectionError("Broker connection lost"))
+            self._pending.clear()
+            logger.warning("Lost scale-out broker connection; reconnecting")
+
+    def _dispatch(self, line: str):
+        kind, _, rest = line.partition(" ")
+        if kind == "F":
+            channel, topic, latest_key, frame = rest.split(" ", 3)
+            self._on_frame(channel, topic, frame, None if latest_key == "-" else latest_key)
+        elif kind == "R":
+            request_id, _, payload = rest.partition(" ")
+            future = self._pending.pop(request_id, None)
+            if future and not future.done(): future.set_result(json.loads(payload))
+
+    def subscribe(self, channel: str):
+        self._channels.add(channel)
+        if self._writer: self._writer.write(f"S {channel}\n".encode())
+
+    def unsubscribe(self, channel: str):
+        self._channels.discard(channel)
+        if self._writer: self._writer.write(f"U {channel}\n".encode())
+
+    async def request(self, payload: Dict[str, Any]) -> Any:
+        if self._writer is None: raise ConnectionError("Not connected to the scale-out broker")
+        request_id = str(next(self._ids))
+        future = self._pending[request_id] = asyncio.get_running_loop().create_future()
+        self._writer.write(f"Q {request_id} {json.dumps(payload, separators=(',', ':'))}\n".encode())
+        try: reply = await asyncio.wait_for(future, REQUEST_TIMEOUT)
+        finally: self._pending.pop(request_id, None)
+        if not reply["ok"]: raise RemoteError(reply["error"], reply.get("results"))
+        return reply["result"]
+
+    async def stop(self):
+        if self._task: self._task.cancel()
+        if self._writer: self._writer.close()
@@ -0,0 +1,244 @@
+import asyncio
+import gzip
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from data_manager import WRITABLE_DIR
+from matches import match_registry
+from offload import offload
+
+logger = logging.getLogger(__name__)
+
+# Record from start-up (the recording can also be started and stopped through the API)
+RECORD_ON_START = os.environ.get("SCOREBOARD_RECORD", "") not in ("", "0", "false")
+RECORDING_DIR = os.environ.get("SCOREBOARD_RECORDING_DIR", os.path.join(WRITABLE_DIR, "recordings"))
+# Rolling: a session is a directory of gzip segments; the oldest are deleted beyond this many
+RECORDING_SEGMENT_BYTES = int(os.environ.get("SCOREBOARD_RECORDING_SEGMENT_BYTES", str(8 * 1024 * 1024)))
+RECORDING_SEGMENTS = int(os.environ.get("SCOREBOARD_RECORDING_SEGMENTS", "6"))
+# A match's full state is written at least this often, so a replay can start from any segment
+# and late viewers of a replay catch up from the nearest keyframe
+RECORDING_KEYFRAME_INTERVAL = 60.0
+RECORDING_FLUSH_INTERVAL = 1.0
+# Imports can be megabytes; the start of the body says what was sent
+RECORDING_MAX_BODY = 64 * 1024
+SEGMENT_SUFFIX = ".jsonl.gz"
+# Replays read this many entries per trip to the offload threads
+READ_BATCH = 500
+
+
+class SegmentWriter(threading.Thread):
+    """
+    Compresses and writes recording segments on its own thread, in the order things were queued:
+    the loop only formats lines. Closing drains the queue, closes the segment and ends the thread.
+    """
+    def __init__(self):
+        super().__init__(name="recorder", daemon=True)
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    def open_segment(self, path: str): self._queue.put(("open", path))
+    def write(self, line: str): self._queue.put(("write", line))
+    def remove(self, path: str): self._queue.put(("remove", path))
+    def flush(self): self._queue.put(("flush", None))
+    def close(self): self._queue.put(("close", None))
+
+    def run(self):
+        file = None
+        while True:
+            action, argument = self._queue.get()
+            try:
+                if action == "write": file.write(argument)
+                elif action == "open":
+                    if file is not None: file.close()
+                    file = gzip.open(argument, mode="wt", encoding="utf-8", compresslevel=6)
+                elif action == "remove": os.remove(argument)
+                elif action == "flush": file.flush()
+                elif action == "close":
+                    if file is not None: file.close()
+                    return
+            except OSError as e:
+                logger.warning("Recording writer: cannot %s: %s", action, e)
+
+
+class TrafficRecorder:
+    """
+    Records every broadcast frame (before per-client batching) and every inbound mutation
+    (REST calls and WebSocket commands), one JSON array per line, with monotonic seconds since
+    the session started:
+
+        [t, "segment", {"session", "index", "started" (wall time)}]   first line of each segment
+        [t, "keyframe", match_id, snapshot_frame]
+        [t, "frame", match_id, topic, latest_key, frame]
+        [t, "http", method, path, status, duration_ms, body]     t is when the request arrived
+        [t, "command", match_id, message]
+
+    Segments are gzip files that roll over after RECORDING_SEGMENT_BYTES of entries; each starts
+    with a keyframe of every match before its first frame there, so any segment replays on its own.
+    """
+    def __init__(self, directory: str = RECORDING_DIR, segment_bytes: int = RECORDING_SEGMENT_BYTES, segments: int = RECORDING_SEGMENTS):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segments = segments
+        self.session: str | None = None
+        self.entries: int = 0
+        self._writer: SegmentWriter | None = None
+        self._segment_paths: List[str] = []
+        self._segment_index: int = 0
+        self._segment_size: int = 0
+        self._origin: float = 0.0
+        self._started_at: float = 0.0
+        self._keyframes: Dict[str, float] = {}
+        self._flusher: asyncio.Task | None = None
+
+    @property
+    def recording(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def session_dir(self) -> str | None:
+        return os.path.join(self.directory, self.session) if self.session else None
+
+    def start(self):
+        if self.recording: return
+        self.session = time.strftime("%Y%m%d-%H%M%S")
+        os.makedirs(self.session_dir, exist_ok=True)
+        self._origin, self._started_at = time.monotonic(), time.time()
+        self._segment_paths, self._segment_index, self.entries = [], 0, 0
+        self._writer = SegmentWriter()
+        self._writer.start()
+        self._open_segment()
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        match_registry.set_recorder(self.record_frame)
+        logger.info("Recording overlay traffic to %s", self.session_dir)
+
+    async def stop(self):
+        if not self.recording: return
+        match_registry.set_recorder(None)
+        if self._flusher: self._flusher.cancel(); self._flusher = None
+        writer, self._writer = self._writer, None
+        writer.close()
+        # Everything queued is on disk when this returns
+        await asyncio.get_running_loop().run_in_executor(None, writer.join)
+        logger.info("Recording stopped: %d entries in %s", self.entries, self.session_dir)
+
+    def _open_segment(self):
+        self._segment_index += 1
+        index = self._segment_index
+        path = os.path.join(self.session_dir, f"{index:04d}{SEGMENT_SUFFIX}")
+        self._writer.open_segment(path)
+        self._segment_paths.append(path)
+        self._segment_size = 0
+        self._keyframes.clear()
+        self._write(["segment", {"session": self.session, "index": index, "started": self._started_at}])
+        # Rolling: keep the newest segments only
+        while len(self._segment_paths) > self.segments: self._writer.remove(self._segment_paths.pop(0))
+
+    def _write(self, entry: List[Any], at: float | None = None):
+        t = (time.monotonic() if at is None else at) - self._origin
+        line = json.dumps([round(t, 4), *entry], separators=(",", ":")) + "\n"
+        self._writer.write(line)
+        self._segment_size += len(line)
+        self.entries += 1
+
+    def _rotate_if_full(self):
+        if self._segment_size < self.segment_bytes: return
+        self._open_segment()
+
+    async def _flush_periodically(self):
+        # Entries reach the disk within a second; a crash loses at most that much
+        while True:
+            await asyncio.sleep(RECORDING_FLUSH_INTERVAL)
+            if self._writer is not None: self._writer.flush()
+
+    def record_frame(self, match_id: str, keyframe: Callable[[], str], topic: str, frame: str, latest_key: str | None):
+        if not self.recording: return
+        self._rotate_if_full()
+        last = self._keyframes.get(match_id)
+        if last is None or time.monotonic() - last >= RECORDING_KEYFRAME_INTERVAL:
+            # Taken after the change this frame carries; replaying the frame on top of it is harmless
+            self._keyframes[match_id] = time.monotonic()
+            self._write(["keyframe", match_id, keyframe()])
+        self._write(["frame", match_id, topic, latest_key, frame])
+
+    def record_http(self, method: str, path: str, status: int, started: float, body: bytes):
+        """ Written once the response is sent, stamped with when the request arrived """
+        if not self.recording: return
+        self._rotate_if_full()
+        duration = round((time.monotonic() - started) * 1000, 1)
+        self._write(["http", method, path, status, duration, body[:RECORDING_MAX_BODY].decode("utf-8", "replace")], at=max(started, self._origin))
+
+    def record_command(self, match_id: str, message: Dict[str, Any]):
+        if not self.recording: return
+        self._rotate_if_full()
+        self._write(["command", match_id, message])
+
+    def get_stats(self):
+        return {
+            "recording": self.recording,
+            "session": self.session_dir,
+            "segments": [os.path.basename(path) for path in self._segment_paths],
+            "entries": self.entries,
+            "seconds": round(time.monotonic() - self._origin, 1) if self.recording else None,
+        }
+
+
+class RecordingMiddleware:
+    """ ASGI middleware recording REST mutations (anything but GET/HEAD/OPTIONS under /api/) """
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if (not self.recorder.recording or scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS")
+                or not scope["path"].startswith("/api/")):
+            return await self.app(scope, receive, send)
+        started = time.monotonic()
+        body = bytearray()
+        status = 500
+
+        async def receive_recorded():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) < RECORDING_MAX_BODY: body.extend(message.get("body", b""))
+            return message
+
+        async def send_recorded(message):
+            nonlocal status
+            if message["type"] == "http.response.start": status = message["status"]
+            await send(message)
+
+        try: await self.app(scope, receive_recorded, send_recorded)
+        finally: self.recorder.record_http(scope["method"], scope["path"], status, started, bytes(body))
+
+
+def read_recording(path: str):
+    """ Entries of a recorded session (its directory) or of one segment file, in order """
+    paths = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(SEGMENT_SUFFIX)) if os.path.isdir(path) else [path]
+    for segment in paths:
+        try:
+            with gzip.open(segment, mode="rt", encoding="utf-8") as f:
+                for line in f:
+                    try: yield json.loads(line)
+                    except ValueError: break  # Torn final line
+        except (EOFError, gzip.BadGzipFile) as e:
+            # The segment being written when the process died ends abruptly
+            logger.warning("Recording segment %s is truncated: %s", os.path.basename(segment), e)
+
+
+async def read_recording_async(path: str, batch: int = READ_BATCH):
+    """ read_recording for the event loop: segments are decompressed and parsed on the offload threads """
+    entries = read_recording(path)
+    try:
+        while True:
+            chunk = await offload("read_recording", lambda: list(itertools.islice(entries, batch)))
+            if not chunk: return
+            for entry in chunk: yield entry
+    finally:
+        entries.close()
+
+
+traffic_recorder = TrafficRecorder()
@@ -0,0 +1,68 @@
+import logging
+import os
+import time
+from typing import Any, Dict
+
+from data_manager import DataManager
+from websocket_manager import WebSocketManager
+from journal import MatchJournal
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_ENABLED = os.environ.get("SCOREBOARD_JOURNAL", "1") != "0"
+JOURNAL_SNAPSHOT_EVERY = int(os.environ.get("SCOREBOARD_JOURNAL_SNAPSHOT_EVERY", "200"))
+
+
+def _snapshot_state(data_manager: DataManager, websocket_manager: WebSocketManager) -> Dict[str, Any]:
+    # Read the clock first: get_config() settles timeOnField at this playing time
+    live = websocket_manager.get_live_state()
+    config = data_manager.get_config().model_dump()
+    return {"played": live["clock"]["played"], "config": config, "live": live}
+
+
+async def start_match_journal(match_journal: MatchJournal, data_manager: DataManager, websocket_manager: WebSocketManager):
+    """
+    Rebuild the live match state after a crash (latest snapshot + journal tail), then
+    start journaling. After a clean shutdown there is nothing to replay.
+    """
+    if not JOURNAL_ENABLED: return
+    match_journal.set_snapshot_source(lambda: _snapshot_state(data_manager, websocket_manager))
+    started = time.perf_counter()
+    snapshot, entries = match_journal.load()
+
+    if snapshot is not None or entries:
+        live_state, live_time = None, None
+        if snapshot is not None:
+            state = snapshot["state"]
+            data_manager.restore_config(state["config"], state["played"])
+            live_state, live_time = state["live"], snapshot["t"]
+        match_journal.replaying = True
+        try:
+            for entry in entries:
+                if entry["kind"] == "live":
+                    live_state, live_time = entry["data"], entry["t"]
+                    continue
+                try: await data_manager.replay_operation(entry["op"], entry["data"], entry["played"])
+                except Exception as e: logger.error("Skipping journal entry %s (%s): %s", entry["seq"], entry["op"], e)
+        finally:
+            match_journal.replaying = False
+        if live_state is not None:
+            # A clock that was running keeps counting through the downtime
+            websocket_manager.restore_live_state(live_state, elapsed=time.time() - live_time)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info("Recovered match state from journal (%d events replayed) in %.1f ms", len(entries), elapsed_ms)
+
+    data_manager.journal = match_journal
+    websocket_manager.journal = match_journal
+    match_journal.open()
+    # Compact immediately so the journal always has a snapshot to replay from
+    await match_journal.snapshot()
+
+
+async def stop_match_journal(match_journal: MatchJournal, data_manager: DataManager, websocket_manager: WebSocketManager, discard: bool = True):
+    """ Stop journaling. discard=False keeps a final snapshot so the live state (clock, overlays) can be restored later. """
+    if not JOURNAL_ENABLED: return
+    if not discard and match_journal.is_open(): await match_journal.snapshot()
+    data_manager.journal = None
+    websocket_manager.journal = None
+    await match_journal.close(discard=discard)
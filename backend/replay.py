@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from fastapi import WebSocket
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from connection_hub import ConnectionHub, TOPICS, combine_frames, encode_message
+from recorder import read_recording_async
+
+logger = logging.getLogger(__name__)
+
+# Serve a recording to /ws clients instead of live matches: a session directory or one segment file
+REPLAY_PATH = os.environ.get("SCOREBOARD_REPLAY", "")
+# 1 is real time, 4 four times as fast, "max" as fast as the clients take it
+REPLAY_SPEED = os.environ.get("SCOREBOARD_REPLAY_SPEED", "1")
+
+
+def parse_speed(speed: str | float) -> float:
+    """ "max" -> 0 (no waiting between frames), otherwise a positive multiplier """
+    if speed == "max": return 0.0
+    speed = float(speed)
+    if speed <= 0: raise ValueError("Replay speed must be positive, or \"max\".")
+    return speed
+
+
+class ReplayHub(ConnectionHub):
+    """ The viewers of one recorded match; their state is the latest keyframe plus the frames since """
+    def __init__(self, match_id: str):
+        super().__init__()
+        self.match_id = match_id
+        self._keyframe: Dict[str, Any] | None = None
+        self._since: List[Tuple[str, str]] = []
+        self._rewound: bool = True
+
+    def rewind(self):
+        self._keyframe, self._since, self._rewound = None, [], True
+        self._invalidate_snapshot()
+
+    def keyframe(self, frame: str):
+        self._keyframe, self._since = json.loads(frame), []
+        self._invalidate_snapshot()
+        # After a restart, viewers hold state from later in the match: start them over
+        if self._rewound:
+            self._rewound = False
+            for connection in list(self._active_connections.values()): self._resync(connection)
+
+    def play(self, topic: str, frame: str, latest_key: str | None):
+        self._since.append((topic, frame))
+        self._invalidate_snapshot()
+        self._fan_out(topic, frame, latest_key)
+
+    async def _load_snapshot_frame(self, topics: FrozenSet[str]) -> str:
+        snapshot = self._keyframe or {"type": "snapshot"}
+        if topics != TOPICS: snapshot = {key: value for key, value in snapshot.items() if key == "type" or key in topics}
+        # Frames already applied to the keyframe are harmless: their config versions are not newer
+        entries = [(encode_message(snapshot), None)] + [(frame, None) for topic, frame in self._since if topic in topics]
+        return combine_frames(entries)[0]
+
+    async def send_config_snapshot(self, websocket: WebSocket):
+        connection = self._active_connections.get(websocket)
+        if connection: self._enqueue(connection, await self.get_snapshot_frame(frozenset({"config"})))
+
+
+class MatchReplay:
+    """
+    Plays a recording back through one ReplayHub per recorded match, keeping the recorded
+    spacing of frames divided by `speed` (0 = no waiting). Recorded REST calls and commands
+    are not re-run; they are counted and logged at DEBUG level as the replay passes them.
+    """
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self.hubs: Dict[str, ReplayHub] = {}
+        self.position: float = 0.0
+        self.frames: int = 0
+        self.mutations: int = 0
+        self.finished: bool = False
+        self._task: asyncio.Task | None = None
+        self._started: float = 0.0
+        self._elapsed: float | None = None
+
+    async def start(self):
+        if not os.path.exists(self.path): raise FileNotFoundError(f"Recording not found: {self.path}")
+        self._task = asyncio.create_task(self._run(), name="replay")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+        self._task = None
+
+    async def restart(self, speed: float):
+        await self.stop()
+        self.speed = speed
+        await self.start()
+
+    def get_hub(self, match_id: str) -> ReplayHub:
+        hub = self.hubs.get(match_id)
+        if hub is None: hub = self.hubs[match_id] = ReplayHub(match_id)
+        return hub
+
+    async def dispatch(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": "error", "id": message.get("id"), "error": "Replaying a recording: commands are disabled."}
+
+    async def _run(self):
+        for hub in self.hubs.values(): hub.rewind()
+        self.position, self.frames, self.mutations, self.finished, self._elapsed = 0.0, 0, 0, False, None
+        self._started = time.monotonic()
+        first: float | None = None
+        logger.info("Replaying %s at %s", self.path, f"{self.speed:g}x" if self.speed else "max speed")
+        async for entry in read_recording_async(self.path):
+            t, kind = entry[0], entry[1]
+            if first is None: first = t
+            if self.speed:
+                delay = (t - first) / self.speed - (time.monotonic() - self._started)
+                if delay > 0: await asyncio.sleep(delay)
+            else:
+                # Let the clients' writers and the frame scheduler run between frames
+                await asyncio.sleep(0)
+            self.position = max(self.position, t - first)
+            if kind == "frame":
+                self.get_hub(entry[2]).play(entry[3], entry[5], entry[4])
+                self.frames += 1
+            elif kind == "keyframe":
+                self.get_hub(entry[2]).keyframe(entry[3])
+            elif kind in ("http", "command"):
+                self.mutations += 1
+                logger.debug("Replay %.1fs: %s", t - first, " ".join(str(part) for part in entry[1:5]))
+        self._elapsed = time.monotonic() - self._started
+        self.finished = True
+        logger.info("Replay finished: %d frames, %.1f recorded seconds in %.1f s", self.frames, self.position, self._elapsed)
+
+    def get_stats(self):
+        elapsed = self._elapsed if self._elapsed is not None else time.monotonic() - self._started
+        return {
+            "path": self.path,
+            "speed": self.speed or "max",
+            "position": round(self.position, 3),
+            "frames": self.frames,
+            "mutations": self.mutations,
+            "finished": self.finished,
+            "seconds": round(elapsed, 3),
+            "framesPerSecond": round(self.frames / elapsed, 1) if elapsed else None,
+            "connections": {match_id: hub.connection_count() for match_id, hub in self.hubs.items()},
+        }
+
+
+match_replay = MatchReplay(REPLAY_PATH, parse_speed(REPLAY_SPEED)) if REPLAY_PATH else None
@@ -0,0 +1,166 @@
+import base64
+import getpass
+import logging
+import os
+import tempfile
+from fastapi import Request, Response, WebSocket
+from fastapi.responses import JSONResponse
+from typing import Any, Callable, Dict, FrozenSet
+
+import commands
+from connection_hub import ConnectionHub, TOPICS, parse_topics
+from matches import match_registry
+from pubsub import PubSubClient, PubSubServer, UnixSocketBroker, UnixSocketBrokerClient
+
+logger = logging.getLogger(__name__)
+
+# standalone: one process does everything (default)
+# owner: holds match state and clocks, and publishes every frame to the workers
+# worker: serves WebSocket viewers from the owner's frames and forwards REST calls and commands to it
+SCALEOUT_ROLE = os.environ.get("SCOREBOARD_ROLE", "standalone")
+# The owner creates the socket's directory (mode 0700) if needed; by default a private one per user
+BROKER_PATH = os.environ.get("SCOREBOARD_BROKER_PATH", os.path.join(tempfile.gettempdir(), f"scoreboard-{getpass.getuser()}", "broker.sock"))
+
+
+# --- Owner ---
+class OwnerBridge:
+    def __init__(self, server: PubSubServer):
+        self.server = server
+        self._app: Callable | None = None
+
+    async def start(self, app: Callable):
+        self._app = app
+        await self.server.start(self.handle_request)
+        match_registry.set_publisher(self.server.publish)
+        match_registry.remote_viewers = self.server.subscriber_count
+
+    async def stop(self):
+        match_registry.set_publisher(None)
+        await self.server.stop()
+
+    async def handle_request(self, request: Dict[str, Any]) -> Any:
+        if request["kind"] == "http": return await self._call_app(request)
+        match = await match_registry.get(request["match"])
+        if match is None: raise LookupError("Match not found.")
+        if request["kind"] == "snapshot": return await match.websocket_manager.get_snapshot_frame(parse_topics(request.get("topics")))
+        if request["kind"] == "config": return match.websocket_manager.get_config_message()
+        if request["kind"] == "command": return await commands.dispatch(match, request["message"])
+        raise ValueError(f"Unknown request kind: {request['kind']}")
+
+    async def _call_app(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """ Run a forwarded REST call through this process's own ASGI app """
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+            "method": request["method"], "path": request["path"], "raw_path": request["path"].encode(),
+            "query_string": request["query"].encode(), "root_path": "", "client": None, "server": None, "state": {},
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in request["headers"]],
+        }
+        body = base64.b64decode(request["body"])
+        response: Dict[str, Any] = {"status": 500, "headers": [], "body": b""}
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The worker has the real client; here the request ends once its body is read
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await self._app(scope, receive, send)
+        # Bodies cross the broker as base64: requests and responses are not always UTF-8
+        return {**response, "body": base64.b64encode(response["body"]).decode("ascii")}
+
+
+# --- Worker ---
+class RelayHub(ConnectionHub):
+    """ The viewers of one match in a worker process; frames and snapshots come from the owner """
+    def __init__(self, link: "WorkerLink", match_id: str):
+        super().__init__()
+        self.link = link
+        self.match_id = match_id
+
+    async def _load_snapshot_frame(self, topics: FrozenSet[str]) -> str:
+        return await self.link.client.request({"kind": "snapshot", "match": self.match_id, "topics": sorted(topics)})
+
+    async def send_config_snapshot(self, websocket: WebSocket):
+        await self._send(websocket, await self.link.client.request({"kind": "config", "match": self.match_id}))
+
+    def relay(self, topic: str, frame: str, latest_key: str | None):
+        self._invalidate_snapshot()
+        self._fan_out(topic, frame, latest_key)
+
+    def resync_all(self):
+        self._invalidate_snapshot()
+        for connection in list(self._active_connections.values()): self._resync(connection)
+
+    def disconnect(self, websocket: WebSocket):
+        super().disconnect(websocket)
+        if not self.connection_count(): self.link.release(self)
+
+
+class WorkerLink:
+    def __init__(self, client: PubSubClient):
+        self.client = client
+        self._hubs: Dict[str, RelayHub] = {}
+
+    async def start(self):
+        await self.client.start(self._on_frame, self._on_connect)
+
+    async def stop(self):
+        await self.client.stop()
+
+    def _on_frame(self, match_id: str, topic: str, frame: str, latest_key: str | None):
+        hub = self._hubs.get(match_id)
+        if hub: hub.relay(topic, frame, latest_key)
+
+    def _on_connect(self):
+        # (Re)connected to the owner: frames may have been missed, so every viewer gets a fresh snapshot
+        for hub in self._hubs.values(): hub.resync_all()
+
+    async def get_hub(self, match_id: str) -> RelayHub | None:
+        hub = self._hubs.get(match_id)
+        if hub is not None: return hub
+        hub = self._hubs[match_id] = RelayHub(self, match_id)
+        # Subscribe before the first snapshot so no frame falls between them
+        self.client.subscribe(match_id)
+        try:
+            await hub.get_snapshot_frame(TOPICS)
+        except Exception as e:
+            logger.warning("Cannot serve match '%s': %s", match_id, e)
+            self.release(hub)
+            return None
+        return hub
+
+    def release(self, hub: RelayHub):
+        if self._hubs.get(hub.match_id) is hub and not hub.connection_count():
+            del self._hubs[hub.match_id]
+            self.client.unsubscribe(hub.match_id)
+
+    async def dispatch(self, match_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        try: return await self.client.request({"kind": "command", "match": match_id, "message": message})
+        except Exception as e: return {"type": "error", "id": message.get("id"), "error": str(e)}
+
+    async def forward_http(self, request: Request) -> Response:
+        try:
+            reply = await self.client.request({
+                "kind": "http", "method": request.method, "path": request.url.path, "query": request.url.query,
+                # This process compresses the reply
+                "headers": [(name, value) for name, value in request.headers.items() if name.lower() not in ("host", "accept-encoding")],
+                "body": base64.b64encode(await request.body()).decode("ascii"),
+            })
+        except Exception as e:
+            return JSONResponse({"detail": f"Owner process unavailable: {e}"}, status_code=503)
+        headers = {name: value for name, value in reply["headers"] if name.lower() != "content-length"}
+        return Response(content=base64.b64decode(reply["body"]), status_code=reply["status"], headers=headers)
+
+
+owner_bridge = OwnerBridge(UnixSocketBroker(BROKER_PATH)) if SCALEOUT_ROLE == "owner" else None
+worker_link = WorkerLink(UnixSocketBrokerClient(BROKER_PATH)) if SCALEOUT_ROLE == "worker" else None
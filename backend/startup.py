@@ -0,0 +1,57 @@
+import logging
+import time
+from typing import Awaitable, Dict, TypeVar
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STARTUP_PHASE_SECONDS = registry.gauge("scoreboard_startup_phase_seconds", "Duration of each start-up phase", ("phase",))
+STARTUP_SECONDS = registry.gauge("scoreboard_startup_seconds", "Seconds from backend import to ready and to the first WebSocket accept", ("milestone",))
+
+
+class StartupTimer:
+    """
+    Where start-up time goes, from the moment the backend modules are imported until the first
+    overlay connects. Phases may overlap (the data files load concurrently).
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.milestones: Dict[str, float] = {}
+
+    def _mark(self, milestone: str):
+        if milestone in self.milestones: return
+        self.milestones[milestone] = time.perf_counter() - self.started
+        STARTUP_SECONDS.labels(milestone).set(self.milestones[milestone])
+
+    async def measure(self, phase: str, awaitable: Awaitable[T]) -> T:
+        started = time.perf_counter()
+        try: return await awaitable
+        finally:
+            self.phases[phase] = time.perf_counter() - started
+            STARTUP_PHASE_SECONDS.labels(phase).set(self.phases[phase])
+
+    def lifespan_started(self): self._mark("imported")
+
+    def ready(self):
+        self._mark("ready")
+        breakdown = ", ".join(f"{phase} {seconds * 1000:.1f}" for phase, seconds in self.phases.items())
+        logger.info("Ready %.1f ms after import (imports %.1f ms; %s ms)",
+                    self.milestones["ready"] * 1000, self.milestones.get("imported", 0.0) * 1000, breakdown)
+
+    def websocket_accepted(self):
+        if "firstWebSocket" in self.milestones: return
+        self._mark("firstWebSocket")
+        logger.info("First WebSocket client accepted %.1f ms after import", self.milestones["firstWebSocket"] * 1000)
+
+    def get_stats(self):
+        return {
+            "milestonesMs": {name: round(seconds * 1000, 1) for name, seconds in self.milestones.items()},
+            "phasesMs": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+        }
+
+
+startup_timer = StartupTimer()
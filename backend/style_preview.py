@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Overlays see at most this many preview frames per second while a slider is being dragged
+STYLE_PREVIEW_RATE = 15.0
+
+
+class StylePreview:
+    """
+    Live style and layout tweaks. Each change is applied to the in-memory style by the caller;
+    this broadcasts the current style at most once per `interval` (the latest value wins) and
+    persists it once, on commit (the control panel's save buttons, or the match shutting down).
+    """
+    def __init__(self, broadcast: Callable[[], Awaitable[None]], persist: Callable[[], Awaitable[bool]],
+                 interval: float = 1.0 / STYLE_PREVIEW_RATE):
+        self._broadcast = broadcast
+        # Saves the style if a preview left it unsaved; returns whether it wrote
+        self._persist = persist
+        self.interval = interval
+        self._last_broadcast: float = 0.0
+        self._broadcast_task: asyncio.Task | None = None
+        self.pending: bool = False
+        self.updates: int = 0
+        self.broadcasts: int = 0
+        self.commits: int = 0
+
+    def changed(self):
+        self.updates += 1
+        self.pending = True
+        # The first change goes out at once; later ones within the window are folded into one frame
+        if self._broadcast_task is None or self._broadcast_task.done():
+            self._broadcast_task = asyncio.create_task(self._broadcast_throttled())
+
+    async def _broadcast_throttled(self):
+        delay = self._last_broadcast + self.interval - time.monotonic()
+        if delay > 0: await asyncio.sleep(delay)
+        self._last_broadcast = time.monotonic()
+        self.broadcasts += 1
+        await self._broadcast()
+
+    async def commit(self):
+        """ Persist the previewed style now and send overlays its final value """
+        if self._broadcast_task: self._broadcast_task.cancel()
+        self._broadcast_task = None
+        self.pending = False
+        if not await self._persist(): return
+        self.commits += 1
+        self._last_broadcast = time.monotonic()
+        await self._broadcast()
+
+    def get_stats(self):
+        return {"updates": self.updates, "broadcasts": self.broadcasts, "commits": self.commits,
+                "pending": self.pending}
@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# data_manager resolves its data files against the working directory when it is imported:
+# run the tests in a scratch copy so real match data is never touched
+_workdir = tempfile.mkdtemp(prefix="scoreboard-tests-")
+for name in os.listdir(BACKEND_DIR):
+    if name.endswith(".json"): shutil.copy(os.path.join(BACKEND_DIR, name), _workdir)
+sys.path.insert(0, BACKEND_DIR)
+# Each broadcast is sent on its own unless a test turns the frame scheduler on
+os.environ.setdefault("SCOREBOARD_FRAME_RATE", "0")
+# main sets up logging to the captured stdout on import: keep every line, and nothing to report at exit
+os.environ.setdefault("SCOREBOARD_LOG_RATE_LIMIT", "0")
+_cwd = os.getcwd()
+os.chdir(_workdir)
+try:
+    import data_manager, matches, recorder  # noqa: E401,F401 - they fix their file paths on import
+finally:
+    os.chdir(_cwd)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def config_paths(tmp_path):
+    """ Team config and style file paths for a fresh DataManager, starting from the bundled files """
+    config_path, style_path = tmp_path / "team-info-config.json", tmp_path / "scoreboard-customization.json"
+    shutil.copy(os.path.join(BACKEND_DIR, "team-info-config.json"), config_path)
+    shutil.copy(os.path.join(BACKEND_DIR, "scoreboard-customization.json"), style_path)
+    return str(config_path), str(style_path)
+
+
+@pytest.fixture
+async def data(config_paths):
+    """ A DataManager on the scratch config files, loaded """
+    from data_manager import DataManager
+    manager = DataManager(*config_paths)
+    await manager.load_config()
+    await manager.load_scoreboard_style()
+    return manager
+
+
+class FakeWebSocket:
+    """ Records what the server sends; enough of starlette's WebSocket for the managers """
+    def __init__(self):
+        self.sent = []
+        self.close_code: int | None = None
+
+    async def accept(self): pass
+
+    async def send_json(self, message): self.sent.append(message)
+
+    async def send_text(self, text): self.sent.append(json.loads(text))
+
+    async def close(self, code: int = 1000): self.close_code = code
+
+    def of_type(self, message_type: str):
+        return [m for m in self.sent if m["type"] == message_type]
+
+
+@pytest.fixture
+def make_socket():
+    return FakeWebSocket
+
+
+@pytest.fixture
+def make_match(tmp_path, config_paths):
+    """ Factory for a match on the scratch config files, journaled in tmp_path, with its own clock source """
+    from clock_source import VirtualClock
+    from data_manager import DataManager
+    from journal import MatchJournal
+    from matches import Match
+    from websocket_manager import WebSocketManager
+
+    async def make(clock=None, match_id: str = "test") -> Match:
+        data = DataManager(*config_paths)
+        match = Match(match_id, data, WebSocketManager(data, clock=clock or VirtualClock()),
+                      MatchJournal(str(tmp_path / "match-journal.jsonl"), str(tmp_path / "match-snapshot.json")))
+        await data.load_config()
+        await data.load_scoreboard_style()
+        await match.start()
+        return match
+    return make
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_workdir, ignore_errors=True)
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from data_manager import BatchError, BatchOperation
+from journal import MatchJournal
+
+pytestmark = pytest.mark.anyio
+
+
+def operations(*pairs):
+    return [BatchOperation(op=op, data=data) for op, data in pairs]
+
+
+@pytest.fixture
+def journal(data, tmp_path):
+    journal = MatchJournal(str(tmp_path / "journal.jsonl"), str(tmp_path / "snapshot.json"))
+    journal.open()
+    data.journal = journal
+    yield journal
+    journal._file.close()
+
+
+def journal_entries(journal):
+    with open(journal.journal_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+async def test_batch_applies_all_operations(data):
+    results = await data.apply_batch(operations(
+        ("toggle_on_field", {"team": "teamA", "number": 1}),
+        ("set_score", {"team": "teamA", "score": 2}),
+    ))
+    assert [r["ok"] for r in results] == [True, True]
+    assert data.get_config().teamA.score == 2 and data._find_player("teamA", 1).onField
+
+
+async def test_failed_batch_rolls_back_everything(data, journal):
+    before = data.get_config().model_dump()
+    with pytest.raises(BatchError) as error:
+        await data.apply_batch(operations(
+            ("set_score", {"team": "teamA", "score": 5}),
+            ("add_player", {"team": "teamA", "number": 99, "name": "New"}),
+            # Fails inside the method: number 99 exists by now
+            ("add_player", {"team": "teamA", "number": 99, "name": "Again"}),
+            ("set_score", {"team": "teamB", "score": 1}),
+        ))
+    assert [r["error"] for r in error.value.results][::3] == ["rolled back", "skipped"]
+    assert data.get_config().model_dump() == before
+    assert data._find_player("teamA", 99) is None
+    assert journal_entries(journal) == []
+
+
+@pytest.mark.parametrize("op, payload", [("set_score", {"team": "teamC"}), ("drop_tables", {})])
+async def test_invalid_batch_is_rejected_before_anything_runs(data, op, payload):
+    with pytest.raises(BatchError) as error:
+        await data.apply_batch(operations(("set_score", {"team": "teamA", "score": 5}), (op, payload)))
+    assert "#1" in str(error.value) and error.value.results == []
+    assert data.get_config().teamA.score == 0
+
+
+async def test_batch_journals_the_validated_operations(data, journal):
+    await data.apply_batch(operations(
+        ("set_score", {"team": "teamA", "score": "3", "ignored": True}),
+        ("toggle_on_field", {"team": "teamA", "number": 1}),
+    ))
+    assert [(e["op"], e["data"]) for e in journal_entries(journal)] == [
+        ("set_score", {"team": "teamA", "score": 3}),
+        ("toggle_on_field", {"team": "teamA", "number": 1}),
+    ]
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from benchmark import OverlayClient, delivered, match_arrivals, percentiles, tick_jitter, wait_for_delivery
+
+pytestmark = pytest.mark.anyio
+
+
+def overlay(ticks=(), config=(), snapshots=1):
+    client = OverlayClient("ws://unused")
+    client.ticks, client.arrivals["config"], client.snapshots = list(ticks), list(config), snapshots
+    return client
+
+
+def test_percentiles():
+    assert percentiles([]) == {"samples": 0}
+    stats = percentiles([float(v) for v in range(100, 0, -1)])
+    assert stats["samples"] == 100 and stats["mean"] == 50.5
+    assert (stats["p50"], stats["p90"], stats["p99"], stats["max"]) == (51.0, 91.0, 100.0, 100.0)
+
+
+def test_every_config_mutation_is_matched_with_its_own_frame():
+    sent, arrivals = [1.0, 2.0, 3.0], [1.01, 2.02]
+    assert not delivered(arrivals, sent, "config")
+    arrivals.append(3.005)
+    assert delivered(arrivals, sent, "config")
+    assert [round(ms, 3) for ms in match_arrivals(sent, arrivals, "config")] == [10.0, 20.0, 5.0]
+
+
+def test_folded_style_updates_are_matched_with_the_next_frame():
+    # Three updates sent in one frame interval arrive as one frame
+    sent, arrivals = [1.0, 1.01, 1.02], [1.04]
+    assert delivered(arrivals, sent, "style")
+    assert [round(ms, 3) for ms in match_arrivals(sent, arrivals, "style")] == [40.0, 30.0, 20.0]
+    assert not delivered([1.005], sent, "style")
+
+
+def test_tick_jitter_is_the_distance_from_a_one_second_period():
+    stats = tick_jitter([overlay(ticks=[10.0, 11.0, 12.02]), overlay(ticks=[5.0, 5.99])])
+    assert stats["samples"] == 3 and stats["max"] == 20.0
+    # A single tick has no spacing to measure
+    assert tick_jitter([overlay(ticks=[1.0])]) == {"samples": 0}
+
+
+def test_a_resynced_overlay_is_out_of_sync():
+    assert overlay().in_sync and not overlay(snapshots=2).in_sync
+
+
+async def test_delivery_wait_ignores_overlays_that_fell_out_of_sync():
+    sent = {"config": [1.0, 2.0]}
+    # The resynced overlay never receives the dropped frame; waiting for it would time out
+    clients = [overlay(config=[1.1, 2.1]), overlay(config=[1.1], snapshots=2)]
+    started = time.perf_counter()
+    await wait_for_delivery(clients, sent, timeout=5)
+    assert time.perf_counter() - started < 1
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+import websocket_manager
+from data_manager import SetScoreUpdate, TeamInfoUpdate
+from websocket_manager import WebSocketManager, encode_message
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self): pass
+
+    async def send_text(self, frame: str):
+        self.frames.append(frame)
+
+
+@pytest.fixture
+def manager(data):
+    return WebSocketManager(data)
+
+
+async def test_a_broadcast_is_encoded_once_for_every_client(data, manager, monkeypatch):
+    await manager.broadcast_config(data.get_config())
+    sockets = [RecordingSocket() for _ in range(5)]
+    for socket in sockets: await manager.connect(socket)
+    await asyncio.sleep(0)
+    for socket in sockets: socket.frames.clear()
+
+    encoded = []
+    encode = websocket_manager.encode_message
+    monkeypatch.setattr(websocket_manager, "encode_message", lambda message: encoded.append(message["type"]) or encode(message))
+    await data.set_score(SetScoreUpdate(team="teamB", score=1))
+    await manager.broadcast_config(data.get_config())
+    await asyncio.sleep(0)
+
+    assert encoded == ["config_patch"]
+    frames = {socket.frames[0] for socket in sockets}
+    assert len(frames) == 1 and json.loads(frames.pop())["type"] == "config_patch"
+    # The very same string object reaches every client
+    assert len({id(socket.frames[0]) for socket in sockets}) == 1
+
+
+async def test_nothing_is_encoded_without_listeners(manager, monkeypatch):
+    encoded = []
+    monkeypatch.setattr(websocket_manager, "encode_message", lambda message: encoded.append(message) or "{}")
+    await manager.broadcast_time()
+    assert encoded == []
+
+
+async def test_frames_are_compact_and_keep_non_ascii_text(data, manager):
+    await manager.broadcast_config(data.get_config())
+    socket = RecordingSocket()
+    await manager.connect(socket)
+    await data.update_team_info(TeamInfoUpdate(teamA={"name": "Bayern München"}, teamB={}))
+    await manager.broadcast_config(data.get_config())
+    await asyncio.sleep(0)
+    frame = socket.frames[-1]
+    assert ": " not in frame and ", " not in frame
+    assert json.loads(frame)["ops"] == [{"op": "replace", "path": "/teamA/name", "value": "Bayern München"}]
+
+
+def test_encoding_matches_json():
+    message = {"type": "time", "seconds": 61, "nested": {"list": [1, 2.5, None, True], "text": "Ünïcödé"}}
+    assert json.loads(encode_message(message)) == message
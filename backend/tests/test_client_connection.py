@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from client_connection import ClientConnection
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowSocket:
+    """ A WebSocket whose every send takes `delay` seconds """
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent = []
+
+    async def send_text(self, frame: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(frame)
+
+
+class BrokenSocket:
+    async def send_text(self, frame: str):
+        raise ConnectionResetError("gone")
+
+
+def connection(socket, on_evict=lambda c: None, on_recover=lambda c: None, **kwargs) -> ClientConnection:
+    client = ClientConnection(socket, on_evict=on_evict, on_recover=on_recover, **kwargs)
+    client.start()
+    return client
+
+
+async def test_latest_wins_frames_are_not_starved_by_the_queue():
+    socket = SlowSocket(0.01)
+    client = connection(socket)
+    for i in range(5): client.enqueue(f"event {i}")
+    client.enqueue("tick 1", latest_key="time")
+    client.enqueue("tick 2", latest_key="time")
+    await asyncio.sleep(0.1)
+    client.close()
+    # The pending tick goes out after one queued frame, not after the whole backlog; tick 1 was superseded
+    assert socket.sent == ["event 0", "tick 2", "event 1", "event 2", "event 3", "event 4"]
+    assert client.superseded == 1
+
+
+async def test_ticks_reach_a_client_whose_queue_never_empties():
+    socket = SlowSocket(0.005)
+    client = connection(socket, max_queue=1000)
+    for second in range(40):
+        for i in range(3): client.enqueue(f"event {second}.{i}")
+        client.enqueue(f"tick {second}", latest_key="time")
+        await asyncio.sleep(0.005)
+    client.close()
+    ticks = [frame for frame in socket.sent if frame.startswith("tick")]
+    assert len(ticks) >= 10
+    assert len(socket.sent) - len(ticks) > 0
+
+
+async def test_a_stuck_client_receiving_only_ticks_is_evicted():
+    # The first send never completes
+    socket = SlowSocket(3600)
+    client = connection(socket, stall_timeout=0.05)
+    assert client.enqueue("tick 1", latest_key="time")
+    await asyncio.sleep(0)
+    assert client.enqueue("tick 2", latest_key="time")
+    # Superseding an unsent tick starts the stall timer
+    assert client.enqueue("tick 3", latest_key="time") and client.get_stats()["stalled"]
+    await asyncio.sleep(0.1)
+    assert not client.enqueue("tick 4", latest_key="time")
+    client.close()
+
+
+async def test_a_slow_but_moving_client_is_not_evicted():
+    socket = SlowSocket(0.02)
+    client = connection(socket, stall_timeout=0.1)
+    for second in range(15):
+        assert client.enqueue(f"tick {second}", latest_key="time")
+        await asyncio.sleep(0.01)
+    client.close()
+    assert socket.sent and client.superseded > 0
+
+
+async def test_overflow_drops_frames_and_resyncs_once_caught_up():
+    socket = SlowSocket(0.001)
+    recovered = []
+    client = connection(socket, on_recover=recovered.append, max_queue=3)
+    for i in range(6): assert client.enqueue(f"event {i}")
+    assert client.dropped == 3 and client.get_stats()["stalled"]
+    await asyncio.sleep(0.05)
+    client.close()
+    # What fitted went out in order; the client then gets a full resync instead of the rest
+    assert socket.sent == ["event 0", "event 1", "event 2"]
+    assert recovered == [client]
+
+
+async def test_a_failed_send_evicts_the_client():
+    evicted = []
+    client = connection(BrokenSocket(), on_evict=evicted.append)
+    client.enqueue("event")
+    await asyncio.sleep(0)
+    assert evicted == [client]
+
+
+async def test_a_closed_client_accepts_nothing():
+    client = connection(SlowSocket(0))
+    client.close()
+    assert not client.enqueue("event")
+    assert not client.enqueue("tick", latest_key="time")
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+import main
+from clock_source import RealClock, ScaledClock, VirtualClock, make_clock_source
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_status_carries_the_exact_value_to_interpolate_from(make_match):
+    clock = VirtualClock()
+    manager = (await make_match(clock)).websocket_manager
+    manager.start()
+    await clock.advance(12.25)
+    assert manager.get_status() == {"isRunning": True, "seconds": 12, "exact": 12.25}
+    manager.stop()
+    assert manager.get_status()["exact"] == 12.25
+
+
+async def test_advance_wakes_sleepers_in_deadline_order():
+    clock = VirtualClock(start=100.0)
+    woken = []
+
+    async def sleeper(deadline):
+        await clock.sleep_until(deadline)
+        woken.append((deadline, clock.now()))
+
+    tasks = [asyncio.create_task(sleeper(100.0 + d)) for d in (3, 1, 5, 2)]
+    await asyncio.sleep(0)
+    assert clock.get_stats()["sleepers"] == 4
+    await clock.advance(3)
+    # Each sleeper runs with the clock at its own deadline; later ones keep sleeping
+    assert woken == [(101.0, 101.0), (102.0, 102.0), (103.0, 103.0)]
+    assert clock.now() == 103.0 and clock.get_stats()["sleepers"] == 1
+    await clock.advance(10)
+    assert woken[-1] == (105.0, 105.0) and clock.now() == 113.0
+    await asyncio.gather(*tasks)
+
+
+async def test_advance_wakes_a_sleeper_again_within_the_interval():
+    clock = VirtualClock()
+    ticks = []
+
+    async def ticker():
+        while True:
+            await clock.sleep_until(clock.now() + 1)
+            ticks.append(clock.now())
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await clock.advance(5.5)
+    assert ticks == [1.0, 2.0, 3.0, 4.0, 5.0] and clock.now() == 5.5
+    task.cancel()
+    # A cancelled sleeper is skipped
+    await clock.advance(2)
+    assert ticks == [1.0, 2.0, 3.0, 4.0, 5.0] and clock.get_stats()["sleepers"] == 0
+
+
+async def test_advance_never_moves_time_backwards():
+    clock = VirtualClock(start=10.0)
+    await clock.advance(-5)
+    assert clock.now() == 10.0
+    # A deadline already passed returns at once
+    await asyncio.wait_for(clock.sleep_until(9.0), timeout=1)
+
+
+async def test_a_whole_half_runs_in_one_advance(make_match):
+    clock = VirtualClock()
+    manager = (await make_match(clock)).websocket_manager
+    sent = []
+    manager.recorder = lambda topic, frame, latest_key: sent.append(json.loads(frame))
+    manager.start()
+    # Let the timer task reach its first sleep
+    await asyncio.sleep(0)
+    await clock.advance(45 * 60)
+    manager.stop()
+    times = [m["seconds"] for m in sent if m["type"] == "time"]
+    assert times == list(range(1, 45 * 60 + 1))
+    assert manager._clock.get_stats()["maxLatenessMs"] == 0
+
+
+async def test_scaled_clock_runs_faster_than_real_time():
+    clock = ScaledClock(1000)
+    start = clock.now()
+    await asyncio.wait_for(clock.sleep_until(start + 20), timeout=1)
+    assert clock.now() >= start + 20
+    assert clock.get_stats()["rate"] == 1000
+
+
+def test_make_clock_source():
+    assert isinstance(make_clock_source("real"), RealClock)
+    assert isinstance(make_clock_source("virtual"), VirtualClock)
+    assert make_clock_source("60").rate == 60
+    for setting in ("fast", "0", "-2"):
+        with pytest.raises(ValueError):
+            make_clock_source(setting)
+
+
+async def test_only_a_virtual_clock_can_be_advanced(monkeypatch):
+    monkeypatch.setattr(main, "clock_source", RealClock())
+    with pytest.raises(HTTPException) as error:
+        await main.advance_clock(main.ClockAdvance(seconds=5))
+    assert error.value.status_code == 409
+    monkeypatch.setattr(main, "clock_source", VirtualClock(start=10.0))
+    assert (await main.advance_clock(main.ClockAdvance(seconds=5)))["now"] == 15.0
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import commands
+
+pytestmark = pytest.mark.anyio
+
+
+def command(name, data=None, request_id=1):
+    return {"type": "command", "id": request_id, "command": name, "data": data}
+
+
+@pytest.fixture
+async def match(make_match):
+    return await make_match()
+
+
+async def test_ack_carries_the_id_but_not_the_config(match):
+    reply = await commands.dispatch(match, command("score_set", {"team": "teamA", "score": 2}, request_id=7))
+    # The config itself reaches the client through the broadcast
+    assert reply == {"type": "ack", "id": 7, "result": None}
+    assert match.data_manager.get_config().teamA.score == 2
+    reply = await commands.dispatch(match, command("timer_set", {"seconds": 90}))
+    assert reply == {"type": "ack", "id": 1, "result": {"message": "Timer set to 90 seconds"}}
+    assert match.websocket_manager.get_status()["seconds"] == 90
+
+
+async def test_failures_reply_with_an_error(match):
+    assert (await commands.dispatch(match, command("no_such_command")))["error"] == "Unknown command: no_such_command"
+    reply = await commands.dispatch(match, command("score_set", {"team": "teamC"}, request_id=3))
+    assert reply["type"] == "error" and reply["id"] == 3 and reply["error"].startswith("Invalid data")
+    reply = await commands.dispatch(match, command("player_add", {"team": "teamA", "number": 1, "name": "Twin"}))
+    assert reply["type"] == "error" and "already exists" in reply["error"]
+
+
+async def test_a_failed_batch_reports_every_operation(match):
+    reply = await commands.dispatch(match, command("batch", {"operations": [
+        {"op": "set_score", "data": {"team": "teamA", "score": 5}},
+        {"op": "add_player", "data": {"team": "teamA", "number": 1, "name": "Twin"}},
+    ]}))
+    assert reply["type"] == "error"
+    assert [r["ok"] for r in reply["results"]] == [False, False]
+    assert match.data_manager.get_config().teamA.score == 0
+
+
+async def test_the_ack_arrives_after_the_broadcast_it_caused(match, make_socket):
+    manager, socket = match.websocket_manager, make_socket()
+    await manager.connect(socket)
+    reply = await commands.dispatch(match, command("scoreboard_toggle", request_id=4))
+    await manager.send(socket, reply)
+    await asyncio.sleep(0.01)
+    types = [m["type"] for m in socket.sent]
+    assert types.index("ack") > types.index("scoreboard_visibility")
@@ -0,0 +1,122 @@
+import asyncio
+import copy
+import json
+
+import pytest
+
+from config_patch import diff_config
+from data_manager import AddPlayerUpdate, DeletePlayerUpdate, SetScoreUpdate, ToggleOnFieldUpdate
+from websocket_manager import WebSocketManager
+
+pytestmark = pytest.mark.anyio
+
+
+def apply_op(config: dict, op: dict):
+    # Mirrors applyConfigOp in frontend/control_panel/stateManager.ts
+    segments = op["path"].split("/")[1:]
+    if segments[0] in ("teamA", "teamB") and segments[1] == "players" and len(segments) >= 3:
+        players = config[segments[0]]["players"]
+        number = int(segments[2])
+        index = next((i for i, p in enumerate(players) if p["number"] == number), -1)
+        if len(segments) == 3:
+            if index != -1: players.pop(index)
+            if op["op"] != "remove":
+                players.append(op["value"])
+                players.sort(key=lambda p: p["number"])
+        elif index != -1:
+            players[index][segments[3]] = op["value"]
+        return
+    target = config
+    for key in segments[:-1]: target = target[key]
+    target[segments[-1]] = op["value"]
+
+
+def patched(config: dict, ops: list) -> dict:
+    result = copy.deepcopy(config)
+    for op in ops: apply_op(result, op)
+    return result
+
+
+@pytest.fixture
+def config(config_paths):
+    with open(config_paths[0], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_identical_configs_have_no_ops(config):
+    assert diff_config(config, copy.deepcopy(config)) == []
+
+
+@pytest.mark.parametrize("change", [
+    lambda c: c["teamA"].update(score=3),
+    lambda c: c["teamB"].update(name="Renamed", abbreviation="REN"),
+    lambda c: c["teamA"]["colors"].update(primary="#123456"),
+    lambda c: c.update(currentPeriod="2nd Half"),
+    lambda c: c["teamA"]["players"][0].update(onField=True, timeOnField=125),
+    lambda c: c["teamB"]["players"][1]["goals"].append({"regMinute": 12, "addMinute": 0, "isOwnGoal": False, "isPenalty": False}),
+    lambda c: c["teamA"]["players"].pop(3),
+    lambda c: c["teamA"]["players"].append({"number": 99, "name": "New", "onField": False, "timeOnField": 0, "yellowCards": [], "redCards": [], "goals": []}),
+    lambda c: c["teamB"].update(players=[]),
+], ids=["score", "name", "colors", "period", "player-field", "goal", "remove-player", "add-player", "clear-players"])
+def test_patch_round_trip(config, change):
+    new = copy.deepcopy(config)
+    change(new)
+    ops = diff_config(config, new)
+    assert ops
+    assert patched(config, ops) == new
+    # Absolute values: applying the patch again changes nothing
+    assert patched(patched(config, ops), ops) == new
+
+
+def test_renumbered_player_is_a_remove_and_an_add(config):
+    new = copy.deepcopy(config)
+    new["teamA"]["players"][0]["number"] = 77
+    new["teamA"]["players"].sort(key=lambda p: p["number"])
+    ops = diff_config(config, new)
+    assert sorted(op["op"] for op in ops) == ["add", "remove"]
+    assert patched(config, ops) == new
+
+
+@pytest.fixture
+def manager(data):
+    return WebSocketManager(data)
+
+
+async def test_broadcast_patches_chain_versions(data, manager, make_socket):
+    socket = make_socket()
+    await manager.connect(socket)
+    snapshot = manager.get_config_message()
+    await manager.broadcast_config(data.get_config())
+
+    await data.set_score(SetScoreUpdate(team="teamA", score=2))
+    await manager.broadcast_config(data.get_config())
+    await data.add_player(AddPlayerUpdate(team="teamB", number=99, name="New"))
+    await data.delete_player(DeletePlayerUpdate(team="teamA", number=1))
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=2))
+    await manager.broadcast_config(data.get_config())
+    # Each client's writer task sends what was queued for it
+    await asyncio.sleep(0.01)
+
+    patches = socket.of_type("config_patch")
+    assert len(patches) == 2
+    config, version = snapshot["config"], snapshot["version"]
+    for message in socket.of_type("config"):
+        config, version = message["config"], message["version"]
+    for message in patches:
+        assert message["baseVersion"] == version
+        config, version = patched(config, message["ops"]), message["version"]
+    assert config == data.get_config().model_dump()
+    assert manager.get_config_message()["version"] == version
+
+
+async def test_unchanged_config_is_not_broadcast(data, manager, make_socket):
+    socket = make_socket()
+    await manager.connect(socket)
+    await manager.broadcast_config(data.get_config())
+    version = manager.get_config_message()["version"]
+    await asyncio.sleep(0.01)
+    sent = len(socket.sent)
+    await manager.broadcast_config(data.get_config())
+    await asyncio.sleep(0.01)
+    assert len(socket.sent) == sent
+    assert manager.get_config_message()["version"] == version
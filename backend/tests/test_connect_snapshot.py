@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+import connection_hub
+from connection_hub import TOPICS
+from data_manager import SetScoreUpdate
+from websocket_manager import WebSocketManager
+
+pytestmark = pytest.mark.anyio
+
+
+class GatedSocket:
+    """ Holds every send until the test opens the gate """
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+
+    async def accept(self): pass
+
+    async def send_text(self, frame: str):
+        await self.gate.wait()
+        self.sent.append(json.loads(frame))
+
+
+@pytest.fixture
+def manager(data):
+    return WebSocketManager(data)
+
+
+async def test_a_new_client_gets_one_snapshot_message(manager, data, make_socket):
+    socket = make_socket()
+    await manager.connect(socket)
+    await asyncio.sleep(0.01)
+    assert len(socket.sent) == 1
+    snapshot = socket.sent[0]
+    assert snapshot["type"] == "snapshot" and set(snapshot) - {"type"} == TOPICS
+    assert snapshot["clock"] == manager.get_status()
+    config = manager.get_config_message()
+    assert snapshot["config"] == {"version": config["version"], "config": config["config"]}
+    assert snapshot["style"] == data.get_scoreboard_style().model_dump()
+    assert snapshot["var"] == manager.get_var_status()
+
+
+async def test_connecting_does_not_notify_other_clients(manager, make_socket):
+    first, second = make_socket(), make_socket()
+    await manager.connect(first)
+    await manager.connect(second)
+    await asyncio.sleep(0.01)
+    assert [m["type"] for m in first.sent] == ["snapshot"]
+
+
+async def test_snapshot_is_shared_until_the_state_changes(manager, data):
+    first = await manager.get_snapshot_frame()
+    assert await manager.get_snapshot_frame() is first
+    await data.set_score(SetScoreUpdate(team="teamA", score=3))
+    await manager.broadcast_config(data.get_config())
+    fresh = await manager.get_snapshot_frame()
+    assert fresh is not first and json.loads(fresh)["config"]["config"]["teamA"]["score"] == 3
+
+
+async def test_restoring_live_state_invalidates_the_snapshot(manager):
+    first = await manager.get_snapshot_frame()
+    manager.restore_live_state({**manager.get_live_state(), "extraTimeMinutes": 4})
+    assert json.loads(await manager.get_snapshot_frame())["extraTime"]["minutes"] == 4
+    assert await manager.get_snapshot_frame() is not first
+
+
+async def test_a_client_that_dropped_frames_is_resynced_with_the_snapshot(manager, monkeypatch):
+    monkeypatch.setattr(connection_hub, "CLIENT_QUEUE_SIZE", 2)
+    socket = GatedSocket()
+    await manager.connect(socket)
+    for _ in range(4):
+        await manager.broadcast_status()
+    socket.gate.set()
+    await asyncio.sleep(0.01)
+    types = [m["type"] for m in socket.sent]
+    assert types[0] == "snapshot" and types[-1] == "snapshot"
+    assert manager.get_connection_stats()[0]["dropped"] > 0
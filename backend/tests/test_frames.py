@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from connection_hub import ConnectionHub, combine_frames, encode_message, parse_topics
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self): pass
+
+    async def send_text(self, frame: str):
+        self.sent.append(json.loads(frame))
+
+
+class Hub(ConnectionHub):
+    async def _load_snapshot_frame(self, topics):
+        return encode_message({"type": "snapshot"})
+
+    def broadcast(self, topic: str, message: dict, latest: bool = False):
+        self._fan_out(topic, encode_message(message), message["type"] if latest else None)
+
+
+async def connected(hub: Hub, topics: str = "all") -> RecordingSocket:
+    socket = RecordingSocket()
+    await hub.connect(socket, parse_topics(topics))
+    await asyncio.sleep(0)
+    socket.sent.clear()
+    return socket
+
+
+def test_combine_frames():
+    assert combine_frames([]) is None
+    assert combine_frames([("a", "time")]) == ("a", "time")
+    frame, latest_key = combine_frames([('{"type":"time"}', "time"), ('{"type":"var_update"}', "var_update")])
+    assert json.loads(frame) == {"type": "frame", "messages": [{"type": "time"}, {"type": "var_update"}]}
+    assert latest_key == "time+var_update"
+    # One incremental message makes the whole frame incremental
+    assert combine_frames([("{}", "time"), ("{}", None)])[1] is None
+
+
+async def test_broadcasts_within_an_interval_go_out_as_one_frame():
+    hub = Hub()
+    hub.frame_interval = 0.05
+    everything, clock_only = await connected(hub), await connected(hub, "clock")
+    hub.broadcast("clock", {"type": "time", "seconds": 1}, latest=True)
+    hub.broadcast("config", {"type": "config_patch", "version": 2})
+    hub.broadcast("clock", {"type": "time", "seconds": 2}, latest=True)
+    hub.broadcast("config", {"type": "config_patch", "version": 3})
+    assert everything.sent == []
+    await asyncio.sleep(0.1)
+    # The newer tick replaced the older one in its place; patches are all kept, in order
+    assert everything.sent == [{"type": "frame", "messages": [
+        {"type": "time", "seconds": 2}, {"type": "config_patch", "version": 2}, {"type": "config_patch", "version": 3},
+    ]}]
+    assert clock_only.sent == [{"type": "time", "seconds": 2}]
+
+
+async def test_replies_ride_after_the_updates_they_caused():
+    hub = Hub()
+    hub.frame_interval = 10
+    socket = await connected(hub)
+    hub.broadcast("config", {"type": "config_patch", "version": 2})
+    await hub.send(socket, {"type": "ack", "id": 1})
+    # Latency-critical updates do not wait for the interval
+    hub.flush_frames()
+    await asyncio.sleep(0)
+    assert socket.sent == [{"type": "frame", "messages": [{"type": "config_patch", "version": 2}, {"type": "ack", "id": 1}]}]
+    # With nothing pending, a reply goes out on its own
+    await hub.send(socket, {"type": "ack", "id": 2})
+    await asyncio.sleep(0)
+    assert socket.sent[-1] == {"type": "ack", "id": 2}
+
+
+async def test_zero_frame_rate_sends_each_broadcast_immediately():
+    hub = Hub()
+    hub.frame_interval = 0.0
+    socket = await connected(hub)
+    hub.broadcast("config", {"type": "config_patch", "version": 2})
+    hub.broadcast("config", {"type": "config_patch", "version": 3})
+    await asyncio.sleep(0.01)
+    assert socket.sent == [{"type": "config_patch", "version": 2}, {"type": "config_patch", "version": 3}]
+
+
+async def test_clients_without_pending_topics_get_no_frame():
+    hub = Hub()
+    hub.frame_interval = 0.02
+    var_only, clock_only = await connected(hub, "var"), await connected(hub, "clock")
+    hub.broadcast("var", {"type": "var_update", "isVisible": True}, latest=True)
+    hub.broadcast("var", {"type": "var_update", "isVisible": False}, latest=True)
+    await asyncio.sleep(0.05)
+    assert var_only.sent == [{"type": "var_update", "isVisible": False}] and clock_only.sent == []
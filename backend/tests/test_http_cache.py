@@ -0,0 +1,75 @@
+import aiofiles
+import pytest
+from fastapi.testclient import TestClient
+
+import data_manager as data_manager_module
+from data_manager import DataManager, SetScoreUpdate
+from http_cache import etag_matches
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """ Paths opened for reading through aiofiles """
+    opened = []
+    real_open = aiofiles.open
+    def counting_open(path, mode="r", *args, **kwargs):
+        if "r" in mode: opened.append(str(path))
+        return real_open(path, mode, *args, **kwargs)
+    monkeypatch.setattr(data_manager_module.aiofiles, "open", counting_open)
+    return opened
+
+
+def test_etag_matching_is_weak_and_accepts_lists():
+    assert etag_matches('W/"file-a-1"', 'W/"file-a-1"')
+    assert etag_matches('"file-a-1"', 'W/"file-a-1"')
+    assert etag_matches('W/"x", W/"file-a-1"', 'W/"file-a-1"')
+    assert etag_matches("*", 'W/"file-a-1"')
+    assert not etag_matches('W/"file-a-2"', 'W/"file-a-1"') and not etag_matches(None, 'W/"file-a-1"')
+
+
+async def test_file_revision_needs_no_read(config_paths, reads):
+    data = DataManager(*config_paths)
+    revision = data.get_raw_json_revision("team-info-config.json")
+    assert data.get_raw_json_revision("team-info-config.json") == revision and reads == []
+    assert (await data.get_raw_json_versioned("team-info-config.json"))[0] == revision
+    await data.get_raw_json_versioned("team-info-config.json")
+    assert len(reads) == 1
+
+
+async def test_file_changed_on_disk_gets_a_new_revision(config_paths, reads):
+    data = DataManager(*config_paths)
+    revision, _ = await data.get_raw_json_versioned("scoreboard-customization.json")
+    with open(config_paths[1], "w", encoding="utf-8") as f: f.write('{"edited": "by hand"}')
+    new_revision, content = await data.get_raw_json_versioned("scoreboard-customization.json")
+    assert new_revision != revision and content == '{"edited": "by hand"}' and len(reads) == 2
+
+
+def test_json_export_answers_304_without_reading(reads):
+    import main
+    client = TestClient(main.app)
+    response = client.get("/api/json/shortcuts.json")
+    assert response.status_code == 200 and response.headers["etag"].startswith('W/"file-')
+    reads.clear()
+    cached = client.get("/api/json/shortcuts.json", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304 and reads == []
+    assert client.get("/api/json/nothing.json").status_code == 404
+
+
+async def test_config_etag_follows_the_revision(data):
+    etag, body = data.config_etag(), data.get_config_json()
+    assert data.get_config_json() is body
+    await data.set_score(SetScoreUpdate(team="teamA", score=1))
+    assert data.config_etag() != etag and data.get_config_json() is not body
+    # Another DataManager on the same files never produces a matching validator
+    other = DataManager(data.file_path, data.scoreboard_style_path)
+    await other.load_config()
+    assert not etag_matches(data.config_etag(), other.config_etag())
+
+
+def test_a_stale_etag_gets_the_full_body():
+    import main
+    client = TestClient(main.app)
+    response = client.get("/api/json/shortcuts.json", headers={"If-None-Match": 'W/"file-stale-0"'})
+    assert response.status_code == 200 and response.headers["cache-control"] == "no-cache"
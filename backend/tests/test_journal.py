@@ -0,0 +1,111 @@
+import os
+
+import pytest
+
+import data_manager
+from data_manager import AddGoalUpdate, SetScoreUpdate, ToggleOnFieldUpdate
+from journal import MatchJournal
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def boot(make_match, monkeypatch):
+    """ A match started the way the lifespan hook starts one, with a clock the test moves by hand """
+    async def start():
+        match = await make_match()
+        clock = [1000.0]
+        monkeypatch.setattr(match.websocket_manager._clock, "now", lambda: clock[0])
+        return match, clock
+    return start
+
+
+def journal_files(journal):
+    return [path for path in (journal.journal_path, journal.snapshot_path) if os.path.exists(path)]
+
+
+async def play_some(match, clock):
+    data, manager = match.data_manager, match.websocket_manager
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=7))
+    manager.start()
+    clock[0] += 300
+    await data.add_goal(AddGoalUpdate(team="teamA", number=7, regMinute=5, addMinute=0, isOwnGoal=False, isPenalty=False))
+    await data.set_score(SetScoreUpdate(team="teamA", score=1))
+    clock[0] += 60
+    manager.stop()
+
+
+async def test_journal_round_trip(tmp_path):
+    journal = MatchJournal(str(tmp_path / "j.jsonl"), str(tmp_path / "s.json"), snapshot_every=1000)
+    journal.set_snapshot_source(lambda: {"n": journal.seq})
+    journal.open()
+    journal.record("config", "set_score", {"team": "teamA", "score": 1})
+    await journal.snapshot()
+    journal.record("config", "set_score", {"team": "teamA", "score": 2})
+    journal.record("live", "timer_start", {})
+    await journal.close()
+
+    snapshot, entries = MatchJournal(journal.journal_path, journal.snapshot_path).load()
+    # Only the entries after the snapshot are replayed on top of it
+    assert snapshot["state"] == {"n": 1}
+    assert [(e["seq"], e["op"]) for e in entries] == [(2, "set_score"), (3, "timer_start")]
+
+
+async def test_torn_last_line_and_bad_snapshot_are_ignored(tmp_path):
+    journal = MatchJournal(str(tmp_path / "j.jsonl"), str(tmp_path / "s.json"))
+    journal.open()
+    journal.record("config", "set_score", {"team": "teamA", "score": 1})
+    journal._file.write('{"seq": 2, "op": "set_sc')
+    await journal.close()
+    with open(journal.snapshot_path, "w", encoding="utf-8") as f: f.write("{not json")
+
+    snapshot, entries = MatchJournal(journal.journal_path, journal.snapshot_path).load()
+    assert snapshot is None and [e["seq"] for e in entries] == [1]
+
+
+async def test_replaying_and_closed_journals_record_nothing(tmp_path):
+    journal = MatchJournal(str(tmp_path / "j.jsonl"), str(tmp_path / "s.json"))
+    journal.record("config", "set_score", {})
+    journal.open()
+    journal.replaying = True
+    journal.record("config", "set_score", {})
+    journal.replaying = False
+    await journal.close()
+    assert journal.seq == 0 and MatchJournal(journal.journal_path, journal.snapshot_path).load() == (None, [])
+
+
+async def test_recovery_replays_the_journal_after_a_crash(boot):
+    match, clock = await boot()
+    await play_some(match, clock)
+    expected = match.data_manager.get_config().model_dump()
+    # Crash: the config file is behind, only the journal has the changes
+    match.journal._file.close()
+    match.journal._file = None
+
+    recovered, _ = await boot()
+    config = recovered.data_manager.get_config().model_dump()
+    player = next(p for p in config["teamA"]["players"] if p["number"] == 7)
+    assert config["teamA"]["score"] == 1 and [g["regMinute"] for g in player["goals"]] == [5]
+    assert player["timeOnField"] == 360 and recovered.websocket_manager.get_status()["seconds"] == 360
+    assert config == expected
+
+
+async def test_clean_shutdown_discards_the_journal(boot):
+    match, clock = await boot()
+    await play_some(match, clock)
+    await match.stop()
+    assert journal_files(match.journal) == [] and match.data_manager.journal is None
+
+
+async def test_journal_is_kept_when_the_config_write_fails(boot, monkeypatch):
+    match, clock = await boot()
+    await play_some(match, clock)
+    async def fail(*args, **kwargs): raise OSError("disk full")
+    with monkeypatch.context() as m:
+        m.setattr(data_manager, "atomic_write", fail)
+        await match.stop()
+    assert journal_files(match.journal)
+
+    # The config file still has the old score: the kept journal brings the match back
+    recovered, _ = await boot()
+    assert recovered.data_manager.get_config().teamA.score == 1
@@ -0,0 +1,93 @@
+import io
+import logging
+import time
+
+import pytest
+
+from log_setup import RateLimitFilter, get_log_levels, set_log_level
+
+
+def record(message, created, name="test", args=()):
+    entry = logging.LogRecord(name, logging.INFO, __file__, 1, message, args, None)
+    entry.created = created
+    return entry
+
+
+def test_repeats_are_limited_per_format_string():
+    limiter = RateLimitFilter(limit=2, window=10)
+    # Different arguments are still the same message
+    passed = [limiter.filter(record("Client %s disconnected", 100 + i, args=(i,))) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert limiter.filter(record("Another message", 101))
+    assert limiter.filter(record("Client %s disconnected", 101, name="other"))
+
+
+def test_the_next_window_reports_what_was_suppressed():
+    limiter = RateLimitFilter(limit=1, window=10)
+    for i in range(4): limiter.filter(record("Slow client", 100 + i))
+    entry = record("Slow client", 110)
+    assert limiter.filter(entry)
+    assert entry.getMessage() == "Slow client (3 similar messages suppressed)"
+    entry = record("Slow client", 120)
+    assert limiter.filter(entry) and entry.getMessage() == "Slow client"
+
+
+def test_a_zero_limit_lets_everything_through():
+    limiter = RateLimitFilter(limit=0, window=10)
+    assert all(limiter.filter(record("Tick", 100)) for _ in range(100))
+
+
+def test_levels_can_be_changed_per_logger():
+    logger = logging.getLogger("test_logging_module")
+    try:
+        set_log_level("DEBUG", "test_logging_module")
+        assert get_log_levels()["loggers"]["test_logging_module"] == "DEBUG"
+    finally:
+        logger.setLevel(logging.NOTSET)
+    assert "test_logging_module" not in get_log_levels()["loggers"]
+
+
+def test_a_burst_that_stops_is_reported_when_its_window_ends():
+    limiter = RateLimitFilter(limit=1, window=10)
+    for i in range(4): limiter.filter(record("Client %s is slow", 100 + i, args=(i,)))
+    limiter.filter(record("Tick late", 105))
+    assert limiter.expired(109) == []
+    summaries = limiter.expired(110)
+    assert [s.getMessage() for s in summaries] == ["Client 3 is slow (3 similar messages suppressed)"]
+    assert summaries[0].levelno == logging.INFO and summaries[0].name == "test"
+    # Reported once: the window is gone, so the next message starts a fresh one
+    assert limiter.expired(200) == []
+    entry = record("Client %s is slow", 201, args=(9,))
+    assert limiter.filter(entry) and entry.getMessage() == "Client 9 is slow"
+
+
+def test_suppressed_messages_reach_the_output_without_a_repeat(monkeypatch):
+    import log_setup
+    output = io.StringIO()
+    monkeypatch.setattr(log_setup, "_listener", None)
+    monkeypatch.setattr(log_setup, "LOG_RATE_LIMIT", 1)
+    monkeypatch.setattr(log_setup, "LOG_RATE_WINDOW", 0.05)
+    monkeypatch.setattr(log_setup.sys, "stdout", output)
+    registered = []
+    monkeypatch.setattr(log_setup.atexit, "register", registered.append)
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        log_setup.setup_logging("INFO")
+        logger = logging.getLogger("test_burst")
+        for i in range(5): logger.warning("Slow client %d", i)
+        time.sleep(0.3)
+        assert "Slow client 4 (4 similar messages suppressed)" in output.getvalue()
+    finally:
+        for shutdown in registered: shutdown()
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+
+def test_the_logging_endpoint_accepts_only_known_levels():
+    import main
+    from pydantic import ValidationError
+    with pytest.raises(ValidationError):
+        main.LogLevelUpdate(level="LOUD")
+    with pytest.raises(ValueError):
+        set_log_level("LOUD", "test_logging_module")
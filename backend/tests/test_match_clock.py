@@ -0,0 +1,83 @@
+import pytest
+
+from clock_source import VirtualClock
+from match_clock import MatchClock
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_count_up_value_is_computed_from_the_source():
+    source = VirtualClock()
+    clock = MatchClock(source)
+    clock.start()
+    await source.advance(61.75)
+    assert clock.value() == 61.75 and clock.seconds() == 61
+    assert clock.next_tick_deadline() == 62.0
+    clock.stop()
+    # Paused time is not counted
+    await source.advance(30)
+    assert clock.value() == 61.75
+    clock.start()
+    await source.advance(0.25)
+    assert clock.seconds() == 62
+
+
+async def test_countdown_shows_the_current_second_until_it_ends():
+    source = VirtualClock()
+    clock = MatchClock(source)
+    clock.countdown = True
+    clock.set(10)
+    clock.start()
+    await source.advance(0.5)
+    assert clock.value() == 9.5 and clock.seconds() == 10
+    assert clock.next_tick_deadline() == 1.0
+    await source.advance(9.5)
+    assert clock.value() == 0 and clock.seconds() == 0
+    # Never below zero, though playing time keeps running
+    await source.advance(5)
+    assert clock.value() == 0 and clock.played() == 15
+
+
+async def test_set_while_running_restarts_from_the_new_value():
+    source = VirtualClock(start=1000.0)
+    clock = MatchClock(source)
+    clock.start()
+    await source.advance(100)
+    clock.set(45 * 60)
+    await source.advance(10)
+    assert clock.value() == 45 * 60 + 10 and clock.played() == 110
+    # Negative values are clamped
+    clock.set(-5)
+    assert clock.value() == 0
+
+
+async def test_stopping_twice_or_starting_twice_changes_nothing():
+    source = VirtualClock()
+    clock = MatchClock(source)
+    clock.start()
+    await source.advance(5)
+    clock.start()
+    await source.advance(5)
+    assert clock.value() == 10
+    clock.stop()
+    clock.stop()
+    await source.advance(5)
+    assert clock.value() == 10 and not clock.is_running
+
+
+async def test_restore_continues_a_running_clock():
+    clock = MatchClock(VirtualClock(start=500.0))
+    clock.restore({"value": 120.0, "played": 130.0, "running": True, "countdown": False}, elapsed=5)
+    assert clock.is_running and clock.value() == 125.0 and clock.played() == 135.0
+    assert clock.get_state() == {"value": 125.0, "played": 135.0, "running": True, "countdown": False}
+
+
+def test_late_ticks_are_measured():
+    clock = MatchClock(VirtualClock())
+    clock.record_tick(deadline=1.0, fired_at=1.002)
+    clock.record_tick(deadline=2.0, fired_at=2.010)
+    # A tick that fires early counts as on time
+    clock.record_tick(deadline=3.0, fired_at=2.999)
+    stats = clock.get_stats()
+    assert stats["ticks"] == 3 and stats["maxLatenessMs"] == 10.0 and stats["lastLatenessMs"] == 0.0
+    assert stats["meanLatenessMs"] == 4.0 and stats["jitterMs"] > 0
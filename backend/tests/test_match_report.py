@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from data_manager import (
+    AddCardUpdate, AddGoalUpdate, DeletePlayerUpdate, EditPlayerUpdate, ReplacePlayerUpdate,
+    ResetStatsUpdate, SetScoreUpdate, ToggleOnFieldUpdate
+)
+from connection_hub import parse_topics
+from match_report import MatchReport
+from websocket_manager import WebSocketManager
+
+pytestmark = pytest.mark.anyio
+
+
+def rebuilt(data):
+    report = MatchReport()
+    report.rebuild(data.get_config())
+    return report.to_dict(data.get_config())
+
+
+def without_version(report):
+    return {key: value for key, value in report.items() if key != "version"}
+
+
+def goal(team, number, minute, **kwargs):
+    return AddGoalUpdate(team=team, number=number, regMinute=minute, addMinute=0, isOwnGoal=False, isPenalty=False, **kwargs)
+
+
+async def test_incremental_report_equals_a_rebuild(data):
+    await data.add_goal(goal("teamA", 9, 30))
+    await data.add_goal(goal("teamB", 4, 12))
+    await data.add_goal(AddGoalUpdate(team="teamB", number=5, regMinute=45, addMinute=2, isOwnGoal=True, isPenalty=False))
+    await data.add_card(AddCardUpdate(team="teamA", number=4, card_type="yellow", regMinute=20, addMinute=0))
+    await data.add_card(AddCardUpdate(team="teamB", number=4, card_type="red", regMinute=70, addMinute=0))
+    player = data._find_player("teamA", 9)
+    await data.edit_player(EditPlayerUpdate(team="teamA", original_number=9, **{**player.model_dump(), "number": 90}))
+    await data.replace_player(ReplacePlayerUpdate(team="teamB", number=5, name="Substitute"))
+    await data.delete_player(DeletePlayerUpdate(team="teamA", number=4))
+    report = data.get_report()
+    # Replaced and deleted players take their events with them; a renumbered scorer keeps the goal
+    assert [(e["regMinute"], e["type"], e["team"], e["playerNumber"]) for e in report["timeline"]] == [
+        (12, "Goal", "teamB", 4), (30, "Goal", "teamA", 90), (70, "Red", "teamB", 4),
+    ]
+    assert without_version(report) == without_version(rebuilt(data))
+    await data.reset_team_stats(ResetStatsUpdate(team="teamB"))
+    assert without_version(data.get_report()) == without_version(rebuilt(data))
+
+
+async def test_version_moves_only_when_the_report_changes(data):
+    version = data.report.version
+    await data.set_score(SetScoreUpdate(team="teamA", score=4))
+    assert data.report.version == version
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    assert data.report.version == version + 1
+    await data.add_goal(goal("teamA", 1, 5))
+    assert data.report.version == version + 2
+
+
+async def test_stopping_the_clock_pushes_the_settled_minutes(data, make_socket, monkeypatch):
+    manager = WebSocketManager(data)
+    now = [1000.0]
+    monkeypatch.setattr(manager._clock, "now", lambda: now[0])
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    await manager.broadcast_config(data.get_config())
+    socket = make_socket()
+    await manager.connect(socket, parse_topics("report"))
+    manager.start()
+    now[0] += 125
+    manager.stop()
+    await asyncio.sleep(0.01)
+    reports = [m["report"] for m in socket.of_type("report")]
+    assert reports and reports[-1]["teamA"]["players"][0]["timeOnField"] == 125
+    assert reports[-1] == data.get_report()
+
+
+async def test_changes_outside_the_rosters_push_no_report(data, make_socket):
+    manager = WebSocketManager(data)
+    await manager.broadcast_config(data.get_config())
+    socket = make_socket()
+    await manager.connect(socket, parse_topics("report"))
+    await data.set_score(SetScoreUpdate(team="teamB", score=2))
+    await manager.broadcast_config(data.get_config())
+    await asyncio.sleep(0.01)
+    assert [m["type"] for m in socket.sent] == ["snapshot"]
+
+
+async def test_report_is_serialized_once_per_version(data):
+    report = data.get_report()
+    assert data.get_report() is report
+    await data.add_goal(goal("teamA", 1, 5))
+    assert data.get_report() is not report and data.get_report() is data.get_report()
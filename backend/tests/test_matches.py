@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import main
+import matches
+from data_manager import SetScoreUpdate
+from matches import MatchRegistry
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def registry(make_match, tmp_path, monkeypatch):
+    monkeypatch.setattr(matches, "MATCHES_DIR", str(tmp_path / "matches"))
+    registry = MatchRegistry(await make_match(match_id="default"))
+    monkeypatch.setattr(main, "match_registry", registry)
+    yield registry
+    await registry.stop()
+
+
+async def test_matches_keep_separate_state(registry):
+    first = await registry.create("cup-final")
+    second = await registry.create("league")
+    await first.data_manager.set_score(SetScoreUpdate(team="teamA", score=3))
+    assert second.data_manager.get_config().teamA.score == 0
+    assert registry.default.data_manager.get_config().teamA.score == 0
+    assert await registry.get("cup-final") is first
+    assert [m["id"] for m in registry.list_matches()] == ["default", "cup-final", "league"]
+
+
+async def test_unloaded_match_comes_back_with_its_state(registry):
+    match = await registry.create("cup-final")
+    await match.data_manager.set_score(SetScoreUpdate(team="teamB", score=2))
+    match.websocket_manager.set_extra_time(4)
+    await registry.unload("cup-final")
+    assert {"id": "cup-final", "loaded": False} in registry.list_matches()
+    reloaded = await registry.get("cup-final")
+    assert reloaded is not match
+    assert reloaded.data_manager.get_config().teamB.score == 2
+    assert reloaded.websocket_manager.get_extra_time_status()["minutes"] == 4
+
+
+async def test_unknown_and_invalid_ids(registry):
+    assert await registry.get("missing") is None
+    assert not MatchRegistry.is_valid_id("../etc") and not MatchRegistry.is_valid_id("")
+    assert not registry.exists("../etc")
+    # The default match is never unloaded
+    await registry.unload("default")
+    assert await registry.get("default") is registry.default
+
+
+async def test_create_endpoint_rejects_bad_and_taken_ids(registry):
+    for match_id, status in (("no spaces", 400), ("default", 409)):
+        with pytest.raises(HTTPException) as error:
+            await main.create_match(main.MatchCreate(id=match_id))
+        assert error.value.status_code == status
+    assert (await main.create_match(main.MatchCreate(id="cup-final")))["id"] == "cup-final"
+
+
+async def test_unloading_a_running_match_stops_its_ticks_and_clients(registry, make_socket):
+    match = await registry.create("cup-final")
+    manager = match.websocket_manager
+    socket = make_socket()
+    await manager.connect(socket)
+    manager.start()
+    timer = manager._timer_task
+    assert registry.is_in_use("cup-final")
+
+    await registry.unload("cup-final")
+    await asyncio.sleep(0)
+    assert timer.cancelled() and manager._timer_task is None
+    assert socket.close_code == 1001 and manager.get_connection_stats() == []
+    # The clock was running when unloaded: it continues in the reloaded match
+    reloaded = await registry.get("cup-final")
+    assert reloaded.websocket_manager.get_status()["isRunning"]
+    reloaded.websocket_manager.stop()
+
+
+async def test_unload_endpoint_refuses_a_match_in_use(registry, make_socket):
+    match = await registry.create("cup-final")
+    match.websocket_manager.start()
+    with pytest.raises(HTTPException) as error:
+        await main.unload_match("cup-final")
+    assert error.value.status_code == 409
+    match.websocket_manager.stop()
+    # A connected overlay keeps it in use too
+    await match.websocket_manager.connect(make_socket())
+    with pytest.raises(HTTPException):
+        await main.unload_match("cup-final")
+    assert await registry.get("cup-final") is match
+
+    match.websocket_manager.disconnect(next(iter(match.websocket_manager._active_connections)))
+    await main.unload_match("cup-final")
+    assert {"id": "cup-final", "loaded": False} in registry.list_matches()
+    with pytest.raises(HTTPException) as error:
+        await main.unload_match("default")
+    assert error.value.status_code == 400
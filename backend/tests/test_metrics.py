@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+import main
+from client_connection import ClientConnection
+from metrics import MetricsRegistry, TimedLock, CLIENT_DROPPED, LOCK_WAIT_SECONDS
+
+pytestmark = pytest.mark.anyio
+
+
+def test_counters_and_gauges_render_in_prometheus_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ("route",))
+    requests.labels("/api").inc()
+    requests.labels("/api").inc(2)
+    connections = registry.gauge("test_connections", "Connections")
+    connections.inc(); connections.inc(); connections.dec()
+    assert registry.render() == "\n".join([
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/api"} 3',
+        "# HELP test_connections Connections",
+        "# TYPE test_connections gauge",
+        "test_connections 1",
+    ]) + "\n"
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0): latency.observe(value)
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1"} 3',
+        'test_seconds_bucket{le="+Inf"} 4',
+        "test_seconds_sum 3.65",
+        "test_seconds_count 4",
+    ]
+
+
+def test_gauge_function_is_read_at_scrape_time():
+    registry = MetricsRegistry()
+    values = iter([1, 2])
+    registry.gauge("test_depth", "Depth").set_function(lambda: next(values))
+    assert registry.render().endswith("test_depth 1\n")
+    assert registry.render().endswith("test_depth 2\n")
+
+
+def test_names_are_registered_once():
+    registry = MetricsRegistry()
+    registry.counter("test_total", "Total")
+    with pytest.raises(ValueError):
+        registry.gauge("test_total", "Again")
+
+
+async def test_timed_lock_records_waits():
+    lock = TimedLock("test")
+    count = LOCK_WAIT_SECONDS.labels("test").count
+    async with lock: pass
+    async with lock: pass
+    assert LOCK_WAIT_SECONDS.labels("test").count == count + 2
+
+
+async def test_timed_lock_measures_contention():
+    lock = TimedLock("test-contended")
+    wait = LOCK_WAIT_SECONDS.labels("test-contended")
+    await lock.acquire()
+    waiter = asyncio.create_task(lock.acquire())
+    await asyncio.sleep(0.05)
+    lock.release()
+    await waiter
+    lock.release()
+    assert wait.count == 2 and wait.sum >= 0.04
+
+
+async def test_dropped_frames_are_counted(make_socket):
+    connection = ClientConnection(make_socket(), lambda c: None, lambda c: None, max_queue=1, stall_timeout=60)
+    dropped = CLIENT_DROPPED.labels().value
+    for frame in ("{}", "{}", "{}"): connection.enqueue(frame)
+    assert CLIENT_DROPPED.labels().value == dropped + 2
+
+
+async def test_metrics_endpoint_serves_the_text_format():
+    response = await main.get_metrics()
+    assert response.media_type.startswith("text/plain; version=0.0.4")
+    assert b"# TYPE scoreboard_active_connections gauge" in response.body
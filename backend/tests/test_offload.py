@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import offload
+from loop_watchdog import LoopWatchdog, operation
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_offload_runs_on_a_worker_and_tracks_running_tasks():
+    started, release = threading.Event(), threading.Event()
+    def work(value):
+        started.set()
+        release.wait(5)
+        return threading.current_thread().name, value * 2
+
+    task = asyncio.create_task(offload.offload("parse", work, 21))
+    await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+    assert offload.running_tasks() == ["parse"]
+    release.set()
+    thread, result = await task
+    assert thread.startswith("offload") and result == 42
+    assert offload.running_tasks() == []
+
+
+async def test_running_tasks_can_be_read_while_workers_change_them():
+    # The watchdog thread reads the running tasks while workers update them
+    stop = threading.Event()
+    errors = []
+    def read():
+        while not stop.is_set():
+            try: offload.running_tasks()
+            except RuntimeError as e: errors.append(e)
+    reader = threading.Thread(target=read)
+    reader.start()
+    try: await asyncio.gather(*(offload.offload(f"task{i % 7}", sum, range(1000)) for i in range(300)))
+    finally:
+        stop.set()
+        reader.join()
+    assert errors == [] and offload.running_tasks() == []
+
+
+async def test_a_failing_task_raises_and_is_no_longer_running():
+    def fail(): raise ValueError("bad file")
+    with pytest.raises(ValueError, match="bad file"):
+        await offload.offload("parse", fail)
+    assert offload.running_tasks() == []
+
+
+async def test_watchdog_names_the_operation_that_blocked_the_loop():
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.5)
+    watcher = asyncio.create_task(watchdog.run())
+    await asyncio.sleep(0.05)
+    try:
+        with operation("POST /api/json/upload"):
+            time.sleep(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        watcher.cancel()
+    [stall] = watchdog.get_stalls()
+    assert stall["operation"] == "POST /api/json/upload" and not stall["ongoing"]
+    assert stall["where"].startswith("tests/test_offload.py") and stall["lagMs"] >= 200
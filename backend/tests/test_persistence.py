@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from data_manager import DataManager, SetScoreUpdate
+from persistence import WriteBehindWriter, atomic_write
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_atomic_write_replaces_file_and_leaves_no_temp(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("old")
+    await atomic_write(str(path), '{"new": true}')
+    assert path.read_text() == '{"new": true}'
+    assert not os.path.exists(f"{path}.tmp")
+
+
+async def test_atomic_write_syncs_before_rename(tmp_path, monkeypatch):
+    events = []
+    real_fsync, real_replace = os.fsync, os.replace
+    monkeypatch.setattr(os, "fsync", lambda fd: (events.append("fsync"), real_fsync(fd))[1])
+    monkeypatch.setattr(os, "replace", lambda src, dst: (events.append("replace"), real_replace(src, dst))[1])
+    await atomic_write(str(tmp_path / "data.json"), "x")
+    # The file's data first, then the rename (then the directory, where supported)
+    assert events[:2] == ["fsync", "replace"]
+
+
+async def test_failed_write_keeps_the_old_file(tmp_path, monkeypatch):
+    path = tmp_path / "data.json"
+    path.write_text("old")
+    def fail(fd): raise OSError("disk full")
+    monkeypatch.setattr(os, "fsync", fail)
+    with pytest.raises(OSError):
+        await atomic_write(str(path), "new")
+    assert path.read_text() == "old"
+
+
+async def test_write_behind_coalesces_requests():
+    writes = []
+    async def write(): writes.append(1)
+    writer = WriteBehindWriter(write, interval=0.05)
+    for _ in range(10): writer.mark_dirty()
+    await asyncio.sleep(0.01)
+    writer.mark_dirty()
+    await asyncio.sleep(0.2)
+    # Requests made before the writer runs share its write; a later one waits out the interval
+    assert len(writes) == 2
+    assert writer.get_stats()["coalesced"] == 9
+
+
+async def test_write_behind_flush_writes_pending_changes():
+    writes = []
+    async def write(): writes.append(1)
+    writer = WriteBehindWriter(write, interval=60)
+    writer.mark_dirty()
+    await asyncio.sleep(0)
+    writer.mark_dirty()
+    await writer.flush()
+    assert len(writes) == 2 and not writer.get_stats()["pending"]
+
+
+async def test_flush_with_nothing_pending_does_not_write():
+    writes = []
+    async def write(): writes.append(1)
+    writer = WriteBehindWriter(write, interval=60)
+    await writer.flush()
+    assert writes == [] and writer.get_stats()["writes"] == 0
+
+
+async def test_mutations_reach_the_file_only_on_flush(config_paths):
+    data = DataManager(*config_paths, save_interval=60)
+    await data.load_config()
+    for score in range(1, 4): await data.set_score(SetScoreUpdate(team="teamA", score=score))
+    with open(config_paths[0]) as f: assert json.load(f)["teamA"]["score"] != 3
+    await data.flush_config()
+    with open(config_paths[0]) as f: assert json.load(f)["teamA"]["score"] == 3
+    # The three mutations shared the one shutdown write
+    assert data.get_persistence_stats()["config"]["writes"] == 1
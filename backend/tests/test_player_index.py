@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from data_manager import AddGoalUpdate, AddPlayerUpdate, ClearPlayersUpdate, DeletePlayerUpdate, EditPlayerUpdate
+
+pytestmark = pytest.mark.anyio
+
+
+def assert_index_matches_roster(data):
+    for team_key in ("teamA", "teamB"):
+        players = getattr(data.get_config(), team_key).players
+        numbers = [p.number for p in players]
+        assert numbers == sorted(numbers)
+        # The index holds the roster's own player objects, not copies
+        assert {n: id(p) for n, p in data._player_index[team_key].items()} == {p.number: id(p) for p in players}
+
+
+def edit(player, team="teamA", **changes):
+    fields = {**player.model_dump(), **changes}
+    return EditPlayerUpdate(team=team, original_number=player.number, **fields)
+
+
+async def test_index_follows_roster_changes(data):
+    await data.add_player(AddPlayerUpdate(team="teamA", number=50, name="Middle"))
+    assert data._find_player("teamA", 50).name == "Middle"
+    await data.delete_player(DeletePlayerUpdate(team="teamA", number=1))
+    assert data._find_player("teamA", 1) is None
+    await data.edit_player(edit(data._find_player("teamA", 50), number=88, name="Renumbered"))
+    assert data._find_player("teamA", 50) is None and data._find_player("teamA", 88).name == "Renumbered"
+    await data.clear_player_list(ClearPlayersUpdate(team="teamB"))
+    assert data._player_index["teamB"] == {}
+    assert_index_matches_roster(data)
+
+
+async def test_duplicate_numbers_are_rejected(data):
+    with pytest.raises(Exception):
+        await data.add_player(AddPlayerUpdate(team="teamA", number=1, name="Twin"))
+    with pytest.raises(Exception):
+        await data.edit_player(edit(data._find_player("teamA", 1), number=2))
+    assert data._find_player("teamA", 1).name != "Twin"
+    assert_index_matches_roster(data)
+
+
+async def test_index_is_rebuilt_when_a_config_is_imported(data):
+    imported = data.get_config().model_dump()
+    imported["teamB"]["players"] = [{"number": 9, "name": "Nine"}, {"number": 7, "name": "Seven"}]
+    await data.set_raw_json("team-info-config.json", json.dumps(imported))
+    assert list(data._player_index["teamB"]) == [7, 9]
+    assert_index_matches_roster(data)
+
+
+async def test_unknown_numbers_change_nothing(data):
+    before = data.get_config().model_dump()
+    await data.add_goal(AddGoalUpdate(team="teamA", number=404, regMinute=10, addMinute=0, isOwnGoal=False, isPenalty=False))
+    assert data.get_config().model_dump() == before
+    # Each team has its own index
+    await data.add_player(AddPlayerUpdate(team="teamB", number=77, name="Away"))
+    assert data._find_player("teamA", 77) is None and data._find_player("teamB", 77).name == "Away"
@@ -0,0 +1,98 @@
+import gzip
+import os
+import threading
+
+import pytest
+
+import recorder as recorder_module
+from recorder import TrafficRecorder, read_recording
+from replay import MatchReplay, parse_speed
+
+pytestmark = pytest.mark.anyio
+
+
+def keyframe():
+    return '{"type":"snapshot","scoreboard":{"isVisible":true}}'
+
+
+async def record_some(recorder, frames: int):
+    recorder.start()
+    for i in range(frames):
+        recorder.record_frame("default", keyframe, "clock", f'{{"type":"time","seconds":{i}}}', "time")
+    recorder.record_command("default", {"type": "command", "id": 1, "command": "timer_start"})
+    await recorder.stop()
+
+
+async def test_recording_round_trip(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    await record_some(recorder, 3)
+    entries = list(read_recording(recorder.session_dir))
+    assert [entry[1] for entry in entries] == ["segment", "keyframe", "frame", "frame", "frame", "command"]
+    assert entries[-2][5] == '{"type":"time","seconds":2}'
+    assert recorder.get_stats()["entries"] == len(entries)
+
+
+async def test_compression_runs_on_the_writer_thread(tmp_path, monkeypatch):
+    threads = []
+    real_open = gzip.open
+    def tracking_open(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return real_open(*args, **kwargs)
+    monkeypatch.setattr(recorder_module.gzip, "open", tracking_open)
+    await record_some(TrafficRecorder(str(tmp_path)), 3)
+    assert threads == ["recorder"]
+
+
+async def test_old_segments_roll_off(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path), segment_bytes=200, segments=2)
+    await record_some(recorder, 40)
+    remaining = sorted(os.listdir(recorder.session_dir))
+    assert len(remaining) == 2 and remaining == [os.path.basename(path) for path in recorder._segment_paths]
+    # Each remaining segment starts with a keyframe, so it replays on its own
+    entries = list(read_recording(os.path.join(recorder.session_dir, remaining[0])))
+    assert [entry[1] for entry in entries[:2]] == ["segment", "keyframe"]
+
+
+async def test_replay_plays_every_recorded_frame(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    await record_some(recorder, 25)
+    replay = MatchReplay(recorder.session_dir, speed=0)
+    await replay.start()
+    await replay._task
+    stats = replay.get_stats()
+    assert stats["finished"] and stats["frames"] == 25 and stats["mutations"] == 1
+    snapshot = await replay.get_hub("default").get_snapshot_frame(frozenset({"scoreboard", "clock"}))
+    assert '"seconds":24' in snapshot
+
+
+async def test_replay_reads_segments_off_the_event_loop(tmp_path, monkeypatch):
+    recorder = TrafficRecorder(str(tmp_path))
+    await record_some(recorder, 1200)
+    threads = []
+    real_open = gzip.open
+    def tracking_open(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return real_open(*args, **kwargs)
+    monkeypatch.setattr(recorder_module.gzip, "open", tracking_open)
+    entries = [entry async for entry in recorder_module.read_recording_async(recorder.session_dir, batch=100)]
+    assert threads and threading.main_thread() not in threads
+    assert entries == list(read_recording(recorder.session_dir))
+
+
+async def test_a_truncated_last_segment_keeps_the_entries_before_it(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    await record_some(recorder, 5)
+    [segment] = recorder._segment_paths
+    with open(segment, "rb") as f: content = f.read()
+    with open(segment, "wb") as f: f.write(content[:-20])
+    entries = list(read_recording(recorder.session_dir))
+    assert 0 < len(entries) < 9 and entries[0][1] == "segment"
+
+
+async def test_replay_refuses_commands_and_bad_speeds():
+    replay = MatchReplay("unused", speed=1)
+    reply = await replay.dispatch({"type": "command", "id": 3, "command": "timer_start"})
+    assert reply["type"] == "error" and reply["id"] == 3
+    assert parse_speed("max") == 0 and parse_speed("2.5") == 2.5
+    for speed in ("0", "-1", "fast"):
+        with pytest.raises(ValueError): parse_speed(speed)
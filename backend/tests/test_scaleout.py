@@ -0,0 +1,105 @@
+import asyncio
+import base64
+import os
+import stat
+
+import pytest
+
+from pubsub import PubSubClient, PubSubServer, RemoteError, UnixSocketBroker, UnixSocketBrokerClient
+from scaleout import OwnerBridge, WorkerLink
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def broker(tmp_path):
+    async def handle(request):
+        if request.get("fail"): raise ValueError("no")
+        return request["value"] * 2
+    server = UnixSocketBroker(str(tmp_path / "broker.sock"))
+    await server.start(handle)
+    frames, connected = [], asyncio.Event()
+    client = UnixSocketBrokerClient(server.path)
+    await client.start(lambda *frame: frames.append(frame), connected.set)
+    await asyncio.wait_for(connected.wait(), 5)
+    yield server, client, frames
+    await client.stop()
+    await server.stop()
+
+
+async def test_requests_and_frames_cross_the_broker(broker):
+    server, client, frames = broker
+    assert await client.request({"value": 21}) == 42
+    with pytest.raises(RemoteError, match="no"): await client.request({"fail": True})
+    client.subscribe("default")
+    await asyncio.sleep(0.05)
+    assert server.subscriber_count("default") == 1
+    server.publish("default", "time", '{"type":"time"}', "time")
+    await asyncio.sleep(0.05)
+    assert frames == [("default", "time", '{"type":"time"}', "time")]
+
+
+async def test_malformed_request_gets_an_error_reply(broker):
+    server, client, frames = broker
+    future = client._pending["bad"] = asyncio.get_running_loop().create_future()
+    client._writer.write(b"Q bad {not json\n")
+    reply = await asyncio.wait_for(future, 5)
+    assert not reply["ok"] and "Malformed" in reply["error"]
+    # The connection survives
+    assert await client.request({"value": 1}) == 2
+
+
+def test_transport_interface_is_abstract():
+    with pytest.raises(TypeError): PubSubServer()
+
+
+async def test_forwarded_call_passes_binary_bodies_and_disconnects():
+    received = []
+
+    async def app(scope, receive, send):
+        received.append(await receive())
+        received.append(await asyncio.wait_for(receive(), 1))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/octet-stream")]})
+        await send({"type": "http.response.body", "body": received[0]["body"][::-1]})
+
+    bridge = OwnerBridge(server=None)
+    bridge._app = app
+    body = bytes([0xff, 0xfe, 0x00, 0x80])
+    reply = await bridge._call_app({"method": "POST", "path": "/api/json/upload", "query": "", "headers": [],
+                                     "body": base64.b64encode(body).decode()})
+    assert received[0]["body"] == body and received[1] == {"type": "http.disconnect"}
+    assert reply["status"] == 200 and base64.b64decode(reply["body"]) == body[::-1]
+
+
+async def test_broker_socket_is_private(tmp_path):
+    server = UnixSocketBroker(str(tmp_path / "scoreboard" / "broker.sock"))
+    await server.start(lambda request: None)
+    try:
+        assert stat.S_IMODE(os.stat(tmp_path / "scoreboard").st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+    finally:
+        await server.stop()
+
+
+class OwnerlessClient(PubSubClient):
+    """ A worker's broker client whose owner knows no matches """
+    def __init__(self):
+        self.channels = set()
+
+    async def start(self, on_frame, on_connect): pass
+    def subscribe(self, channel): self.channels.add(channel)
+    def unsubscribe(self, channel): self.channels.discard(channel)
+    async def stop(self): pass
+
+    async def request(self, payload):
+        raise RemoteError(f"Match '{payload['match']}' not found")
+
+
+async def test_worker_refuses_matches_the_owner_cannot_serve():
+    client = OwnerlessClient()
+    link = WorkerLink(client)
+    assert await link.get_hub("missing") is None
+    # The failed lookup leaves no subscription behind
+    assert client.channels == set() and link._hubs == {}
+    reply = await link.dispatch("missing", {"type": "command", "id": 5, "command": "timer_start"})
+    assert reply == {"type": "error", "id": 5, "error": "Match 'missing' not found"}
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from data_manager import (
+    CONFIG_SCHEMA_VERSION, STYLE_SCHEMA_VERSION, DataManager, ScoreboardConfig, ScoreboardStyleConfig,
+    StoredScoreboardConfig, StoredScoreboardStyle, dump_stored, load_stored, migrate_style
+)
+from startup import StartupTimer
+
+pytestmark = pytest.mark.anyio
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def write_legacy_config(path):
+    """ The config file as an early version wrote it: no schema version, minutes as plain numbers """
+    data = json.loads(read(path))
+    data.pop("schemaVersion", None)
+    data.pop("currentPeriod", None)
+    player = data["teamA"]["players"][0]
+    del player["timeOnField"]
+    player["goals"] = [12, -40]
+    player["yellowCards"] = [33]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_current_files_load_without_migration(config_paths):
+    style = ScoreboardStyleConfig.model_validate_json(read(config_paths[1]))
+    stored = dump_stored(style, StoredScoreboardStyle, STYLE_SCHEMA_VERSION)
+    assert load_stored(stored, StoredScoreboardStyle, ScoreboardStyleConfig, STYLE_SCHEMA_VERSION) == style
+    # A file from a newer or older schema, or without a stamp, goes through migration
+    for version in (STYLE_SCHEMA_VERSION + 1, None):
+        stale = json.loads(stored)
+        if version is None: del stale["schemaVersion"]
+        else: stale["schemaVersion"] = version
+        assert load_stored(json.dumps(stale), StoredScoreboardStyle, ScoreboardStyleConfig, STYLE_SCHEMA_VERSION) is None
+
+
+async def test_legacy_config_is_migrated_and_stamped(config_paths):
+    write_legacy_config(config_paths[0])
+    assert load_stored(read(config_paths[0]), StoredScoreboardConfig, ScoreboardConfig, CONFIG_SCHEMA_VERSION) is None
+
+    data = DataManager(*config_paths)
+    await data.load_config()
+    player = data.get_config().teamA.players[0]
+    assert [(g.regMinute, g.isOwnGoal) for g in player.goals] == [(12, False), (40, True)]
+    assert [c.regMinute for c in player.yellowCards] == [33] and player.timeOnField == 0
+
+    # Loading rewrote the file with the stamp, so the next start takes the fast path to the same config
+    content = read(config_paths[0])
+    assert json.loads(content)["schemaVersion"] == CONFIG_SCHEMA_VERSION
+    reloaded = load_stored(content, StoredScoreboardConfig, ScoreboardConfig, CONFIG_SCHEMA_VERSION)
+    assert reloaded.model_dump(exclude={"currentPeriod"}) == data.get_config().model_dump(exclude={"currentPeriod"})
+
+
+def test_legacy_style_keys_are_renamed(config_paths):
+    data = json.loads(read(config_paths[1]))
+    data.pop("schemaVersion", None)
+    data["primary"] = data.pop("boxMainColor")
+    data.pop("timerPosition")
+    style = ScoreboardStyleConfig.model_validate(migrate_style(dict(data)))
+    assert style.boxMainColor == data["primary"] and style.timerPosition == "Under"
+
+
+async def test_startup_timer_measures_phases():
+    timer = StartupTimer()
+
+    async def phase(): return "loaded"
+
+    assert await timer.measure("config", phase()) == "loaded"
+    timer.lifespan_started()
+    timer.ready()
+    stats = timer.get_stats()
+    assert set(stats["phasesMs"]) == {"config"} and set(stats["milestonesMs"]) == {"imported", "ready"}
+
+
+async def test_a_failing_phase_is_timed_and_raises():
+    timer = StartupTimer()
+
+    async def phase(): raise FileNotFoundError("shortcuts.json")
+
+    with pytest.raises(FileNotFoundError):
+        await timer.measure("shortcuts", phase())
+    assert "shortcuts" in timer.get_stats()["phasesMs"]
+    # Only the first accept is a milestone
+    timer.websocket_accepted()
+    first = timer.get_stats()["milestonesMs"]["firstWebSocket"]
+    timer.websocket_accepted()
+    assert timer.get_stats()["milestonesMs"]["firstWebSocket"] == first
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+
+from data_manager import StylePreviewUpdate
+from style_preview import StylePreview
+
+pytestmark = pytest.mark.anyio
+
+
+def make_preview():
+    calls = {"broadcasts": 0, "saves": 0}
+    async def broadcast(): calls["broadcasts"] += 1
+    async def persist():
+        calls["saves"] += 1
+        return True
+    return StylePreview(broadcast, persist, interval=0.05), calls
+
+
+async def test_preview_changes_are_throttled_and_not_saved():
+    preview, calls = make_preview()
+    for _ in range(20):
+        preview.changed()
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.2)
+    # About one broadcast per interval, the last value included; nothing saved without a commit
+    assert 2 <= calls["broadcasts"] <= 5
+    assert calls["saves"] == 0 and preview.get_stats()["pending"]
+
+
+async def test_commit_saves_once_and_sends_the_final_style():
+    preview, calls = make_preview()
+    preview.changed()
+    preview.changed()
+    await preview.commit()
+    assert calls["saves"] == 1 and not preview.get_stats()["pending"]
+    assert preview.get_stats()["commits"] == 1
+
+
+async def test_a_commit_with_nothing_to_save_sends_nothing():
+    preview, calls = make_preview()
+    async def persist(): return False
+    preview._persist = persist
+    preview.changed()
+    await preview.commit()
+    assert calls["broadcasts"] == 0 and preview.get_stats()["commits"] == 0
+
+
+def stored_style(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def test_previews_stay_in_memory_until_saved(data, config_paths):
+    before = stored_style(config_paths[1])
+    style = data.preview_scoreboard_style(StylePreviewUpdate(boxMainColor="#123456", scale=120))
+    assert style.boxMainColor == "#123456" and stored_style(config_paths[1]) == before
+    assert await data.save_previewed_style()
+    assert stored_style(config_paths[1])["boxMainColor"] == "#123456"
+    # Saved once: a second commit has nothing to write
+    assert not await data.save_previewed_style()
+
+
+async def test_a_regular_style_save_clears_the_preview(data):
+    data.preview_scoreboard_style(StylePreviewUpdate(textMainColor="#000000"))
+    await data.update_match_info("Final")
+    assert not await data.save_previewed_style()
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from data_manager import ResetStatsUpdate, ToggleOnFieldUpdate
+from websocket_manager import WebSocketManager
+
+pytestmark = pytest.mark.anyio
+
+
+class PlayClock:
+    """ Playing time the test moves by hand """
+    def __init__(self):
+        self.played = 0.0
+
+    def __call__(self) -> float:
+        return self.played
+
+
+def time_on_field(data, team: str, number: int) -> int:
+    return next(p.timeOnField for p in getattr(data.get_config(), team).players if p.number == number)
+
+
+def stored_time_on_field(path: str, team: str, number: int) -> int:
+    with open(path, encoding="utf-8") as f: config = json.load(f)
+    return next(p["timeOnField"] for p in config[team]["players"] if p["number"] == number)
+
+
+@pytest.fixture
+def play_clock(data):
+    clock = PlayClock()
+    data.set_play_clock(clock)
+    return clock
+
+
+async def test_a_stint_counts_whole_seconds_and_carries_the_rest(data, play_clock):
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    play_clock.played = 125.5
+    assert time_on_field(data, "teamA", 1) == 125
+    play_clock.played = 126.0
+    # The half second left over from the last read is not lost
+    assert time_on_field(data, "teamA", 1) == 126
+
+
+async def test_time_on_the_bench_is_not_counted(data, play_clock):
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    play_clock.played = 30
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    play_clock.played = 90
+    assert time_on_field(data, "teamA", 1) == 30
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    play_clock.played = 100
+    assert time_on_field(data, "teamA", 1) == 40
+
+
+async def test_reset_closes_running_stints(data, play_clock):
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamB", number=2))
+    play_clock.played = 10
+    await data.reset_team_stats(ResetStatsUpdate(team="teamB"))
+    play_clock.played = 50
+    assert time_on_field(data, "teamB", 2) == 10
+
+
+async def test_shutdown_flush_persists_running_stints(data, play_clock):
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamB", number=2))
+    await data.flush_config()
+    play_clock.played = 90
+    # Nothing else changed since the last write: the open stint alone must get the file rewritten
+    await data.flush_config()
+    assert stored_time_on_field(data.file_path, "teamB", 2) == 90
+    # Off-field players are untouched
+    assert stored_time_on_field(data.file_path, "teamB", 3) == 0
+
+
+async def test_stopping_the_clock_settles_and_saves_time_on_field(data, monkeypatch):
+    manager = WebSocketManager(data)
+    now = [1000.0]
+    monkeypatch.setattr(manager._clock, "now", lambda: now[0])
+    await data.toggle_on_field(ToggleOnFieldUpdate(team="teamA", number=1))
+    await data.flush_config()
+    manager.start()
+    now[0] += 125.5
+    manager.stop()
+    assert data.get_persistence_stats()["config"]["pending"]
+    await data.flush_config()
+    assert stored_time_on_field(data.file_path, "teamA", 1) == 125
@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+import pytest
+
+import websocket_manager
+from connection_hub import MESSAGE_TOPICS, TOPICS, parse_topics
+from data_manager import SetScoreUpdate
+from websocket_manager import WebSocketManager
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def manager(data):
+    return WebSocketManager(data)
+
+
+def test_parse_topics():
+    assert parse_topics(None) == parse_topics("") == parse_topics("all") == parse_topics(["var", "all"]) == TOPICS
+    assert parse_topics("config, var,unknown") == frozenset({"config", "var"})
+    assert parse_topics(["clock"]) == frozenset({"clock"})
+    # Only unknown names leaves nothing to subscribe to
+    assert parse_topics("scores,chat") == frozenset()
+
+
+def test_every_message_type_has_a_known_topic():
+    assert set(MESSAGE_TOPICS.values()) <= TOPICS
+
+
+async def test_clients_receive_only_their_topics(manager, data, make_socket):
+    clock_only, config_only = make_socket(), make_socket()
+    await manager.connect(clock_only, parse_topics("clock"))
+    await manager.connect(config_only, parse_topics("config"))
+    await manager.broadcast_time()
+    await data.set_score(SetScoreUpdate(team="teamA", score=1))
+    await manager.broadcast_config(data.get_config())
+    await manager.broadcast_var_update({"isVisible": True})
+    await asyncio.sleep(0.01)
+    assert [m["type"] for m in clock_only.sent] == ["snapshot", "time"]
+    assert [m["type"] for m in config_only.sent] == ["snapshot", "config"]
+    assert set(clock_only.sent[0]) == {"type", "clock"}
+
+
+async def test_nothing_is_encoded_for_a_topic_without_subscribers(manager, make_socket, monkeypatch):
+    await manager.connect(make_socket(), parse_topics("var"))
+    encoded = []
+    monkeypatch.setattr(websocket_manager, "encode_message", lambda message: encoded.append(message) or json.dumps(message))
+    await manager.broadcast_time()
+    assert encoded == []
+
+
+async def test_subscribe_replaces_topics_and_sends_their_snapshot(manager, make_socket):
+    socket = make_socket()
+    await manager.connect(socket, parse_topics("clock"))
+    await manager.subscribe(socket, parse_topics("var"))
+    await asyncio.sleep(0.01)
+    assert set(socket.sent[-1]) == {"type", "var"}
+    assert not manager.has_subscribers("clock") and manager.has_subscribers("var")
+    manager.disconnect(socket)
+    assert not manager.has_subscribers("var")
+
+
+async def test_subscribing_an_unknown_client_does_nothing(manager, make_socket):
+    await manager.subscribe(make_socket(), parse_topics("var"))
+    assert not manager.has_subscribers("var") and manager.connection_count() == 0
@@ -1,14 +1,31 @@
 import asyncio
+import logging
+import time
 from fastapi import WebSocket
-from data_manager import data_manager, ScoreboardConfig, ScoreboardStyleConfig
-from typing import Dict, Any
-
-class WebSocketManager:
-    def __init__(self):
-        self._is_running: bool = False
-        self._seconds: int = 0
+from data_manager import data_manager, DataManager, ScoreboardConfig, ScoreboardStyleConfig
+from config_patch import diff_config
+from connection_hub import ConnectionHub, TOPICS, MESSAGE_TOPICS, LATEST_WINS_TYPES, encode_message
+from match_clock import MatchClock
+from clock_source import ClockSource, clock_source
+from journal import MatchJournal
+from style_preview import StylePreview
+from metrics import BROADCAST_BYTES, BROADCAST_SECONDS, TICK_LATENESS_SECONDS
+from typing import Callable, Dict, Any, FrozenSet
+
+logger = logging.getLogger(__name__)
+
+class WebSocketManager(ConnectionHub):
+    def __init__(self, data_manager: DataManager, clock: ClockSource = clock_source):
+        super().__init__()
+        self.data_manager = data_manager
+        self._clock = MatchClock(clock)
+        data_manager.set_play_clock(self._clock.played)
+        self.journal: MatchJournal | None = None
         self._timer_task: asyncio.Task | None = None
-        self._active_connections: list[WebSocket] = []
+        # Set in owner mode: every encoded frame is also published to the worker processes
+        self.publisher: Callable[[str, str, str | None], None] | None = None
+        # Set while the traffic recorder runs
+        self.recorder: Callable[[str, str, str | None], None] | None = None
         self._is_game_report_visible: bool = False
         self._is_scoreboard_visible: bool = True
         
@@ -27,12 +44,23 @@ class WebSocketManager:
             "message": "",
             "decision": ""
         }
+        # --- Versioned config deltas ---
+        self._config_version: int = 0
+        self._last_config: Dict[str, Any] | None = None
+        self._report_version: int = 0
+        # Slider drags: throttled style broadcasts, saved once on commit
+        self.style_preview = StylePreview(self._broadcast_current_style, data_manager.save_previewed_style)
 
     def get_var_status(self):
         return self._var_state
 
     def get_status(self):
-        return {"isRunning": self._is_running, "seconds": self._seconds}
+        now = self._clock.now()
+        # exact is the base overlays interpolate from until the next tick
+        return {"isRunning": self._clock.is_running, "seconds": self._clock.seconds(now), "exact": round(self._clock.value(now), 3)}
+
+    def get_timer_stats(self):
+        return {**self.get_status(), "clockSource": self._clock.source.name, **self._clock.get_stats()}
 
     def get_game_report_status(self):
         return {"isVisible": self._is_game_report_visible}
@@ -56,175 +84,291 @@ class WebSocketManager:
     def get_futsal_clock_status(self):
         return {"isOn": self._is_futsal_clock_on}
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self._active_connections.append(websocket)
-        await self.broadcast_status()
-        await self.broadcast_game_report_visibility(to_single_client=websocket)
-        await self.broadcast_scoreboard_visibility(to_single_client=websocket)
-        await self.broadcast_players_list_visibility(to_single_client=websocket)
-        await self.broadcast_extra_time_status(to_single_client=websocket)
-        await self.broadcast_match_info_visibility(to_single_client=websocket)
-        await self.broadcast_futsal_clock_status(to_single_client=websocket)
-        await self.broadcast_var_update(to_single_client=websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self._active_connections.remove(websocket)
+    # --- Live State (clock, visibility, VAR) for the match journal ---
+    def get_live_state(self) -> Dict[str, Any]:
+        return {
+            "clock": self._clock.get_state(),
+            "isFutsalClockOn": self._is_futsal_clock_on,
+            "lastSetFutsalTime": self._last_set_futsal_time,
+            "extraTimeMinutes": self._extra_time_minutes,
+            "isExtraTimeVisible": self._is_extra_time_visible,
+            "isGameReportVisible": self._is_game_report_visible,
+            "isScoreboardVisible": self._is_scoreboard_visible,
+            "isPlayersListAVisible": self._is_players_list_a_visible,
+            "isPlayersListBVisible": self._is_players_list_b_visible,
+            "isMatchInfoVisible": self._is_match_info_visible,
+            "var": dict(self._var_state),
+        }
 
-    async def _timer_loop(self):
-        while self._is_running:
-            await asyncio.sleep(1)
-            if self._is_futsal_clock_on:
-                if self._seconds > 0: self._seconds -= 1
-                else: self._seconds = 0; self.stop()
-            else:
-                self._seconds += 1
-            
-            config = data_manager.get_config()
-            for team in [config.teamA, config.teamB]:
-                for player in team.players:
-                    if player.onField:
-                        player.timeOnField += 1
-            
-            asyncio.create_task(data_manager.save_config())
+    def restore_live_state(self, state: Dict[str, Any], elapsed: float = 0.0):
+        """ Restore saved live state; a running clock resumes as if `elapsed` seconds had passed """
+        self._is_futsal_clock_on = state.get("isFutsalClockOn", False)
+        self._last_set_futsal_time = state.get("lastSetFutsalTime", 0)
+        self._extra_time_minutes = state.get("extraTimeMinutes", 0)
+        self._is_extra_time_visible = state.get("isExtraTimeVisible", False)
+        self._is_game_report_visible = state.get("isGameReportVisible", False)
+        self._is_scoreboard_visible = state.get("isScoreboardVisible", True)
+        self._is_players_list_a_visible = state.get("isPlayersListAVisible", False)
+        self._is_players_list_b_visible = state.get("isPlayersListBVisible", False)
+        self._is_match_info_visible = state.get("isMatchInfoVisible", False)
+        self._var_state.update(state.get("var", {}))
+        self._invalidate_snapshot()
+        if self._timer_task: self._timer_task.cancel(); self._timer_task = None
+        self._clock.restore(state.get("clock", {}), elapsed)
+        if self._clock.is_running: self._timer_task = asyncio.create_task(self._timer_loop(), name="match clock")
+
+    def _record(self, op: str):
+        if self.journal: self.journal.record("live", op, self.get_live_state(), played=self._clock.played())
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "clock": self.get_status(),
+            "config": {"version": self._config_version, "config": self.data_manager.get_config().model_dump()},
+            "style": self.data_manager.get_scoreboard_style().model_dump(),
+            "gameReport": self.get_game_report_status(),
+            "scoreboard": self.get_scoreboard_status(),
+            "playersList": self.get_players_list_status(),
+            "extraTime": self.get_extra_time_status(),
+            "matchInfo": self.get_match_info_visibility(),
+            "futsalClock": self.get_futsal_clock_status(),
+            "var": self.get_var_status(),
+            "report": self.data_manager.get_report(),
+        }
+
+    async def _load_snapshot_frame(self, topics: FrozenSet[str]) -> str:
+        snapshot = self._build_snapshot()
+        if topics != TOPICS: snapshot = {key: value for key, value in snapshot.items() if key == "type" or key in topics}
+        return encode_message(snapshot)
+
+    def build_snapshot_frame(self) -> str:
+        """ The full snapshot, built now (the cached one may be stale mid-broadcast) """
+        return encode_message(self._build_snapshot())
+
+    async def _broadcast(self, message: Dict[str, Any]):
+        # Every state change is broadcast, so this is where the connect snapshot goes stale
+        self._invalidate_snapshot()
+        # Serialize once, then hand the same frame to each subscriber (and worker process)
+        topic = MESSAGE_TOPICS[message["type"]]
+        if not self.has_subscribers(topic) and self.publisher is None and self.recorder is None: return
+        started = time.perf_counter()
+        frame = encode_message(message)
+        latest_key = message["type"] if message["type"] in LATEST_WINS_TYPES else None
+        if self.publisher is not None: self.publisher(topic, frame, latest_key)
+        if self.recorder is not None: self.recorder(topic, frame, latest_key)
+        self._fan_out(topic, frame, latest_key)
+        BROADCAST_SECONDS.labels(message["type"]).observe(time.perf_counter() - started)
+        BROADCAST_BYTES.labels(message["type"]).observe(len(frame))
+
+    def is_idle(self) -> bool:
+        # Nobody is watching and the clock is stopped
+        return not self.connection_count() and not self._clock.is_running
 
+    async def _timer_loop(self):
+        while self._clock.is_running:
+            # Sleep until the absolute instant the displayed second changes, so work done
+            # per tick (saving, broadcasting) never accumulates into drift
+            deadline = self._clock.next_tick_deadline()
+            await self._clock.sleep_until(deadline)
+            fired_at = self._clock.now()
+            self._clock.record_tick(deadline, fired_at)
+            TICK_LATENESS_SECONDS.observe(max(0.0, fired_at - deadline))
+            if self._is_futsal_clock_on and self._clock.value() <= 0:
+                self._clock.set(0); self.stop()
+            # Playing time is tracked as stints against the clock, so ticks do no per-player work
             await self.broadcast_time()
 
     async def broadcast_time(self):
-        message = {"type": "time", "seconds": self._seconds}
-        await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        now = self._clock.now()
+        # serverTime (monotonic) and exact let overlays interpolate between ticks
+        message = {"type": "time", "seconds": self._clock.seconds(now), "exact": round(self._clock.value(now), 3), "serverTime": round(now, 3)}
+        await self._broadcast(message)
 
     async def broadcast_status(self):
         status = self.get_status()
         message = {"type": "status", **status}
-        await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        await self._broadcast(message)
+
+    def get_config_message(self) -> Dict[str, Any]:
+        # Full snapshot tagged with the current version, for new clients and resyncs
+        return {"type": "config", "version": self._config_version, "config": self.data_manager.get_config().model_dump()}
 
-    async def broadcast_config(self, config: ScoreboardConfig):
-        message = {"type": "config", "config": config.model_dump()}
-        await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+    async def send_config_snapshot(self, websocket: WebSocket):
+        await self._send(websocket, self.get_config_message())
+
+    async def broadcast_config(self, config: ScoreboardConfig, urgent: bool = False):
+        current = config.model_dump()
+        if self._last_config is None:
+            self._config_version += 1
+            message = {"type": "config", "version": self._config_version, "config": current}
+        else:
+            ops = diff_config(self._last_config, current)
+            if not ops: return
+            base_version = self._config_version
+            self._config_version += 1
+            message = {"type": "config_patch", "baseVersion": base_version, "version": self._config_version, "ops": ops}
+        self._last_config = current
+        await self._broadcast(message)
+        # The game report only changes with the rosters, so most config changes leave it alone
+        if self.data_manager.report.version != self._report_version: await self.broadcast_report()
+        # Goals should not wait for the next frame
+        if urgent: self.flush_frames()
+
+    async def broadcast_report(self):
+        self._report_version = self.data_manager.report.version
+        await self._broadcast({"type": "report", "report": self.data_manager.get_report()})
     
     async def broadcast_scoreboard_style(self, style: ScoreboardStyleConfig):
         message = {"type": "scoreboard_style", "style": style.model_dump()}
-        await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        await self._broadcast(message)
+
+    async def _broadcast_current_style(self):
+        await self.broadcast_scoreboard_style(self.data_manager.get_scoreboard_style())
 
     async def broadcast_game_report_visibility(self, to_single_client: WebSocket | None = None):
         status = self.get_game_report_status()
         message = {"type": "game_report_visibility", **status}
-        if to_single_client: await to_single_client.send_json(message)
-        else: await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        if to_single_client: await self._send(to_single_client, message)
+        else: await self._broadcast(message)
 
     async def broadcast_scoreboard_visibility(self, to_single_client: WebSocket | None = None):
         status = self.get_scoreboard_status()
         message = {"type": "scoreboard_visibility", **status}
-        if to_single_client: await to_single_client.send_json(message)
-        else: await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        if to_single_client: await self._send(to_single_client, message)
+        else: await self._broadcast(message)
 
     # --- Updated Broadcast Method ---
     async def broadcast_players_list_visibility(self, to_single_client: WebSocket | None = None):
         status = self.get_players_list_status()
         message = {"type": "players_list_visibility", **status}
-        if to_single_client: await to_single_client.send_json(message)
-        else: await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        if to_single_client: await self._send(to_single_client, message)
+        else: await self._broadcast(message)
 
     async def broadcast_extra_time_status(self, to_single_client: WebSocket | None = None):
         status = self.get_extra_time_status()
         message = {"type": "extra_time_status", **status}
-        if to_single_client: await to_single_client.send_json(message)
-        else: await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        if to_single_client: await self._send(to_single_client, message)
+        else: await self._broadcast(message)
 
     async def broadcast_match_info_visibility(self, to_single_client: WebSocket | None = None):
         status = self.get_match_info_visibility()
         message = {"type": "match_info_visibility", **status}
-        if to_single_client: await to_single_client.send_json(message)
-        else: await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        if to_single_client: await self._send(to_single_client, message)
+        else: await self._broadcast(message)
             
     async def broadcast_futsal_clock_status(self, to_single_client: WebSocket | None = None):
         status = self.get_futsal_clock_status()
         message = {"type": "futsal_clock_status", **status}
-        if to_single_client: await to_single_client.send_json(message)
-        else: await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+        if to_single_client: await self._send(to_single_client, message)
+        else: await self._broadcast(message)
     
     async def broadcast_var_update(self, data: dict = None, to_single_client: WebSocket | None = None):
         if data:
             self._var_state.update(data)
+            self._record("var_update")
         
         message = {"type": "var_update", "data": self.get_var_status()}
         if to_single_client:
-            await to_single_client.send_json(message)
+            await self._send(to_single_client, message)
         else:
-            await asyncio.gather(*[client.send_json(message) for client in self._active_connections])
+            await self._broadcast(message)
 
     async def toggle_game_report(self):
         self._is_game_report_visible = not self._is_game_report_visible
-        print(f"Game report toggled: {'Visible' if self._is_game_report_visible else 'Hidden'}")
+        logger.debug("Game report toggled: %s", "Visible" if self._is_game_report_visible else "Hidden")
+        self._record("toggle_game_report")
         await self.broadcast_game_report_visibility()
         return self.get_game_report_status()
 
     async def toggle_scoreboard(self):
         self._is_scoreboard_visible = not self._is_scoreboard_visible
-        print(f"Scoreboard toggled: {'Visible' if self._is_scoreboard_visible else 'Hidden'}")
+        logger.debug("Scoreboard toggled: %s", "Visible" if self._is_scoreboard_visible else "Hidden")
+        self._record("toggle_scoreboard")
         await self.broadcast_scoreboard_visibility()
         return self.get_scoreboard_status()
 
     # --- New Methods for Players List ---
     async def toggle_players_list_a(self):
         self._is_players_list_a_visible = not self._is_players_list_a_visible
+        self._record("toggle_players_list_a")
         await self.broadcast_players_list_visibility()
         return self.get_players_list_status()
 
     async def toggle_players_list_b(self):
         self._is_players_list_b_visible = not self._is_players_list_b_visible
+        self._record("toggle_players_list_b")
         await self.broadcast_players_list_visibility()
         return self.get_players_list_status()
 
     async def set_players_list_visibility(self, visible_a: bool, visible_b: bool):
         self._is_players_list_a_visible = visible_a
         self._is_players_list_b_visible = visible_b
+        self._record("set_players_list_visibility")
         await self.broadcast_players_list_visibility()
         return self.get_players_list_status()
 
     async def toggle_extra_time_visibility(self):
         self._is_extra_time_visible = not self._is_extra_time_visible
-        print(f"Extra time toggled: {'Visible' if self._is_extra_time_visible else 'Hidden'}")
+        logger.debug("Extra time toggled: %s", "Visible" if self._is_extra_time_visible else "Hidden")
+        self._record("toggle_extra_time_visibility")
         await self.broadcast_extra_time_status()
         return self.get_extra_time_status()
         
     async def toggle_match_info_visibility(self):
         self._is_match_info_visible = not self._is_match_info_visible
-        print(f"Match info toggled: {'Visible' if self._is_match_info_visible else 'Hidden'}")
+        logger.debug("Match info toggled: %s", "Visible" if self._is_match_info_visible else "Hidden")
+        self._record("toggle_match_info_visibility")
         await self.broadcast_match_info_visibility()
         return self.get_match_info_visibility()
 
     def set_futsal_clock(self, is_on: bool):
-        if self._is_running: self.stop()
+        if self._clock.is_running: self.stop()
         self._is_futsal_clock_on = is_on
-        if is_on and self._seconds == 0:
-            self._seconds = self._last_set_futsal_time
+        self._clock.countdown = is_on
+        if is_on and self._clock.seconds() == 0:
+            self._clock.set(self._last_set_futsal_time)
             asyncio.create_task(self.broadcast_time())
-        elif not is_on and self._seconds == 0:
+        elif not is_on and self._clock.seconds() == 0:
              self._last_set_futsal_time = 0
+        self._record("set_futsal_clock")
         asyncio.create_task(self.broadcast_futsal_clock_status())
 
     def set_extra_time(self, minutes: int):
         self._extra_time_minutes = max(0, minutes)
+        self._record("set_extra_time")
         asyncio.create_task(self.broadcast_extra_time_status())
 
     def start(self):
-        if self._is_futsal_clock_on and self._seconds <= 0: return
-        if not self._is_running:
-            self._is_running = True
-            self._timer_task = asyncio.create_task(self._timer_loop())
+        if self._is_futsal_clock_on and self._clock.seconds() <= 0: return
+        if not self._clock.is_running:
+            self._clock.start()
+            self._record("timer_start")
+            self._timer_task = asyncio.create_task(self._timer_loop(), name="match clock")
             asyncio.create_task(self.broadcast_status())
 
+    async def close(self):
+        """ Stop ticking and disconnect every client, when the match is unloaded """
+        # A running clock stays running in the journal's final snapshot; the next load ticks it
+        if self._timer_task: self._timer_task.cancel(); self._timer_task = None
+        await self.close_connections()
+
     def stop(self):
-        if self._is_running:
-            self._is_running = False
-            if self._timer_task: self._timer_task.cancel(); self._timer_task = None
+        if self._clock.is_running:
+            self._clock.stop()
+            # Playing time stops here: fold it into timeOnField and get it written
+            self.data_manager.settle_time_on_field()
+            self.data_manager.mark_config_dirty()
+            self._record("timer_stop")
+            if self._timer_task and self._timer_task is not asyncio.current_task(): self._timer_task.cancel()
+            self._timer_task = None
             asyncio.create_task(self.broadcast_status())
+            # Push the settled timeOnField (and the report's minutes) now, not with the next change
+            asyncio.create_task(self.broadcast_config(self.data_manager.get_config()))
 
     def set_time(self, new_seconds: int):
-        self._seconds = max(0, new_seconds)
+        self._clock.set(new_seconds)
         if self._is_futsal_clock_on: self._last_set_futsal_time = new_seconds
+        self._record("timer_set")
         asyncio.create_task(self.broadcast_time())
 
-websocket_manager = WebSocketManager()
+websocket_manager = WebSocketManager(data_manager)
@@ -1,8 +1,8 @@
 // frontend/control_panel/pages/customization.ts
 import {
   getState,
-  saveScoreboardStyle,
-  saveLayout,
+  previewScoreboardStyle,
+  commitScoreboardStyle,
   saveMatchInfo,
   toggleMatchInfoVisibility,
   getPeriods,
@@ -11,7 +11,7 @@ import {
   unsubscribe,
   type PeriodSetting,
   type ScoreboardStyleOnly,
-  type LayoutConfig
+  type StylePreview
 } from '../stateManager';
 import { showNotification } from '../notification';
 import Sortable from 'sortablejs';
@@ -373,38 +373,49 @@ export function render(container: HTMLElement) {
         };
       
       
+        // Unsaved edits show on the overlays right away; only the save buttons store them
+        const preview = (change: StylePreview) => {
+          previewScoreboardStyle(change).catch(() => { /* logged by sendCommand */ });
+        };
+
         // --- Add Event Listeners ---
       
         // --- Scoreboard Style Listeners ---
         sbPrimaryInput.addEventListener('input', () => {
           isStyleUnsaved = true;
+          preview({ boxMainColor: sbPrimaryInput.value });
           sbPrimaryLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
         sbSecondaryInput.addEventListener('input', () => {
           isStyleUnsaved = true;
+          preview({ textMainColor: sbSecondaryInput.value });
           sbSecondaryLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
         sbTertiaryInput.addEventListener('input', () => {
           isStyleUnsaved = true;
+          preview({ textAltColor: sbTertiaryInput.value });
           sbTertiaryLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
         sbBoxBgAltInput.addEventListener('input', () => {
           isStyleUnsaved = true;
+          preview({ boxAltColor: sbBoxBgAltInput.value });
           sbBoxBgAltLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
         sbOpacitySlider.addEventListener('input', () => {
           isStyleUnsaved = true;
           sbOpacityValueSpan.textContent = `${sbOpacitySlider.value}%`;
+          preview({ opacity: parseInt(sbOpacitySlider.value, 10) });
           sbOpacityLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
         sbScaleSlider.addEventListener('input', () => {
           isStyleUnsaved = true;
           sbScaleValueSpan.textContent = `${sbScaleSlider.value}%`;
+          preview({ scale: parseInt(sbScaleSlider.value, 10) });
           sbScaleLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
@@ -412,11 +423,13 @@ export function render(container: HTMLElement) {
         // --- Layout Listeners ---
         timerPositionSelect.addEventListener('change', () => {
           isLayoutUnsaved = true;
+          preview({ timerPosition: timerPositionSelect.value as 'Under' | 'Right' });
           timerPositionLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
         redCardToggle.addEventListener('change', () => {
           isLayoutUnsaved = true;
+          preview({ showRedCardIndicators: redCardToggle.checked });
           redCardLabel.style.fontStyle = 'italic';
           updateUnsavedIndicators();
         });
@@ -445,7 +458,9 @@ export function render(container: HTMLElement) {
                 scale: parseInt(sbScaleSlider.value, 10),
               };
               
-              await saveScoreboardStyle(styleData);
+              // The values on screen, then one save of everything previewed
+              await previewScoreboardStyle(styleData);
+              await commitScoreboardStyle();
               
               isStyleUnsaved = false;
               updateUnsavedIndicators();
@@ -465,12 +480,13 @@ export function render(container: HTMLElement) {
         // Save Layout Button Listener
         saveLayoutBtn.addEventListener('click', async () => {
           try {
-            const layoutData: LayoutConfig = {
-              position: timerPositionSelect.value as 'Under' | 'Right',
+            const layoutData: StylePreview = {
+              timerPosition: timerPositionSelect.value as 'Under' | 'Right',
               showRedCardIndicators: redCardToggle.checked
             };
             
-            await saveLayout(layoutData);
+            await previewScoreboardStyle(layoutData);
+            await commitScoreboardStyle();
             
             isLayoutUnsaved = false;
             updateUnsavedIndicators();
@@ -11,6 +11,8 @@ import {
   addGoal,
   addCard,
   toggleOnField,
+  substitutePlayers,
+  getDisplayedSeconds,
   getPeriods, 
   setPeriod, 
   setPlayerToEdit,
@@ -35,7 +37,10 @@ function renderPlayerGrid(players: PlayerConfig[]): string {
   }).join('');
 }
 
-function renderContextMenu(player: PlayerConfig, team: 'teamA' | 'teamB', x: number, y: number) {
+function renderContextMenu(player: PlayerConfig, players: PlayerConfig[], x: number, y: number) {
+    // An on-field player can be swapped for anyone on the bench who has not been sent off
+    const bench = player.onField ? players.filter(p => !p.onField && p.redCards.length === 0) : [];
+    const substitutes = bench.map(p => `<div class="context-menu-item" data-action="substitute" data-number="${p.number}">Sub On #${p.number} ${p.name}</div>`).join('');
     const menu = document.createElement('div');
     menu.id = 'player-context-menu';
     menu.className = 'context-menu';
@@ -47,6 +52,7 @@ function renderContextMenu(player: PlayerConfig, team: 'teamA' | 'teamB', x: num
             <span>On Field</span>
             <span class="status">${player.onField ? '✅' : '❌'}</span>
         </div>
+        ${substitutes ? `<div class="context-menu-separator"></div>${substitutes}` : ''}
         <div class="context-menu-separator"></div>
         <div class="context-menu-item" data-action="add-goal">Add Goal</div>
         <div class="context-menu-item" data-action="add-own-goal">Add Own Goal</div>
@@ -222,6 +228,21 @@ export function render(container: HTMLElement) {
       }
   };
 
+  // --- Calculate Reg/Add Time for UI ---
+  // Between server ticks the clock runs on locally, so a late or coalesced tick does not freeze it
+  const renderClock = () => {
+    const totalSeconds = getDisplayedSeconds();
+    const limitSeconds = currentPeriodLimit * 60;
+    if (totalSeconds <= limitSeconds) {
+        timerMainEl.textContent = formatTime(totalSeconds);
+        timerAddEl.textContent = "+ 00:00";
+    } else {
+        timerMainEl.textContent = formatTime(limitSeconds);
+        timerAddEl.textContent = `+ ${formatTime(totalSeconds - limitSeconds)}`;
+    }
+  };
+  const clockInterval = window.setInterval(() => { if (getState().timer.isRunning) renderClock(); }, 100);
+
   const updateUI = () => {
     const { config, timer, extraTime } = getState();
     if (config) {
@@ -237,17 +258,8 @@ export function render(container: HTMLElement) {
       playerGridB.innerHTML = renderPlayerGrid(config.teamB.players);
       if (allPeriods.length > 0 && periodSelect.value !== config.currentPeriod) { periodSelect.value = config.currentPeriod; updateEndTimeLabel(); }
     }
-    
-    // --- Calculate Reg/Add Time for UI ---
-    const totalSeconds = timer.seconds;
-    const limitSeconds = currentPeriodLimit * 60;
-    if (totalSeconds <= limitSeconds) {
-        timerMainEl.textContent = formatTime(totalSeconds);
-        timerAddEl.textContent = "+ 00:00";
-    } else {
-        timerMainEl.textContent = formatTime(limitSeconds);
-        timerAddEl.textContent = `+ ${formatTime(totalSeconds - limitSeconds)}`;
-    }
+
+    renderClock();
 
     if (startStopToggle) { if (timer.isRunning) { startStopToggle.textContent = 'Stop'; startStopToggle.classList.remove('btn-green'); startStopToggle.classList.add('btn-red'); } else { startStopToggle.textContent = 'Start'; startStopToggle.classList.remove('btn-red'); startStopToggle.classList.add('btn-green'); } }
     if (extraTimeActionBtn) { if (document.activeElement !== extraTimeInput) { extraTimeInput.value = extraTime.minutes.toString(); } if (extraTime.isVisible) { extraTimeActionBtn.textContent = 'Showing'; extraTimeActionBtn.classList.remove('btn-secondary'); extraTimeActionBtn.classList.add('btn-green'); } else { extraTimeActionBtn.textContent = 'Set and Show'; extraTimeActionBtn.classList.remove('btn-green'); extraTimeActionBtn.classList.add('btn-secondary'); } }
@@ -279,10 +291,11 @@ export function render(container: HTMLElement) {
         const { config, timer } = getState();
         if (!config) return;
 
-        const player = (team === 'teamA' ? config.teamA.players : config.teamB.players).find(p => p.number === number);
+        const players = team === 'teamA' ? config.teamA.players : config.teamB.players;
+        const player = players.find(p => p.number === number);
         if (!player) return;
 
-        const menu = renderContextMenu(player, team, e.clientX, e.clientY);
+        const menu = renderContextMenu(player, players, e.clientX, e.clientY);
 
         menu.addEventListener('click', async (menuEvent) => {
             const actionTarget = menuEvent.target as HTMLElement;
@@ -309,6 +322,17 @@ export function render(container: HTMLElement) {
                     await toggleOnField(team, number);
                     showNotification(`Toggled on-field status for #${number}`);
                     break;
+                case 'substitute': {
+                    const inNumber = parseInt(actionElement.getAttribute('data-number') || '', 10);
+                    if (isNaN(inNumber)) break;
+                    try {
+                        await substitutePlayers(team, number, inNumber);
+                        showNotification(`#${inNumber} on for #${number}`);
+                    } catch (err) {
+                        showNotification(`Substitution failed: ${(err as Error).message}`, 'error');
+                    }
+                    break;
+                }
                 case 'add-goal':
                     await addGoal(team, number, regMinute, addMinute, false, false);
                     showNotification(`Goal for #${number}`);
@@ -425,6 +449,7 @@ export function render(container: HTMLElement) {
 
   return () => {
     unsubscribe(updateUI);
+    window.clearInterval(clockInterval);
     controllerGrid.removeEventListener('click', handleGridClick as EventListener);
     controllerGrid.removeEventListener('mouseover', handleGridMouseOver);
     controllerGrid.removeEventListener('mouseout', handleGridMouseOut);
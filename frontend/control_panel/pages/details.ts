@@ -3,74 +3,28 @@ import {
   getState,
   subscribe,
   unsubscribe,
-  type PlayerConfig,
-  type Goal, 
+  type ReportEvent,
 } from '../stateManager';
 
-function formatGoalTime(g: Goal): string {
-  return g.addMinute > 0 ? `${g.regMinute}+${g.addMinute}'` : `${g.regMinute}'`;
+function formatEventTime(e: ReportEvent): string {
+  return e.addMinute > 0 ? `${e.regMinute}+${e.addMinute}'` : `${e.regMinute}'`;
 }
 
-function renderGoalList(
-  teamPlayers: PlayerConfig[], 
-  opponentPlayers: PlayerConfig[]
-): string {
-  
-  const teamGoals = teamPlayers.flatMap(p => 
-    p.goals
-      .filter(g => !g.isOwnGoal) 
-      .map(g => ({ 
-        goal: g,
-        playerName: p.name, 
-        playerNumber: p.number, 
-        type: 'Goal' 
-      }))
-  );
-
-  const opponentOwnGoals = opponentPlayers.flatMap(p => 
-    p.goals
-      .filter(g => g.isOwnGoal) 
-      .map(g => ({ 
-        goal: g,
-        playerName: p.name, 
-        playerNumber: p.number, 
-        type: 'Own Goal' 
-      }))
-  );
-
-  const allScoringEvents = [...teamGoals, ...opponentOwnGoals].sort((a, b) => {
-    if (a.goal.regMinute !== b.goal.regMinute) return a.goal.regMinute - b.goal.regMinute;
-    return a.goal.addMinute - b.goal.addMinute;
-  });
-
-  if (allScoringEvents.length === 0) {
+// The backend keeps the report's goal lists and timeline sorted; pages only render them
+function renderGoalList(goals: ReportEvent[]): string {
+  if (goals.length === 0) {
     return '<p class="no-goals-text">No goals yet.</p>';
   }
 
-  return allScoringEvents.map(event => `
+  return goals.map(event => `
     <div class="goal-scorer-row">
       <span class="player-number">#${event.playerNumber}</span>
       <span class="player-name">${event.playerName} ${event.type === 'Own Goal' ? '(OG)' : ''}</span>
-      <span class="goal-minutes">${formatGoalTime(event.goal)}</span>
+      <span class="goal-minutes">${formatEventTime(event)}</span>
     </div>
   `).join('');
 }
 
-interface TimelineEvent {
-  regMinute: number;
-  addMinute: number;
-  type: 'Goal' | 'Own Goal' | 'Yellow' | 'Red';
-  playerName: string;
-  playerNumber: number;
-  visualTeam: 'teamA' | 'teamB'; 
-}
-
-function getEventPriority(type: string): number {
-  if (type === 'Red') return 3;
-  if (type === 'Yellow') return 2;
-  return 1; 
-}
-
 function getEventIcon(type: string): string {
   switch (type) {
     case 'Goal': return '⚽';
@@ -81,56 +35,20 @@ function getEventIcon(type: string): string {
   }
 }
 
-function renderTimeline(
-  teamAPlayers: PlayerConfig[], 
-  teamBPlayers: PlayerConfig[]
-): string {
-  const events: TimelineEvent[] = [];
-
-  // 1. Gather Team A Events
-  teamAPlayers.forEach(p => {
-    p.goals.forEach(g => {
-      if (g.isOwnGoal) {
-        events.push({ regMinute: g.regMinute, addMinute: g.addMinute, type: 'Own Goal', playerName: p.name, playerNumber: p.number, visualTeam: 'teamB' });
-      } else {
-        events.push({ regMinute: g.regMinute, addMinute: g.addMinute, type: 'Goal', playerName: p.name, playerNumber: p.number, visualTeam: 'teamA' });
-      }
-    });
-    // --- Updated for Card Objects ---
-    p.yellowCards.forEach(c => events.push({ regMinute: c.regMinute, addMinute: c.addMinute, type: 'Yellow', playerName: p.name, playerNumber: p.number, visualTeam: 'teamA' }));
-    p.redCards.forEach(c => events.push({ regMinute: c.regMinute, addMinute: c.addMinute, type: 'Red', playerName: p.name, playerNumber: p.number, visualTeam: 'teamA' }));
-  });
-
-  // 2. Gather Team B Events
-  teamBPlayers.forEach(p => {
-    p.goals.forEach(g => {
-      if (g.isOwnGoal) {
-        events.push({ regMinute: g.regMinute, addMinute: g.addMinute, type: 'Own Goal', playerName: p.name, playerNumber: p.number, visualTeam: 'teamA' });
-      } else {
-        events.push({ regMinute: g.regMinute, addMinute: g.addMinute, type: 'Goal', playerName: p.name, playerNumber: p.number, visualTeam: 'teamB' });
-      }
-    });
-    // --- Updated for Card Objects ---
-    p.yellowCards.forEach(c => events.push({ regMinute: c.regMinute, addMinute: c.addMinute, type: 'Yellow', playerName: p.name, playerNumber: p.number, visualTeam: 'teamB' }));
-    p.redCards.forEach(c => events.push({ regMinute: c.regMinute, addMinute: c.addMinute, type: 'Red', playerName: p.name, playerNumber: p.number, visualTeam: 'teamB' }));
-  });
-
-  if (events.length === 0) {
+function renderTimeline(timeline: ReportEvent[]): string {
+  if (timeline.length === 0) {
     return '<div class="no-events-text">Match started - No events yet</div>';
   }
 
-  events.sort((a, b) => {
-    if (b.regMinute !== a.regMinute) return b.regMinute - a.regMinute;
-    if (b.addMinute !== a.addMinute) return b.addMinute - a.addMinute;
-    return getEventPriority(b.type) - getEventPriority(a.type);
-  });
+  // Chronological from the backend; newest first here
+  const events = [...timeline].reverse();
 
   return `
     <div class="timeline-wrapper">
       <div class="timeline-line"></div>
       ${events.map(e => {
-        const isLeft = e.visualTeam === 'teamA';
-        const timeString = e.addMinute > 0 ? `${e.regMinute}+${e.addMinute}'` : `${e.regMinute}'`;
+        const isLeft = e.side === 'teamA';
+        const timeString = formatEventTime(e);
         
         const contentHtml = `
           <div class="timeline-event-content">
@@ -203,14 +121,16 @@ export function render(container: HTMLElement) {
 
 
   const updateUI = () => {
-    const { config } = getState();
+    const { config, report } = getState();
     
     if (config) {
       reportHeaderA.textContent = config.teamA.name;
       reportHeaderB.textContent = config.teamB.name;
-      reportListA.innerHTML = renderGoalList(config.teamA.players, config.teamB.players);
-      reportListB.innerHTML = renderGoalList(config.teamB.players, config.teamA.players);
-      timelineContainer.innerHTML = renderTimeline(config.teamA.players, config.teamB.players);
+    }
+    if (report) {
+      reportListA.innerHTML = renderGoalList(report.teamA.goals);
+      reportListB.innerHTML = renderGoalList(report.teamB.goals);
+      timelineContainer.innerHTML = renderTimeline(report.timeline);
     }
   };
 
@@ -20,11 +20,15 @@ export interface PeriodSettingsData {
 export interface TimerStatus {
     isRunning: boolean;
     seconds: number;
+    exact?: number;       // Server's exact clock value at the last tick, status or snapshot
+    receivedAt?: number;  // performance.now() when that arrived
 }
 export interface ExtraTimeStatus { minutes: number; isVisible: boolean; }
 export interface ScoreboardStyleConfig { boxMainColor: string; textMainColor: string; textAltColor: string; boxAltColor: string; opacity: number; scale: number; matchInfo: string; timerPosition: "Under" | "Right"; showRedCardIndicators: boolean; }
 export type ScoreboardStyleOnly = Omit<ScoreboardStyleConfig, 'matchInfo' | 'timerPosition' | 'showRedCardIndicators'>;
 export interface LayoutConfig { position: "Under" | "Right"; showRedCardIndicators: boolean; }
+// Live style/layout tweaks: shown on the overlays at once, saved by the backend on commit
+export type StylePreview = Partial<Omit<ScoreboardStyleConfig, 'matchInfo'>>;
 
 export interface Shortcut {
     action_id: string;
@@ -32,6 +36,23 @@ export interface Shortcut {
     key: string | null;
 }
 
+export interface ConfigPatchOp {
+    op: 'add' | 'remove' | 'replace';
+    path: string;
+    value?: unknown;
+}
+
+export interface BatchOperation {
+    op: string;
+    data: object;
+}
+
+export interface BatchResult {
+    op: string;
+    ok: boolean;
+    error?: string;
+}
+
 export interface VarState {
     isVisible: boolean;
     scenario: string;
@@ -39,8 +60,32 @@ export interface VarState {
     decision: string;
 }
 
+// --- Game Report (maintained by the backend; mirrors match_report.py) ---
+export interface ReportEvent {
+    regMinute: number;
+    addMinute: number;
+    type: 'Goal' | 'Own Goal' | 'Yellow' | 'Red';
+    team: 'teamA' | 'teamB';
+    side: 'teamA' | 'teamB';
+    playerNumber: number;
+    playerName: string;
+    isPenalty: boolean;
+}
+export interface ReportPlayer { number: number; name: string; onField: boolean; timeOnField: number; goals: number; ownGoals: number; yellowCards: number; redCards: number; }
+export interface TeamReport { goals: ReportEvent[]; cards: ReportEvent[]; players: ReportPlayer[]; }
+export interface GameReport { version: number; timeline: ReportEvent[]; teamA: TeamReport; teamB: TeamReport; }
+
 const API_URL = 'http://localhost:8000';
-const WS_URL = 'ws://localhost:8000/ws';
+const PAGE_PARAMS = new URLSearchParams(window.location.search);
+// One backend can host several matches; pages pick one with ?match=pitch2 (default match otherwise)
+const MATCH_ID = PAGE_PARAMS.get('match');
+// Browser sources can limit what they receive, e.g. overlay/index.html?topics=var,config
+const WS_TOPICS = PAGE_PARAMS.get('topics');
+const WS_URL = `ws://localhost:8000/ws${MATCH_ID ? `/${encodeURIComponent(MATCH_ID)}` : ''}${WS_TOPICS ? `?topics=${encodeURIComponent(WS_TOPICS)}` : ''}`;
+
+function apiUrl(endpoint: string) {
+  return `${API_URL}${MATCH_ID ? endpoint.replace(/^\/api\//, `/api/matches/${encodeURIComponent(MATCH_ID)}/`) : endpoint}`;
+}
 
 let appState: {
   config: ScoreboardConfig | null;
@@ -64,6 +109,7 @@ let appState: {
   playerToEdit: { team: 'teamA' | 'teamB', number: number } | null;
   isTeamInfoCollapsed: boolean;
   varState: VarState;
+  report: GameReport | null;
 } = {
   config: null,
   timer: { isRunning: false, seconds: 0 },
@@ -86,6 +132,7 @@ let appState: {
   playerToEdit: null,
   isTeamInfoCollapsed: false,
   varState: { isVisible: false, scenario: '', message: '', decision: '' },
+  report: null,
 };
 
 export const stateEmitter = new EventTarget();
@@ -111,6 +158,119 @@ function updateExtraTimeStatus(status: ExtraTimeStatus) { appState.extraTime = s
 function updateMatchInfoVisibility(isVisible: boolean) { appState.isMatchInfoVisible = isVisible; stateEmitter.dispatchEvent(new CustomEvent(STATE_UPDATE_EVENT)); }
 function updateFutsalClockStatus(isOn: boolean) { appState.isFutsalClockOn = isOn; stateEmitter.dispatchEvent(new CustomEvent(STATE_UPDATE_EVENT)); }
 function updateVarState(newVarState: VarState) { appState.varState = newVarState; stateEmitter.dispatchEvent(new CustomEvent(STATE_UPDATE_EVENT)); }
+function updateReport(report: GameReport) { appState.report = report; stateEmitter.dispatchEvent(new CustomEvent(STATE_UPDATE_EVENT)); }
+
+// --- Versioned Config Deltas ---
+// Player paths are keyed by shirt number: /teamA/players/10/onField
+let configVersion = 0;
+let isAwaitingResync = false;
+
+function applyConfigOp(config: ScoreboardConfig, op: ConfigPatchOp) {
+  const segments = op.path.split('/').slice(1);
+  if ((segments[0] === 'teamA' || segments[0] === 'teamB') && segments[1] === 'players' && segments.length >= 3) {
+    const players = config[segments[0]].players;
+    const number = Number(segments[2]);
+    const index = players.findIndex(p => p.number === number);
+    if (segments.length === 3) {
+      if (index !== -1) players.splice(index, 1);
+      if (op.op !== 'remove') { players.push(op.value as PlayerConfig); players.sort((a, b) => a.number - b.number); }
+    } else if (index !== -1) {
+      (players[index] as unknown as Record<string, unknown>)[segments[3]] = op.value;
+    }
+    return;
+  }
+  let target = config as unknown as Record<string, unknown>;
+  for (const key of segments.slice(0, -1)) target = target[key] as Record<string, unknown>;
+  target[segments[segments.length - 1]] = op.value;
+}
+
+function handleConfigMessage(message: { version?: number; config: ScoreboardConfig }) {
+  configVersion = message.version ?? 0;
+  isAwaitingResync = false;
+  updateConfig(message.config);
+}
+
+function handleConfigPatch(ws: WebSocket, message: { baseVersion: number; version: number; ops: ConfigPatchOp[] }) {
+  if (isAwaitingResync) return;
+  // Already contained in a newer snapshot (patches queued for the next frame can follow one)
+  if (appState.config && message.version <= configVersion) return;
+  if (!appState.config || message.baseVersion !== configVersion) {
+    // Missed an update: ask the server for a full snapshot
+    isAwaitingResync = true;
+    ws.send(JSON.stringify({ type: 'resync' }));
+    return;
+  }
+  message.ops.forEach(op => applyConfigOp(appState.config!, op));
+  configVersion = message.version;
+  updateConfig(appState.config);
+}
+
+// --- Connect Snapshot ---
+// Sent once when the socket opens; carries the live state for every subscribed topic in one message
+interface SnapshotMessage {
+  type: 'snapshot';
+  clock?: TimerStatus;
+  config?: { version: number; config: ScoreboardConfig };
+  style?: ScoreboardStyleConfig;
+  gameReport?: { isVisible: boolean };
+  scoreboard?: { isVisible: boolean };
+  playersList?: { isVisibleA: boolean; isVisibleB: boolean };
+  extraTime?: ExtraTimeStatus;
+  matchInfo?: { isVisible: boolean };
+  futsalClock?: { isOn: boolean };
+  var?: VarState;
+  report?: GameReport;
+}
+
+function applySnapshot(snapshot: SnapshotMessage) {
+  // A new interpolation base: the previous one may be from before a reconnect
+  if (snapshot.clock) appState.timer = { ...snapshot.clock, receivedAt: performance.now() };
+  if (snapshot.config) {
+    configVersion = snapshot.config.version;
+    isAwaitingResync = false;
+    appState.config = snapshot.config.config;
+  }
+  if (snapshot.style) appState.scoreboardStyle = snapshot.style;
+  if (snapshot.gameReport) appState.isGameReportVisible = snapshot.gameReport.isVisible;
+  if (snapshot.scoreboard) appState.isScoreboardVisible = snapshot.scoreboard.isVisible;
+  if (snapshot.playersList) {
+    appState.isPlayersListVisibleA = snapshot.playersList.isVisibleA;
+    appState.isPlayersListVisibleB = snapshot.playersList.isVisibleB;
+    appState.isPlayersListVisible = snapshot.playersList.isVisibleA || snapshot.playersList.isVisibleB;
+  }
+  if (snapshot.extraTime) appState.extraTime = snapshot.extraTime;
+  if (snapshot.matchInfo) appState.isMatchInfoVisible = snapshot.matchInfo.isVisible;
+  if (snapshot.futsalClock) appState.isFutsalClockOn = snapshot.futsalClock.isOn;
+  if (snapshot.var) appState.varState = snapshot.var;
+  if (snapshot.report) appState.report = snapshot.report;
+  stateEmitter.dispatchEvent(new CustomEvent(STATE_UPDATE_EVENT));
+}
+
+// --- Server Messages ---
+// Everything the backend sends over /ws, discriminated by `type` (mirrors websocket_manager.py and commands.py)
+type ServerMessage =
+  | { type: 'frame'; messages: ServerMessage[] }
+  | SnapshotMessage
+  | { type: 'time'; seconds: number; exact: number; serverTime: number }
+  | { type: 'status'; isRunning: boolean; seconds: number; exact?: number }
+  | { type: 'config'; version?: number; config: ScoreboardConfig }
+  | { type: 'config_patch'; baseVersion: number; version: number; ops: ConfigPatchOp[] }
+  | { type: 'scoreboard_style'; style: ScoreboardStyleConfig }
+  | { type: 'period_settings'; settings: PeriodSettingsData }
+  | { type: 'game_report_visibility'; isVisible: boolean }
+  | { type: 'scoreboard_visibility'; isVisible: boolean }
+  | { type: 'players_list_visibility'; isVisibleA: boolean; isVisibleB: boolean }
+  | ({ type: 'extra_time_status' } & ExtraTimeStatus)
+  | { type: 'match_info_visibility'; isVisible: boolean }
+  | { type: 'futsal_clock_status'; isOn: boolean }
+  | { type: 'var_update'; data: VarState }
+  | { type: 'report'; report: GameReport }
+  | CommandReply;
+
+// Reply to a command sent over the socket; batch failures carry per-operation results
+type CommandReply =
+  | { type: 'ack'; id: number; result: unknown }
+  | { type: 'error'; id: number; error: string; results?: BatchResult[] };
 
 // --- New Helper for Shortcuts ---
 function updateShortcuts(shortcuts: Shortcut[]) {
@@ -120,36 +280,83 @@ function updateShortcuts(shortcuts: Shortcut[]) {
 
 async function post(endpoint: string, body: object) {
   try {
-    const response = await fetch(`${API_URL}${endpoint}`, { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) });
-    if (!response.ok) { const errData = await response.json(); throw new Error(errData.detail || 'An API error occurred'); }
+    const response = await fetch(apiUrl(endpoint), { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify(body) });
+    if (!response.ok) { const errData = await response.json(); throw new Error(errData.detail?.message || errData.detail || 'An API error occurred'); }
     return await response.json();
   } catch (error) { console.error(`Error in POST ${endpoint}:`, error); throw error; }
 }
 
+// --- WebSocket Command Channel ---
+// Control actions go over the open socket; REST is the fallback while it is down
+const COMMAND_TIMEOUT_MS = 5000;
+let socket: WebSocket | null = null;
+let nextCommandId = 1;
+interface PendingCommand {
+  resolve: (result: unknown) => void;
+  reject: (error: Error) => void;
+  timer: number;
+}
+const pendingCommands = new Map<number, PendingCommand>();
+
+function settleCommand(message: CommandReply) {
+  const pending = pendingCommands.get(message.id);
+  if (!pending) return;
+  pendingCommands.delete(message.id);
+  clearTimeout(pending.timer);
+  if (message.type === 'ack') pending.resolve(message.result);
+  else pending.reject(new Error(message.error || 'Command failed'));
+}
+
+function rejectPendingCommands(reason: string) {
+  pendingCommands.forEach(pending => { clearTimeout(pending.timer); pending.reject(new Error(reason)); });
+  pendingCommands.clear();
+}
+
+async function sendCommand(command: string, data: object, fallbackEndpoint: string) {
+  if (!socket || socket.readyState !== WebSocket.OPEN) return post(fallbackEndpoint, data);
+  const id = nextCommandId++;
+  const ws = socket;
+  return new Promise<unknown>((resolve, reject) => {
+    const timer = window.setTimeout(() => { pendingCommands.delete(id); reject(new Error(`Command ${command} timed out`)); }, COMMAND_TIMEOUT_MS);
+    pendingCommands.set(id, { resolve, reject, timer });
+    ws.send(JSON.stringify({ type: 'command', id, command, data }));
+  }).catch(error => { console.error(`Error in command ${command}:`, error); throw error; });
+}
+
 function connectWebSocket() {
   const ws = new WebSocket(WS_URL);
-  ws.onopen = () => { console.log('WebSocket connected'); updateConnectionStatus(true); };
-  ws.onmessage = (event) => {
-    const message = JSON.parse(event.data);
-    if (message.type === 'time') updateTimer({ seconds: message.seconds });
-    else if (message.type === 'status') updateTimer({ isRunning: message.isRunning, seconds: message.seconds });
-    else if (message.type === 'config') updateConfig(message.config as ScoreboardConfig);
-    else if (message.type === 'scoreboard_style') updateScoreboardStyle(message.style as ScoreboardStyleConfig);
-    else if (message.type === 'period_settings') updatePeriods(message.settings as PeriodSettingsData);
-    else if (message.type === 'game_report_visibility') updateGameReportVisibility(message.isVisible as boolean);
-    else if (message.type === 'scoreboard_visibility') updateScoreboardVisibility(message.isVisible as boolean);
-    else if (message.type === 'players_list_visibility') updatePlayersListVisibility(message);
-    else if (message.type === 'extra_time_status') updateExtraTimeStatus(message as ExtraTimeStatus);
-    else if (message.type === 'match_info_visibility') updateMatchInfoVisibility(message.isVisible as boolean);
-    else if (message.type === 'futsal_clock_status') updateFutsalClockStatus(message.isOn as boolean);
-    else if (message.type === 'var_update') updateVarState(message.data as VarState);
-  };
-  ws.onclose = () => { console.log('WS disconnected'); updateConnectionStatus(false); setTimeout(connectWebSocket, 3000); };
+  socket = ws;
+  ws.onopen = () => { console.log('WebSocket connected'); isAwaitingResync = false; updateConnectionStatus(true); };
+  ws.onmessage = (event) => handleMessage(ws, JSON.parse(event.data) as ServerMessage);
+  ws.onclose = () => { console.log('WS disconnected'); if (socket === ws) socket = null; rejectPendingCommands('Connection closed'); updateConnectionStatus(false); setTimeout(connectWebSocket, 3000); };
   ws.onerror = (error) => { console.error('WS error:', error); updateConnectionStatus(false); ws.close(); };
 }
 
+function handleMessage(ws: WebSocket, message: ServerMessage) {
+    switch (message.type) {
+      // The server sends updates that happen close together as one frame
+      case 'frame': message.messages.forEach(inner => handleMessage(ws, inner)); break;
+      case 'snapshot': applySnapshot(message); break;
+      case 'time': updateTimer({ seconds: message.seconds, exact: message.exact, receivedAt: performance.now() }); break;
+      case 'status': updateTimer({ isRunning: message.isRunning, seconds: message.seconds, exact: message.exact, receivedAt: performance.now() }); break;
+      case 'config': handleConfigMessage(message); break;
+      case 'config_patch': handleConfigPatch(ws, message); break;
+      case 'scoreboard_style': updateScoreboardStyle(message.style); break;
+      case 'period_settings': updatePeriods(message.settings); break;
+      case 'game_report_visibility': updateGameReportVisibility(message.isVisible); break;
+      case 'scoreboard_visibility': updateScoreboardVisibility(message.isVisible); break;
+      case 'players_list_visibility': updatePlayersListVisibility(message); break;
+      case 'extra_time_status': updateExtraTimeStatus({ minutes: message.minutes, isVisible: message.isVisible }); break;
+      case 'match_info_visibility': updateMatchInfoVisibility(message.isVisible); break;
+      case 'futsal_clock_status': updateFutsalClockStatus(message.isOn); break;
+      case 'var_update': updateVarState(message.data); break;
+      case 'report': updateReport(message.report); break;
+      case 'ack': case 'error': settleCommand(message); break;
+    }
+}
+
 export async function sendVarUpdate(varData: Partial<VarState>) {
-    await post('/api/var-update', varData);
+    await sendCommand('var_update', varData, '/api/var-update');
 }
 
 export async function initStateManager() {
@@ -168,6 +375,20 @@ export async function initStateManager() {
 }
 
 export function getState() { return appState; }
+
+// Sub-second clock value between server ticks, for smooth timer rendering
+export function getInterpolatedSeconds(): number {
+  const { isRunning, seconds, exact, receivedAt } = appState.timer;
+  if (exact === undefined || receivedAt === undefined) return seconds;
+  if (!isRunning) return exact;
+  const elapsed = (performance.now() - receivedAt) / 1000;
+  return appState.isFutsalClockOn ? Math.max(0, exact - elapsed) : exact + elapsed;
+}
+// Whole seconds to show, rounded like the server does: a countdown shows the current second until it ends
+export function getDisplayedSeconds(): number {
+  const value = getInterpolatedSeconds();
+  return appState.isFutsalClockOn ? Math.ceil(value - 1e-9) : Math.floor(value + 1e-9);
+}
 export function subscribe(callback: (event: Event) => void) { stateEmitter.addEventListener(STATE_UPDATE_EVENT, callback); }
 export function unsubscribe(callback: (event: Event) => void) { stateEmitter.removeEventListener(STATE_UPDATE_EVENT, callback); }
 export function setAutoAddScore(isOn: boolean) { appState.isAutoAddScoreOn = isOn; localStorage.setItem('autoAddScore', isOn ? 'true' : 'false'); }
@@ -190,9 +411,9 @@ export function getPlayerToEdit() {
     return player;
 }
 
-// ... (Other functions: timerControls, setFutsalClock, getPeriods, setPeriod, setExtraTime, toggleExtraTimeVisibility, setScore, saveTeamInfo, saveColors, saveScoreboardStyle, saveMatchInfo, saveLayout, toggleGameReport, toggleScoreboard, toggleMatchInfoVisibility, togglePlayersListA, togglePlayersListB, setPlayersListVisibility, addPlayer, replacePlayer, clearPlayerList, deletePlayer, addGoal, addCard, toggleOnField, editPlayer, resetTeamStats, downloadJson, getRawJson, uploadJson - ALL UNCHANGED) ...
-export const timerControls = { start: () => post('/api/timer/start', {}), stop: () => post('/api/timer/stop', {}), set: (seconds: number) => post('/api/timer/set', { seconds }) };
-export async function setFutsalClock(isOn: boolean) { await post('/api/timer/futsal-toggle', { is_on: isOn }); }
+// ... (Other functions: timerControls, setFutsalClock, getPeriods, setPeriod, setExtraTime, toggleExtraTimeVisibility, setScore, saveTeamInfo, saveColors, saveMatchInfo, toggleGameReport, toggleScoreboard, toggleMatchInfoVisibility, togglePlayersListA, togglePlayersListB, setPlayersListVisibility, addPlayer, replacePlayer, clearPlayerList, deletePlayer, addGoal, addCard, toggleOnField, editPlayer, resetTeamStats, downloadJson, getRawJson, uploadJson - ALL UNCHANGED) ...
+export const timerControls = { start: () => sendCommand('timer_start', {}, '/api/timer/start'), stop: () => sendCommand('timer_stop', {}, '/api/timer/stop'), set: (seconds: number) => sendCommand('timer_set', { seconds }, '/api/timer/set') };
+export async function setFutsalClock(isOn: boolean) { await sendCommand('futsal_toggle', { is_on: isOn }, '/api/timer/futsal-toggle'); }
 
 export async function getPeriods(forceRefetch = false): Promise<PeriodSettingsData> {
     if (!forceRefetch && appState.periods && appState.isPeriodAscending !== null) {
@@ -203,7 +424,7 @@ export async function getPeriods(forceRefetch = false): Promise<PeriodSettingsDa
     }
 
     try {
-        const response = await fetch(`${API_URL}/api/periods-settings`);
+        const response = await fetch(apiUrl('/api/periods-settings'));
         if (!response.ok) {
             throw new Error("Failed to fetch period settings");
         }
@@ -221,44 +442,50 @@ export async function savePeriods(periods: PeriodSetting[], isAscending: boolean
     // After saving, update the state to reflect the changes
     updatePeriods({ periods, is_ascending: isAscending });
 }
-export async function setPeriod(name: string) { await post('/api/period', { name }); }
-export async function setExtraTime(minutes: number) { await post('/api/extra-time/set', { minutes }); }
-export async function toggleExtraTimeVisibility() { await post('/api/extra-time/toggle', {}); }
-export async function setScore(team: 'teamA' | 'teamB', score: number) { await post('/api/score/set', { team, score }); }
+export async function setPeriod(name: string) { await sendCommand('period_set', { name }, '/api/period'); }
+export async function setExtraTime(minutes: number) { await sendCommand('extra_time_set', { minutes }, '/api/extra-time/set'); }
+export async function toggleExtraTimeVisibility() { await sendCommand('extra_time_toggle', {}, '/api/extra-time/toggle'); }
+export async function setScore(team: 'teamA' | 'teamB', score: number) { await sendCommand('score_set', { team, score }, '/api/score/set'); }
 export async function saveTeamInfo(teamA: object, teamB: object) { await post('/api/team-info', { teamA, teamB }); }
 export async function saveColors(teamA: object, teamB: object) { await post('/api/customization', { teamA, teamB }); }
-export async function saveScoreboardStyle(style: ScoreboardStyleOnly) { await post('/api/scoreboard-style', style); }
+export async function previewScoreboardStyle(preview: StylePreview) { await sendCommand('scoreboard_style_preview', preview, '/api/scoreboard-style/preview'); }
+export async function commitScoreboardStyle() { await sendCommand('scoreboard_style_commit', {}, '/api/scoreboard-style/commit'); }
 export async function saveMatchInfo(info: string) { await post('/api/match-info', { info }); }
-export async function saveLayout(layout: LayoutConfig) { await post('/api/layout', layout); }
-export async function toggleGameReport() { await post('/api/game-report/toggle', {}); }
-export async function toggleScoreboard() { await post('/api/scoreboard/toggle', {}); }
-export async function toggleMatchInfoVisibility() { await post('/api/match-info/toggle', {}); }
-export async function togglePlayersListA() { await post('/api/players-list/toggle-a', {}); }
-export async function togglePlayersListB() { await post('/api/players-list/toggle-b', {}); }
-export async function setPlayersListVisibility(visibleA: boolean, visibleB: boolean) { await post('/api/players-list/set', { visibleA, visibleB }); }
+export async function toggleGameReport() { await sendCommand('game_report_toggle', {}, '/api/game-report/toggle'); }
+export async function toggleScoreboard() { await sendCommand('scoreboard_toggle', {}, '/api/scoreboard/toggle'); }
+export async function toggleMatchInfoVisibility() { await sendCommand('match_info_toggle', {}, '/api/match-info/toggle'); }
+export async function togglePlayersListA() { await sendCommand('players_list_toggle_a', {}, '/api/players-list/toggle-a'); }
+export async function togglePlayersListB() { await sendCommand('players_list_toggle_b', {}, '/api/players-list/toggle-b'); }
+export async function setPlayersListVisibility(visibleA: boolean, visibleB: boolean) { await sendCommand('players_list_set', { visibleA, visibleB }, '/api/players-list/set'); }
 export async function addPlayer(team: 'teamA' | 'teamB', number: number, name: string) { await post('/api/player/add', { team, number, name }); }
 export async function replacePlayer(team: 'teamA' | 'teamB', number: number, name: string) { await post('/api/player/replace', { team, number, name }); }
 export async function clearPlayerList(team: 'teamA' | 'teamB') { await post('/api/player/clear', { team }); }
 export async function deletePlayer(team: 'teamA' | 'teamB', number: number) { await post('/api/player/delete', { team, number }); }
 export async function addGoal(team: 'teamA' | 'teamB', number: number, regMinute: number, addMinute: number, isOwnGoal: boolean, isPenalty: boolean) { 
-  await post('/api/player/goal', { team, number, regMinute, addMinute, isOwnGoal, isPenalty }); 
-  if (appState.isAutoAddScoreOn) { 
-    const { config } = getState(); if (!config) return; 
-    if (isOwnGoal) { const opponent = team === 'teamA' ? 'teamB' : 'teamA'; setScore(opponent, config[opponent].score + 1); } 
-    else { setScore(team, config[team].score + 1); } 
+  const operations: BatchOperation[] = [{ op: 'add_goal', data: { team, number, regMinute, addMinute, isOwnGoal, isPenalty } }];
+  const { config } = getState();
+  if (appState.isAutoAddScoreOn && config) { 
+    // Goal and score change are applied and broadcast together
+    const scoringTeam = isOwnGoal ? (team === 'teamA' ? 'teamB' : 'teamA') : team;
+    operations.push({ op: 'set_score', data: { team: scoringTeam, score: config[scoringTeam].score + 1 } });
   } 
+  await applyBatch(operations);
+}
+export async function substitutePlayers(team: 'teamA' | 'teamB', outNumber: number, inNumber: number) {
+  await applyBatch([{ op: 'toggle_on_field', data: { team, number: outNumber } }, { op: 'toggle_on_field', data: { team, number: inNumber } }]);
 }
-export async function addCard(team: 'teamA' | 'teamB', number: number, cardType: 'yellow' | 'red', regMinute: number, addMinute: number) { await post('/api/player/card', { team, number, card_type: cardType, regMinute, addMinute }); }
-export async function toggleOnField(team: 'teamA' | 'teamB', number: number) { await post('/api/player/togglefield', { team, number }); }
+export async function addCard(team: 'teamA' | 'teamB', number: number, cardType: 'yellow' | 'red', regMinute: number, addMinute: number) { await sendCommand('player_card', { team, number, card_type: cardType, regMinute, addMinute }, '/api/player/card'); }
+export async function toggleOnField(team: 'teamA' | 'teamB', number: number) { await sendCommand('player_togglefield', { team, number }, '/api/player/togglefield'); }
 export async function editPlayer(team: 'teamA' | 'teamB', originalNumber: number, playerData: PlayerConfig) { await post('/api/player/edit', { team, original_number: originalNumber, ...playerData }); }
 export async function resetTeamStats(team: 'teamA' | 'teamB') { await post('/api/player/resetstats', { team }); }
-export async function downloadJson(fileName: string): Promise<Blob> { const url = `${API_URL}/api/json/${fileName}`; const response = await fetch(url); if (!response.ok) throw new Error('Error'); return await response.blob(); }
-export async function getRawJson(fileName: string): Promise<string> { const url = `${API_URL}/api/json/${fileName}`; const response = await fetch(url); if (!response.ok) throw new Error('Error'); return await response.text(); }
+export async function applyBatch(operations: BatchOperation[]): Promise<BatchResult[]> { const res = await sendCommand('batch', { operations }, '/api/batch') as { results: BatchResult[] }; return res.results; }
+export async function downloadJson(fileName: string): Promise<Blob> { const url = apiUrl(`/api/json/${fileName}`); const response = await fetch(url); if (!response.ok) throw new Error('Error'); return await response.blob(); }
+export async function getRawJson(fileName: string): Promise<string> { const url = apiUrl(`/api/json/${fileName}`); const response = await fetch(url); if (!response.ok) throw new Error('Error'); return await response.text(); }
 export async function uploadJson(fileName: string, jsonData: string): Promise<string[]> { const res = await post('/api/json/upload', { file_name: fileName, json_data: jsonData }); return res.warnings || []; }
 
 // --- Updated Shortcut Functions ---
 export async function getShortcuts(): Promise<Shortcut[]> {
-    const res = await fetch(`${API_URL}/api/shortcuts`);
+    const res = await fetch(apiUrl('/api/shortcuts'));
     if(!res.ok) throw new Error("Failed to fetch shortcuts");
     return await res.json();
 }
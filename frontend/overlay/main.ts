@@ -3,9 +3,10 @@ import {
   initStateManager,
   subscribe,
   getState,
+  getDisplayedSeconds,
   STATE_UPDATE_EVENT,
   type PlayerConfig,
-  type Goal
+  type ReportEvent
 } from '../control_panel/stateManager';
 
 // Import Global Shortcuts
@@ -110,13 +111,11 @@ const renderPlayerList = (players: PlayerConfig[], targetLength: number, isScrol
   if (isScrolling) { return listHtml + listHtml; } else { return listHtml; }
 };
 
-const renderGoalScorers = (teamPlayers: PlayerConfig[], opponentPlayers: PlayerConfig[]): string => {
-  const teamGoals = teamPlayers.flatMap(p => p.goals.filter(g => !g.isOwnGoal).map(g => ({ reg: g.regMinute, add: g.addMinute, playerName: p.name, playerNumber: p.number, type: 'Goal', isPenalty: g.isPenalty })));
-  const opponentOwnGoals = opponentPlayers.flatMap(p => p.goals.filter(g => g.isOwnGoal).map(g => ({ reg: g.regMinute, add: g.addMinute, playerName: p.name, playerNumber: p.number, type: 'Own Goal', isPenalty: false })));
-  const allEvents = [...teamGoals, ...opponentOwnGoals].sort((a, b) => { if (a.reg !== b.reg) return a.reg - b.reg; return a.add - b.add; });
-  if (allEvents.length === 0) { return '<span></span>'; }
-  return allEvents.map(event => {
-    const timeString = event.add > 0 ? `${event.reg}+${event.add}'` : `${event.reg}'`;
+// Goals credited to a team (own goals included), already sorted by the backend's game report
+const renderGoalScorers = (goals: ReportEvent[]): string => {
+  if (goals.length === 0) { return '<span></span>'; }
+  return goals.map(event => {
+    const timeString = event.addMinute > 0 ? `${event.regMinute}+${event.addMinute}'` : `${event.regMinute}'`;
     const penaltyString = event.type === 'Goal' && event.isPenalty ? ' (P)' : '';
     const ogString = event.type === 'Own Goal' ? ' (OG)' : '';
     return `<div class="overlay-goal-scorer"><span class="player-number">#${event.playerNumber}</span><span class="player-name">${event.playerName}${ogString}${penaltyString}</span><span class="goal-minutes">${timeString}</span></div>`;
@@ -129,12 +128,18 @@ const renderRedCards = (count: number): string => {
   return Array(count).fill('').map(() => `<div class="red-card-box"></div>`).join('');
 };
 
+// Between server ticks the clock runs on locally, so a late or coalesced tick does not freeze it
+function renderClock() {
+  const text = formatTime(getDisplayedSeconds());
+  if (timerDisplay.textContent !== text) timerDisplay.textContent = text;
+}
+
 function updateUI() {
   const { 
-    config, timer, extraTime, scoreboardStyle, 
+    config, extraTime, scoreboardStyle, 
     isGameReportVisible, isScoreboardVisible, isMatchInfoVisible,
     isPlayersListVisibleA, isPlayersListVisibleB,
-    varState
+    varState, report
   } = getState();
   
   const SCROLL_TRIGGER_LIMIT = 15;
@@ -192,11 +197,13 @@ function updateUI() {
     if (reportMiddleStripASecondary) reportMiddleStripASecondary.style.backgroundColor = config.teamA.colors.secondary;
     if (reportMiddleStripBPrimary) reportMiddleStripBPrimary.style.backgroundColor = config.teamB.colors.primary;
     if (reportMiddleStripBSecondary) reportMiddleStripBSecondary.style.backgroundColor = config.teamB.colors.secondary;
-    gameReportGoalsA.innerHTML = renderGoalScorers(config.teamA.players, config.teamB.players);
-    gameReportGoalsB.innerHTML = renderGoalScorers(config.teamB.players, config.teamA.players);
+    if (report) {
+      gameReportGoalsA.innerHTML = renderGoalScorers(report.teamA.goals);
+      gameReportGoalsB.innerHTML = renderGoalScorers(report.teamB.goals);
+    }
   }
 
-  timerDisplay.textContent = formatTime(timer.seconds);
+  renderClock();
   if (extraTimeBox && extraTimeDisplay) {
     if (extraTime.isVisible && extraTime.minutes > 0) { extraTimeDisplay.textContent = `+${extraTime.minutes}'`; extraTimeBox.style.display = 'flex'; } 
     else { extraTimeBox.style.display = 'none'; }
@@ -276,4 +283,5 @@ document.addEventListener('DOMContentLoaded', async () => {
   
   subscribe(updateUI);
   updateUI();
+  window.setInterval(() => { if (getState().timer.isRunning) renderClock(); }, 100);
 });